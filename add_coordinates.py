@@ -5,35 +5,41 @@ INGATLAN CSV KOORDINÁTA BŐVÍTŐ
 ==============================
 
 🎯 HASZNÁLAT:
-python add_coordinates.py <csv_filename>
+python add_coordinates.py <csv_filename> [--export-csv] [--stream] [--chunk-size=N] [--no-resume]
 
 📋 PÉLDA:
-python add_coordinates.py ingatlan_reszletes_kobany    # Koordináták hozzáadása
-    result = add_coordinates_to_csv(csv_filename, api_key)
-    
-    if result:
-        print(f"\n🎉 SIKERES KOORDINÁTA HOZZÁADÁS!")
-        print(f"📄 Eredeti fájl: {csv_filename}")
-        print(f"📄 Koordinátás fájl: {result}")
-        print(f"\n💡 Most már használhatod a dashboard generáláshoz:")
-        print(f"   python generate_dashboard.py {result}")
-    else:
-        print("❌ Koordináta hozzáadás sikertelen!")
-        sys.exit(1)telep_20250822_093251.csv
+python add_coordinates.py ingatlan_reszletes_kobanya_hegyi_lakotelep_20250822_093251.csv
+python add_coordinates.py ingatlan_reszletes_kobanya_hegyi_lakotelep_20250822_093251.csv --stream
 
 ⚡ A script automatikusan:
 1. Hozzáadja a Google Maps koordinátákat (geo_latitude, geo_longitude, geo_address_from_api)
-2. Létrehozza a koordinátákkal bővített CSV fájlt
-3. Megtartja az eredeti fájlstruktúrát és oszlopsorrendet
+   párhuzamosan, GEOCODE_QPS kérés/s limittel, azonos címeket csak egyszer kérdezve
+2. Az új koordinátákat a sidecar tárba írja (koordinatak.sqlite, hirdetés ID szerint) -
+   a dashboardok betöltéskor csatolják, a CSV változatlan marad
+3. --export-csv esetén koordinátákkal bővített teljes CSV másolatot is készít
+   (eredeti oszlopsorrend megtartásával; a leírás helyett csak a `leiras_hash` -
+   a szöveg a tartalom archívumban van, content_archive)
+4. --stream / --chunk-size=N esetén chunkonként dolgozik (korlátos memória), minden chunk után
+   checkpointot ír - megszakítás után újraindítva onnan folytatja
 """
 
 import pandas as pd
-import googlemaps
 import os
 import sys
-import time
 import glob
+import json
 from datetime import datetime
+from content_archive import archive_columns, strip_archived_columns
+from coordinate_store import COORD_COLUMNS, CoordinateStore, attach_coordinates, listing_ids
+from dataset_io import (CSV_ENCODING, CSV_SEP, PARQUET_AVAILABLE, atomic_write, atomic_write_csv,
+                        columnar_path, write_columnar)
+from dataset_manifest import register_dataset
+from geocode_cache import GeocodeCache
+from geocoder_backends import create_geocoder
+from geocoding_engine import ConcurrentGeocoder, DEFAULT_QPS, DEFAULT_WORKERS, LOCAL_QPS
+from price_hexbin import refresh_price_surface, surface_path
+
+DEFAULT_CHUNK_SIZE = 5000
 
 def load_env_file():
     """Egyszerű .env fájl betöltés dotenv nélkül"""
@@ -79,16 +85,108 @@ def check_existing_coordinates(df):
         print(f"📍 Nincs meglévő koordináta adat")
         return 0
 
-def add_coordinates_to_csv(csv_file, api_key):
-    """Koordináták hozzáadása a megadott CSV-hez - JAVÍTOTT verzió"""
+def create_engine(geocoder, cache, qps=DEFAULT_QPS, workers=DEFAULT_WORKERS):
+    """Párhuzamos geocoding motor: dedup + cache + token-bucket rate limit + retry"""
+    if geocoder.local:
+        qps = LOCAL_QPS  # Helyi backend (pl. gazetteer) - nincs API limit
+    print(f"   ⚡ Párhuzamos geocoding: {workers} szál, max {qps:g} kérés/s")
+    return ConcurrentGeocoder(geocoder.fetch_func, cache=cache if geocoder.cacheable else None,
+                              qps=qps, workers=workers)
+
+def geocode_missing_rows(df, engine, progress=None, verbose=True):
+    """Koordináta nélküli sorok geocodolása helyben - (új tár sorok, sikeres, sikertelen)"""
+    for col in COORD_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    df['geo_address_from_api'] = df['geo_address_from_api'].astype(object)
+    
+    # Geocodolandó sorok - Hungary-t hozzáadjuk a pontosság érdekében
+    missing_mask = df['geo_latitude'].isna() | df['geo_longitude'].isna()
+    search_addresses = {i: f"{df.at[i, 'cim']}, Hungary" for i in df.index[missing_mask]}
+    results = engine.geocode_many(list(search_addresses.values()), progress=progress)
+    
+    ids = listing_ids(df)
+    new_rows = []
+    successful = failed = 0
+    for i, search_address in search_addresses.items():
+        result = results[search_address]
+        if verbose:
+            address = str(df.at[i, 'cim'])
+            print(f"   {i+1:3d}/{len(df)}: {address[:60]:<60}", end="")
+        
+        if isinstance(result, Exception):
+            if verbose:
+                print(f" ❌ Hiba: {str(result)[:30]}...")
+            failed += 1
+        elif result:
+            location = result['geometry']['location']
+            
+            # Koordináták mentése
+            df.at[i, 'geo_latitude'] = location['lat']
+            df.at[i, 'geo_longitude'] = location['lng']
+            df.at[i, 'geo_address_from_api'] = result['formatted_address']
+            new_rows.append((ids[i], location['lat'], location['lng'], result['formatted_address']))
+            
+            if verbose:
+                source_mark = " 🗄️" if result.get('cached') else ""
+                print(f" ✅ ({location['lat']:.6f}, {location['lng']:.6f}){source_mark}")
+            successful += 1
+        else:
+            if verbose:
+                print(f" ❌ Nincs találat")
+            failed += 1
+    
+    return new_rows, successful, failed
+
+def coordinates_output_filename(csv_file):
+    """Koordinátás CSV export fájlnév az input alapján (új timestamp-pel)"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    base_name = os.path.splitext(os.path.basename(csv_file))[0]
+    
+    # Ha már koordinátás, akkor új timestamp-pel
+    if "_koordinatak_" in base_name:
+        base_name = base_name.split("_koordinatak_")[0]
+    
+    return f"{base_name}_koordinatak_{timestamp}.csv"
+
+def with_coordinate_columns_last(df):
+    """Eredeti oszlopsorrend megtartása + koordináta oszlopok a végén"""
+    original_columns = [col for col in df.columns if col not in COORD_COLUMNS]
+    return df[original_columns + COORD_COLUMNS]
+
+def export_frame(df):
+    """Koordinátás export sorai: koordináta oszlopok a végén, leírás csak hash-ként (tartalom archívum)"""
+    return strip_archived_columns(archive_columns(with_coordinate_columns_last(df).copy()))
+
+def derived_files_outdated(csv_file):
+    """Hiányzik vagy régebbi a CSV-nél a .parquet másolat / ár/m² felület?"""
+    derived = [surface_path(csv_file)]
+    if PARQUET_AVAILABLE:
+        derived.append(columnar_path(csv_file))
+    csv_mtime = os.path.getmtime(csv_file)
+    return any(not os.path.exists(path) or os.path.getmtime(path) < csv_mtime for path in derived)
+
+def add_coordinates_to_csv(csv_file, api_key=None, cache=None, qps=DEFAULT_QPS, workers=DEFAULT_WORKERS,
+                           geocoder=None, backend=None, store=None, export_csv=False):
+    """Koordináták hozzáadása a megadott CSV-hez - párhuzamos, rate-limitált, cache-elt geocodinggal
+
+    Az új koordináták a sidecar tárba (CoordinateStore) kerülnek, hirdetés azonosító szerint.
+    `export_csv=True` esetén a régi módon teljes `*_koordinatak_<timestamp>.csv` másolat is készül.
+    """
     
     print("🌍 INGATLAN CSV KOORDINÁTA BŐVÍTŐ")
     print("="*50)
     print(f"📊 CSV fájl: {csv_file}")
     
-    # Google Maps API inicializálás
-    gmaps = googlemaps.Client(key=api_key)
-    print("✅ Google Maps API inicializálva")
+    # Geocoding cache - ismételt futásnál a korábbi címek nem mennek ki az API-hoz
+    if cache is None:
+        cache = GeocodeCache()
+    print(f"🗄️  Geocoding cache: {cache.db_path}")
+    
+    # Geocoder backend (google / cache / fake / fake-http) inicializálás
+    if geocoder is None:
+        geocoder = create_geocoder(backend, api_key=api_key, cache=cache)
+    print(f"✅ Geocoder backend inicializálva: {geocoder.name}")
     
     # CSV fájl ellenőrzése
     if not verify_csv_exists(csv_file):
@@ -107,6 +205,12 @@ def add_coordinates_to_csv(csv_file, api_key):
         print(f"❌ CSV betöltési hiba: {e}")
         return False
     
+    # Sidecar koordináta tár - a korábbi futások eredményei lustán csatolva
+    if store is None:
+        store = CoordinateStore()
+    print(f"📌 Koordináta tár: {store.db_path} ({len(store)} hirdetés)")
+    df = attach_coordinates(df, store.db_path)
+    
     # Meglévő koordináták ellenőrzése
     existing_coords = check_existing_coordinates(df)
     
@@ -124,8 +228,6 @@ def add_coordinates_to_csv(csv_file, api_key):
         return False
     
     # Koordináták hozzáadása
-    successful_geocodes = 0
-    failed_geocodes = 0
     skipped_geocodes = existing_coords
     
     print(f"\n🗺️ Koordináta geocoding indítása...")
@@ -133,74 +235,55 @@ def add_coordinates_to_csv(csv_file, api_key):
     print(f"   📍 Már meglévő koordináták: {existing_coords}")
     print(f"   🆕 Új geocoding szükséges: {len(df) - existing_coords}")
     
-    for i, row in df.iterrows():
-        # Ha már van koordináta, akkor kihagyás
-        if pd.notna(row.get('geo_latitude')) and pd.notna(row.get('geo_longitude')):
-            continue
-            
-        address = row['cim']
-        print(f"   {i+1:3d}/{len(df)}: {address[:60]:<60}", end="")
-        
-        try:
-            # Geocoding - Hungary-t hozzáadjuk a pontosság érdekében
-            search_address = f"{address}, Hungary"
-            result = gmaps.geocode(search_address)
-            
-            if result and len(result) > 0:
-                location = result[0]['geometry']['location']
-                formatted_addr = result[0]['formatted_address']
-                
-                # Koordináták mentése
-                df.at[i, 'geo_latitude'] = location['lat']
-                df.at[i, 'geo_longitude'] = location['lng'] 
-                df.at[i, 'geo_address_from_api'] = formatted_addr
-                
-                print(f" ✅ ({location['lat']:.6f}, {location['lng']:.6f})")
-                successful_geocodes += 1
-                
-            else:
-                print(f" ❌ Nincs találat")
-                failed_geocodes += 1
-                
-        except Exception as e:
-            print(f" ❌ Hiba: {str(e)[:30]}...")
-            failed_geocodes += 1
-        
-        # Rate limiting - max 50 kérés/másodperc (Google Maps limit)
-        time.sleep(0.05)  # 20ms késleltetés
-        
-        # Progressz jelentés minden 10. elemnél
-        if (i + 1) % 10 == 0:
-            progress = (i + 1) / len(df) * 100
-            print(f"   📊 Haladás: {progress:.1f}% ({successful_geocodes} siker, {failed_geocodes} sikertelen)")
+    engine = create_engine(geocoder, cache, qps, workers)
+    
+    def report_progress(done, total):
+        if total:
+            print(f"   📊 Haladás: {done / total * 100:.1f}% ({done}/{total} egyedi cím)")
+    
+    new_rows, successful_geocodes, failed_geocodes = geocode_missing_rows(df, engine, progress=report_progress)
     
     print(f"\n� GEOCODING EREDMÉNY:")
     print(f"   ✅ Sikeres geocoding: {successful_geocodes}")
     print(f"   ❌ Sikertelen geocoding: {failed_geocodes}")
     print(f"   ⏭️  Kihagyott (már volt): {skipped_geocodes}")
+    cache_stats = cache.stats()
+    engine_stats = engine.stats()
+    print(f"   🗄️  Cache találat: {cache_stats['hits']} | API hívás: {engine_stats['api_calls']} (ebből újrapróba: {engine_stats['retries']})")
     print(f"   📈 Sikerességi arány: {successful_geocodes/(len(df)-skipped_geocodes)*100:.1f}%" if len(df)-skipped_geocodes > 0 else "   📈 Minden rekordnak már volt koordinátája")
     
-    # Koordinátákkal bővített CSV mentése
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    # Új koordináták a sidecar tárba - csak az új sorok íródnak
+    stored = store.upsert_many(new_rows)
+    print(f"\n📌 Koordináta tár frissítve: +{stored} hirdetés ({store.db_path})")
+    if stored < len(new_rows):
+        print(f"   ⚠️  {len(new_rows) - stored} sor hirdetés azonosító (link) nélkül - csak CSV exporttal menthető")
     
-    # Output fájl név generálása az input alapján
-    base_name = os.path.splitext(os.path.basename(csv_file))[0]
+    # Oszlopos .parquet másolat + hexagon ár/m² felület - csak ha új koordináta jött, vagy hiányzik/elavult
+    if stored or derived_files_outdated(csv_file):
+        write_columnar(df, csv_file)
+        register_dataset(csv_file, df)
+        surface_file = refresh_price_surface(df, csv_file)
+        if surface_file:
+            print(f"🔷 Ár/m² felület frissítve: {surface_file}")
+    else:
+        print("⏭️  Nincs új koordináta - a .parquet másolat és az ár/m² felület változatlan")
     
-    # Ha már koordinátás, akkor új timestamp-pel
-    if "_koordinatak_" in base_name:
-        base_name = base_name.split("_koordinatak_")[0]
+    if not export_csv:
+        coord_count = df['geo_latitude'].notna().sum()
+        print(f"✅ Ellenőrzés: {coord_count}/{len(df)} rekordhoz van koordináta ({coord_count / len(df) * 100:.1f}%)")
+        return csv_file
     
-    output_file = f"{base_name}_koordinatak_{timestamp}.csv"
+    # Koordinátákkal bővített CSV mentése (régi, teljes másolatos mód)
+    output_file = coordinates_output_filename(csv_file)
     
     try:
-        # Eredeti oszlopsorrend megtartása + koordináta oszlopok a végén
-        original_columns = [col for col in df.columns if col not in ['geo_latitude', 'geo_longitude', 'geo_address_from_api']]
-        coord_columns = ['geo_latitude', 'geo_longitude', 'geo_address_from_api']
-        final_columns = original_columns + coord_columns
-        
-        # CSV mentése az eredeti formátumban (pipe separator)
-        df[final_columns].to_csv(output_file, sep='|', encoding='utf-8-sig', index=False)
+        # CSV mentése az eredeti formátumban (pipe separator), koordináta oszlopok a végén
+        export_df = export_frame(df)
+        atomic_write_csv(export_df, output_file)
         print(f"\n💾 Koordinátákkal bővített CSV mentve: {output_file}")
+        write_columnar(export_df, output_file)
+        register_dataset(output_file, df)
+        refresh_price_surface(df, output_file)
         
         # Ellenőrzés
         coord_count = df['geo_latitude'].notna().sum()
@@ -217,29 +300,204 @@ def add_coordinates_to_csv(csv_file, api_key):
         print(f"❌ CSV mentési hiba: {e}")
         return False
 
+def checkpoint_path(csv_file):
+    """Streaming mód checkpoint fájl útvonala (a CSV mellett)"""
+    return f"{csv_file}.coords.checkpoint.json"
+
+def load_checkpoint(csv_file):
+    """Checkpoint betöltése - None, ha nincs vagy a forrás CSV azóta megváltozott"""
+    path = checkpoint_path(csv_file)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Hibás checkpoint, újrakezdés: {e}")
+        return None
+    source = os.stat(csv_file)
+    if checkpoint.get('source_size') != source.st_size or checkpoint.get('source_mtime') != source.st_mtime:
+        print("⚠️  A CSV a checkpoint óta megváltozott - feldolgozás az elejéről")
+        return None
+    return checkpoint
+
+def save_checkpoint(csv_file, checkpoint):
+    """Checkpoint atomikus mentése minden chunk után"""
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f, ensure_ascii=False, indent=2)
+    atomic_write(checkpoint_path(csv_file), write)
+
+def add_coordinates_streaming(csv_file, api_key=None, chunk_size=DEFAULT_CHUNK_SIZE, cache=None,
+                              qps=DEFAULT_QPS, workers=DEFAULT_WORKERS, geocoder=None, backend=None,
+                              store=None, export_csv=False, resume=True):
+    """Koordináták hozzáadása chunkonként - korlátos memória, checkpoint/folytatás megszakítás után
+
+    Minden chunk: tár csatolás -> párhuzamos geocoding -> tár flush -> (export append) -> checkpoint.
+    Megszakadt futás újraindításkor a checkpointban rögzített sortól folytatódik.
+    """
+    
+    print("🌍 INGATLAN CSV KOORDINÁTA BŐVÍTŐ (streaming)")
+    print("="*50)
+    print(f"📊 CSV fájl: {csv_file} | chunk méret: {chunk_size}")
+    
+    if not verify_csv_exists(csv_file):
+        return False
+    
+    if cache is None:
+        cache = GeocodeCache()
+    print(f"🗄️  Geocoding cache: {cache.db_path}")
+    if geocoder is None:
+        geocoder = create_geocoder(backend, api_key=api_key, cache=cache)
+    print(f"✅ Geocoder backend inicializálva: {geocoder.name}")
+    if store is None:
+        store = CoordinateStore()
+    print(f"📌 Koordináta tár: {store.db_path} ({len(store)} hirdetés)")
+    
+    # Checkpoint - folytatás a már feldolgozott sorok után
+    checkpoint = load_checkpoint(csv_file) if resume else None
+    if checkpoint and bool(checkpoint.get('output_file')) != export_csv:
+        print("⚠️  A checkpoint más export módban készült - feldolgozás az elejéről")
+        checkpoint = None
+    source = os.stat(csv_file)
+    if checkpoint is None:
+        checkpoint = {
+            'source': os.path.abspath(csv_file),
+            'source_size': source.st_size,
+            'source_mtime': source.st_mtime,
+            'rows_done': 0,
+            'output_file': coordinates_output_filename(csv_file) if export_csv else None,
+            'output_bytes': 0,
+            'successful': 0,
+            'failed': 0,
+            'skipped': 0,
+        }
+    else:
+        print(f"⏩ Folytatás checkpointból: {checkpoint['rows_done']} sor már feldolgozva")
+    
+    # Export: részleges fájlba appendelünk, a végén egyetlen rename
+    partial_file = f"{checkpoint['output_file']}.part" if export_csv else None
+    if export_csv:
+        with open(partial_file, 'ab') as f:
+            # Checkpoint utáni (félbemaradt) chunk levágása
+            f.truncate(checkpoint['output_bytes'])
+    
+    engine = create_engine(geocoder, cache, qps, workers)
+    rows_done = checkpoint['rows_done']
+    
+    # A checkpoint beolvasott (parse-olt) sorokat számol: a kihagyás is ezek szerint történik, nem
+    # nyers sorok szerint - a hibás (kihagyott) sorok és a többsoros mezők miatt a kettő eltér
+    to_skip = rows_done
+    
+    try:
+        reader = pd.read_csv(csv_file, sep=CSV_SEP, encoding=CSV_ENCODING, on_bad_lines='skip',
+                             chunksize=chunk_size)
+        for chunk in reader:
+            if to_skip:
+                skipped_now = min(to_skip, len(chunk))
+                to_skip -= skipped_now
+                chunk = chunk.iloc[skipped_now:]
+                if chunk.empty:
+                    continue
+            chunk = chunk.reset_index(drop=True)
+            if 'cim' not in chunk.columns:
+                print("❌ Nincs 'cim' oszlop a CSV-ben!")
+                return False
+            
+            chunk = attach_coordinates(chunk, store.db_path)
+            existing = int(pd.to_numeric(chunk['geo_latitude'], errors='coerce').notna().sum()) \
+                if 'geo_latitude' in chunk.columns else 0
+            
+            new_rows, successful, failed = geocode_missing_rows(chunk, engine, verbose=False)
+            stored = store.upsert_many(new_rows)
+            
+            if export_csv:
+                with open(partial_file, 'a', encoding=CSV_ENCODING if checkpoint['output_bytes'] == 0 else 'utf-8',
+                          newline='') as f:
+                    export_frame(chunk).to_csv(f, sep=CSV_SEP, index=False,
+                                               header=checkpoint['output_bytes'] == 0)
+                checkpoint['output_bytes'] = os.path.getsize(partial_file)
+            
+            rows_done += len(chunk)
+            checkpoint['rows_done'] = rows_done
+            checkpoint['successful'] += successful
+            checkpoint['failed'] += failed
+            checkpoint['skipped'] += existing
+            save_checkpoint(csv_file, checkpoint)
+            
+            print(f"   📦 {rows_done} sor kész | chunk: ✅ {successful} ❌ {failed} ⏭️  {existing} | tár: +{stored}")
+    except KeyboardInterrupt:
+        print(f"\n⏸️  Megszakítva {rows_done} sor után - újraindításkor innen folytatódik")
+        raise
+    except Exception as e:
+        print(f"❌ Streaming feldolgozási hiba {rows_done} sor után: {e}")
+        print(f"💡 Újraindításkor a checkpointból folytatódik ({checkpoint_path(csv_file)})")
+        return False
+    
+    if rows_done == 0:
+        print("❌ A CSV fájl üres!")
+        return False
+    
+    print(f"\n� GEOCODING EREDMÉNY:")
+    print(f"   ✅ Sikeres geocoding: {checkpoint['successful']}")
+    print(f"   ❌ Sikertelen geocoding: {checkpoint['failed']}")
+    print(f"   ⏭️  Kihagyott (már volt): {checkpoint['skipped']}")
+    cache_stats = cache.stats()
+    engine_stats = engine.stats()
+    print(f"   🗄️  Cache találat: {cache_stats['hits']} | API hívás: {engine_stats['api_calls']} (ebből újrapróba: {engine_stats['retries']})")
+    
+    result = csv_file
+    if export_csv:
+        os.replace(partial_file, checkpoint['output_file'])
+        result = checkpoint['output_file']
+        print(f"\n💾 Koordinátákkal bővített CSV mentve: {result}")
+        register_dataset(result)  # manifest: a dashboardok innen találják meg
+    
+    # Sikeres befejezés - checkpoint törlése
+    os.remove(checkpoint_path(csv_file))
+    return result
+
 def main():
     """Főalkalmazás"""
     print("🌍 GPS KOORDINÁTA HOZZÁADÓ")
     print("=" * 50)
     
     # Argumentum ellenőrzés
-    if len(sys.argv) != 2:
-        print("❌ Használat: python add_coordinates.py <csv_filename>")
+    flags = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    export_csv = '--export-csv' in flags
+    stream = '--stream' in flags or any(flag.startswith('--chunk-size=') for flag in flags)
+    resume = '--no-resume' not in flags
+    chunk_size = DEFAULT_CHUNK_SIZE
+    for flag in flags:
+        if flag.startswith('--chunk-size='):
+            chunk_size = int(flag.split('=', 1)[1])
+    if len(args) != 1:
+        print("❌ Használat: python add_coordinates.py <csv_filename> [--export-csv] [--stream] [--chunk-size=N] [--no-resume]")
         print("\n📋 Példa:")
         print("   python add_coordinates.py ingatlan_reszletes_kobanya_hegyi_lakotelep_20250822_093251.csv")
         print("\n💡 Megjegyzések:")
         print("   - A GOOGLE_MAPS_API_KEY automatikusan betöltődik a .env fájlból")
         print("   - A script pipe (|) separátorú CSV fájlokat dolgoz fel")
         print("   - Csak azokhoz a rekordokhoz ad koordinátákat, amelyekhez még nincs")
+        print("   - Az eredmény a koordinatak.sqlite sidecar tárba kerül (COORDINATE_STORE_PATH)")
+        print("   - --export-csv: teljes *_koordinatak_<timestamp>.csv másolat is készül")
+        print(f"   - --stream / --chunk-size=N: chunkonkénti feldolgozás (alap: {DEFAULT_CHUNK_SIZE} sor), checkpointtal")
+        print("   - Megszakadt streaming futás automatikusan folytatódik (--no-resume: elölről)")
+        print("   - Párhuzamosság: GEOCODE_QPS (alap: 45) és GEOCODE_WORKERS (alap: 16)")
+        print("   - Backend: GEOCODER_BACKEND=google|cache|fake|fake-http|gazetteer (alap: google)")
         sys.exit(1)
     
-    csv_filename = sys.argv[1]
+    csv_filename = args[0]
     
     # .env fájl betöltése
     env_vars = load_env_file()
     api_key = env_vars.get('GOOGLE_MAPS_API_KEY') or os.environ.get('GOOGLE_MAPS_API_KEY')
+    backend = (env_vars.get('GEOCODER_BACKEND') or os.environ.get('GEOCODER_BACKEND') or 'google').lower()
     
-    if not api_key:
+    if backend != 'google':
+        print(f"🧪 Geocoder backend: {backend} (nincs Google API hívás)")
+    elif not api_key:
         print("❌ GOOGLE_MAPS_API_KEY nincs beállítva!")
         print("\n🔧 Megoldások:")
         print("1. Hozz létre .env fájlt a következő tartalommal:")
@@ -248,10 +506,20 @@ def main():
         print('   $env:GOOGLE_MAPS_API_KEY="your_api_key_here"')
         sys.exit(1)
     
-    print(f"🗝️  Google Maps API kulcs betöltve (.env fájlból: {'igen' if 'GOOGLE_MAPS_API_KEY' in env_vars else 'nem'})")
+    if api_key:
+        print(f"🗝️  Google Maps API kulcs betöltve (.env fájlból: {'igen' if 'GOOGLE_MAPS_API_KEY' in env_vars else 'nem'})")
+    
+    # Rate limit beállítás (.env / környezeti változó): GEOCODE_QPS, GEOCODE_WORKERS
+    qps = float(env_vars.get('GEOCODE_QPS') or os.environ.get('GEOCODE_QPS') or DEFAULT_QPS)
+    workers = int(env_vars.get('GEOCODE_WORKERS') or os.environ.get('GEOCODE_WORKERS') or DEFAULT_WORKERS)
     
     # Koordináták hozzáadása
-    result = add_coordinates_to_csv(csv_filename, api_key)
+    if stream:
+        result = add_coordinates_streaming(csv_filename, api_key, chunk_size=chunk_size, qps=qps, workers=workers,
+                                           backend=backend, export_csv=export_csv, resume=resume)
+    else:
+        result = add_coordinates_to_csv(csv_filename, api_key, qps=qps, workers=workers, backend=backend,
+                                        export_csv=export_csv)
     
     if result:
         print(f"\n🎉 SIKERES KOORDINÁTA HOZZÁADÁS!")
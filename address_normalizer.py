@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MAGYAR CÍM NORMALIZÁLÓ - KÖZÖS KANONIKUS CÍM KULCS
+==================================================
+
+🎯 CÉL:
+Egy cím mindenhol ugyanarra a kulcsra képződjön le: geocoding cache,
+duplikáció szűrés, iskolakörzet és városrész illesztés. A nyers, kisbetűsített
+szöveg összehasonlítása helyett a cím komponensekre bomlik, és ezekből
+kanonikus kulcs készül (egyszer számolva, cache-elve).
+
+📋 PÉLDA:
+    address_key("Budapest XI. kerület, Kenese u. 12.")     # 'budapest, 11. kerulet, kenese utca 12'
+    address_key("1118 Budapest, KENESE  UTCA 12")          # 'budapest, 11. kerulet, kenese utca 12'
+    parse_address("Budaörs, Baross utca 9-11.").hazszam_ig  # 11
+    street_key("ADY ENDRE  UTCA")                          # 'ady endre utca'
+    df['cim_kulcs'] = address_keys(df['cim'])              # vektorizált, egyedi címenként egyszer
+
+⚡ Normalizálási szabályok:
+- Kisbetű, ékezet nélkül, írásjelek és többszörös szóközök nélkül
+- Közterület típus rövidítések feloldása (u. -> utca, krt. -> korut, ...);
+  'út' és 'utca' külön típus marad
+- Kerület: 'XI. kerület', '11. ker.', 'Budapest XI.' vagy budapesti irányítószám
+- Házszám: '12/A', '12. A', '9-11.', '9 - 11' -> kezdő szám + betű + tartomány vége
+- 'Hungary' / 'Magyarország' elhagyva
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from text_normalizer import fold_accents
+
+# Közterület típus rövidítések -> teljes alak (ékezet nélküli kulcs térben)
+STREET_ABBREVIATIONS = {
+    'u': 'utca', 'krt': 'korut', 'sgt': 'sugarut', 'ltp': 'lakotelep',
+    'rkp': 'rakpart', 'stny': 'setany', 'pu': 'palyaudvar', 'hrsz': 'helyrajzi szam'
+}
+
+# Közterület típusok (teljes alak) - ezek jelzik, hogy a címrész utca és nem település
+STREET_TYPES = frozenset({
+    'utca', 'ut', 'utja', 'koz', 'ter', 'tere', 'korut', 'sugarut', 'fasor', 'sor', 'dulo',
+    'lejto', 'lepcso', 'setany', 'rakpart', 'park', 'liget', 'lakotelep', 'palyaudvar', 'udvar', 'szam'
+})
+
+_TOWN_ALIASES = {'bp': 'budapest'}
+_IGNORED_PARTS = frozenset({'hungary', 'magyarorszag', 'hu'})
+_ROMAN_VALUES = {'i': 1, 'v': 5, 'x': 10, 'l': 50}
+
+_DISTRICT_RE = re.compile(r'\b([ivxl]+|\d{1,2})\.?\s*ker(?:ulet)?\b\.?')
+# 'Budapest XI.' / 'Bp. 11.' - kerület előtag "kerület" szó nélkül
+_DISTRICT_PREFIX_RE = re.compile(r'^(budapest|bp)\.?\s+([ivxl]+|\d{1,2})\.(?=\s|$)')
+_POSTCODE_RE = re.compile(r'(?<!\d)(\d{4})(?!\d)')
+_HOUSE_NUMBER_RE = re.compile(r'^(.*?\D)\s*(\d{1,4})\s*[a-zA-Z]?\.?(?:\s*[/\-.]\s*\w*\.?)*\s*$')
+# Kanonikus tokenekre: szám [/ betű] [- szám]
+_NUMBER_TOKENS_RE = re.compile(r'^(\d{1,4})(?: ([a-z]))?(?: (\d{1,4}))?(?:\s|$)')
+
+Cim = namedtuple('Cim', ['telepules', 'kerulet', 'hely', 'utca', 'hazszam', 'hazszam_betu', 'hazszam_ig'])
+_EMPTY_CIM = Cim(None, None, None, None, None, None, None)
+
+
+def fold_address(text):
+    """Kisbetűs, ékezet nélküli, egységes szóközös alak"""
+    return re.sub(r'\s+', ' ', fold_accents(str(text or '').lower())).strip()
+
+
+def _tokens(text):
+    """Kanonikus tokenek (írásjel nélkül, rövidítések feloldva)"""
+    tokens = []
+    for token in re.findall(r'\w+', fold_address(text)):
+        expanded = STREET_ABBREVIATIONS.get(token, token)
+        tokens.extend(expanded.split())
+    return tokens
+
+
+@lru_cache(maxsize=65536)
+def street_key(name):
+    """Utcanév kanonikus kulcsa (ékezet, írásjel, rövidítés, szóköz független)"""
+    return ' '.join(_tokens(name))
+
+
+def street_name(key):
+    """Utca kulcs közterület típus nélkül ('ady endre utca' -> 'ady endre')"""
+    tokens = key.split()
+    while len(tokens) > 1 and tokens[-1] in STREET_TYPES:
+        tokens.pop()
+    return ' '.join(tokens)
+
+
+def town_key(name):
+    """Település kanonikus kulcsa (irányítószám és kerület nélkül)"""
+    text = _DISTRICT_RE.sub(' ', fold_address(name))
+    text = _DISTRICT_PREFIX_RE.sub(r'\1', text)
+    key = ' '.join(re.findall(r'[^\W\d]+', text))
+    return _TOWN_ALIASES.get(key, key)
+
+
+def roman_to_int(value):
+    """Római vagy arab szám -> int"""
+    if value.isdigit():
+        return int(value)
+    total = 0
+    for current, following in zip(value, value[1:] + ' '):
+        number = _ROMAN_VALUES[current]
+        total += -number if _ROMAN_VALUES.get(following, 0) > number else number
+    return total
+
+
+def parse_district(text):
+    """Budapesti kerület szám kinyerése ('XI. kerület', '11. ker.', 'Budapest XI.') - None ha nincs"""
+    folded = fold_address(text)
+    match = _DISTRICT_RE.search(folded) or _DISTRICT_PREFIX_RE.search(folded)
+    if not match:
+        return None
+    district = roman_to_int(match.group(match.lastindex))
+    return district if 1 <= district <= 23 else None
+
+
+def district_from_postcode(postcode):
+    """Budapesti irányítószám -> kerület (1118 -> 11)"""
+    postcode = str(postcode or '').strip()
+    if len(postcode) == 4 and postcode.startswith('1') and postcode.isdigit():
+        district = int(postcode[1:3])
+        return district if 1 <= district <= 23 else None
+    return None
+
+
+def parse_house_number(street_text):
+    """'Fillér utca 9-11.' -> ('Fillér utca', 9); házszám nélkül (szöveg, None)"""
+    match = _HOUSE_NUMBER_RE.match(str(street_text).strip())
+    if not match:
+        return str(street_text).strip(), None
+    return match.group(1).strip(' ,'), int(match.group(2))
+
+
+def _split_street(part):
+    """Utca címrész -> (utca kulcs, házszám, betű, tartomány vége) - None ha nem utca"""
+    tokens = _tokens(part)
+    type_positions = [i for i, token in enumerate(tokens) if token in STREET_TYPES]
+    if type_positions:
+        cut = type_positions[-1] + 1
+    else:
+        # Típus nélkül csak akkor utca, ha a végén házszám áll ('Kenese 12')
+        cut = next((i for i, token in enumerate(tokens) if token.isdigit()), len(tokens))
+        if cut == 0 or cut == len(tokens):
+            return None
+    street = ' '.join(tokens[:cut])
+    match = _NUMBER_TOKENS_RE.match(' '.join(tokens[cut:]))
+    if not match:
+        return street, None, None, None
+    number = int(match.group(1))
+    until = int(match.group(3)) if match.group(3) else None
+    if until is not None and until <= number:
+        until = None
+    return street, number, match.group(2), until
+
+
+@lru_cache(maxsize=65536)
+def _parse_address_str(address):
+    town = district = street = number = letter = until = None
+    places = []
+    for raw_part in address.split(','):
+        part = fold_address(raw_part)
+        if not part or part in _IGNORED_PARTS:
+            continue
+
+        postcode = _POSTCODE_RE.search(part)
+        if postcode:
+            part = _POSTCODE_RE.sub(' ', part, count=1).strip()
+        part_district = parse_district(part)
+        if part_district is not None and district is None:
+            district = part_district
+        remainder = _DISTRICT_PREFIX_RE.sub(r'\1', _DISTRICT_RE.sub(' ', part)).strip(' .')
+
+        if street is None:
+            parsed_street = _split_street(remainder)
+            if parsed_street:
+                street, number, letter, until = parsed_street
+                continue
+
+        part_town = town_key(remainder)
+        if not part_town:
+            continue
+        if town is None:
+            town = part_town
+            if postcode and district is None and town == 'budapest':
+                district = district_from_postcode(postcode.group(1))
+        elif part_town != town:
+            places.append(part_town)
+
+    if town is None and district is not None:
+        town = 'budapest'
+    if town is None and street is None and not places:
+        return _EMPTY_CIM
+    return Cim(town, district, ' '.join(places) or None, street, number, letter, until)
+
+
+def parse_address(address):
+    """Cím -> Cim(telepules, kerulet, hely, utca, hazszam, hazszam_betu, hazszam_ig) - cache-elve"""
+    if address is None or (isinstance(address, float) and address != address):
+        return _EMPTY_CIM
+    return _parse_address_str(str(address))
+
+
+def format_address_key(cim):
+    """Cim komponensek -> kanonikus kulcs szöveg"""
+    parts = [cim.telepules]
+    if cim.kerulet is not None:
+        parts.append(f"{cim.kerulet}. kerulet")
+    parts.append(cim.hely)
+    if cim.utca:
+        number = ''
+        if cim.hazszam is not None:
+            number = f" {cim.hazszam}"
+            if cim.hazszam_betu:
+                number += f"/{cim.hazszam_betu}"
+            if cim.hazszam_ig is not None:
+                number += f"-{cim.hazszam_ig}"
+        parts.append(cim.utca + number)
+    return ', '.join(part for part in parts if part)
+
+
+@lru_cache(maxsize=65536)
+def _address_key_str(address):
+    cim = _parse_address_str(address)
+    if cim is _EMPTY_CIM:
+        # Nem értelmezhető cím: egységes írásmódú szöveg
+        return ', '.join(filter(None, (' '.join(_tokens(part)) for part in address.split(','))))
+    return format_address_key(cim)
+
+
+def address_key(address):
+    """Kanonikus cím kulcs (cache, dedup, zóna illesztés közös kulcsa)"""
+    if address is None or (isinstance(address, float) and address != address):
+        return ''
+    return _address_key_str(str(address))
+
+
+def address_keys(addresses):
+    """Kanonikus kulcsok egy pandas oszlopra - egyedi címenként egyszer számolva"""
+    unique = addresses.dropna().unique()
+    mapping = {address: address_key(address) for address in unique}
+    return addresses.map(mapping).fillna('')
+
+
+@lru_cache(maxsize=65536)
+def address_text(address):
+    """Egységes írásmódú, ékezet nélküli cím szöveg kulcsszó illesztéshez (szóközzel keretezve)"""
+    return f" {' '.join(_tokens(address))} "
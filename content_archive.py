@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TARTALOM ARCHÍVUM - HASH SZERINT KULCSOLT, TÖMÖRÍTETT LEÍRÁSOK ÉS NYERS HTML
+===========================================================================
+
+🎯 CÉL:
+A `leiras` oszlop teszi ki a részletes CSV-k méretének nagyobb részét, és minden
+futás / `_koordinatak_` másolat / parquet másolat / történet pillanatkép újra
+eltárolja ugyanazt a szöveget. A nyers adatlap HTML pedig sehol nem maradt meg,
+így egy új mező kinyeréséhez újra kellett scrape-elni. Itt minden szöveg egyszer,
+tömörítve, a tartalma sha256 hash-e szerint kulcsolva tárolódik; az adatkészletek
+(`leiras_hash`, `html_hash` oszlop) hash-sel hivatkoznak rá.
+
+📋 HASZNÁLAT:
+    archive = ContentArchive()
+    digest = archive.put(html, KIND_HTML)                 # scraper: adatlaponként
+    archive_columns(df)                                   # mentés: leiras -> leiras_hash (egy tranzakció)
+    df = strip_archived_columns(df)                       # származtatott másolat leírás nélkül
+    df = restore_archived_columns(df)                     # olvasás: leiras visszaállítása hash-ből
+
+python content_archive.py import "ingatlan_reszletes_*.csv"   # meglévő leírások archiválása
+python content_archive.py stats
+python content_archive.py get <hash> [--output oldal.html]
+
+⚡ Jellemzők:
+- Tartalom címzés: azonos szöveg (futások, lokációk között is) egyszer tárolódik
+- zstd tömörítés, ha a `zstandard` csomag telepítve van, különben gzip (stdlib) -
+  a kodek blobonként rögzítve, vegyes archívum is olvasható
+- Kötegelt beszúrás: a már meglévő hash-ek nem tömörítődnek újra
+- SQLite WAL mód; ha az archívum nem létezik, a visszaállítás semmit nem csinál
+
+💡 Archívum helye: CONTENT_ARCHIVE_PATH környezeti változó, alapértelmezés: tartalom_archivum.sqlite
+   Helyi gyorsítótár (nincs verziókezelve, .gitignore) - a leírás mérvadó példánya a részletes
+   CSV; helyben újraírt forrás fájlból a leírás soha nem hagyható el.
+"""
+
+import argparse
+import glob
+import gzip
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import pandas as pd
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+DEFAULT_ARCHIVE_PATH = 'tartalom_archivum.sqlite'
+
+CODEC_ZSTD = 'zstd'
+CODEC_GZIP = 'gzip'
+
+KIND_DESCRIPTION = 'leiras'
+KIND_HTML = 'html'
+
+# Archivált szöveg oszlop -> hash oszlop az adatkészletben
+ARCHIVED_COLUMNS = {'leiras': 'leiras_hash'}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    codec TEXT NOT NULL,
+    raw_size INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    created_at REAL NOT NULL
+)
+"""
+
+# SQLite paraméter limit alatt maradva kötegelt IN (...) lekérdezés
+_QUERY_BATCH = 900
+_ZSTD_LEVEL = 10
+_GZIP_LEVEL = 6
+
+
+def archive_path(path=None):
+    """Archívum fájl útvonala"""
+    return path or os.environ.get('CONTENT_ARCHIVE_PATH', DEFAULT_ARCHIVE_PATH)
+
+
+def _as_bytes(content):
+    return content if isinstance(content, bytes) else str(content).encode('utf-8')
+
+
+def content_digest(content):
+    """Tartalom sha256 hash (hex) - ez az archívum kulcsa"""
+    return hashlib.sha256(_as_bytes(content)).hexdigest()
+
+
+def compress(data):
+    """Tömörítés a legjobb elérhető kodekkel -> (codec, blob)"""
+    if ZSTD_AVAILABLE:
+        return CODEC_ZSTD, zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(data)
+    return CODEC_GZIP, gzip.compress(data, compresslevel=_GZIP_LEVEL, mtime=0)
+
+
+def decompress(codec, blob):
+    """Blob kicsomagolása a tárolt kodek szerint"""
+    if codec == CODEC_GZIP:
+        return gzip.decompress(blob)
+    if codec == CODEC_ZSTD:
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("zstd tömörített blob - pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    raise ValueError(f"Ismeretlen kodek: {codec}")
+
+
+def _has_text(value):
+    return isinstance(value, (str, bytes)) and len(value) > 0
+
+
+class ContentArchive:
+    """sha256 hash -> tömörített szöveg / HTML tár"""
+
+    def __init__(self, path=None):
+        self.path = archive_path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def _known(self, digests):
+        known = set()
+        for start in range(0, len(digests), _QUERY_BATCH):
+            batch = digests[start:start + _QUERY_BATCH]
+            placeholders = ','.join('?' * len(batch))
+            known.update(row[0] for row in self._conn.execute(
+                f'SELECT hash FROM blobs WHERE hash IN ({placeholders})', batch))
+        return known
+
+    def put_many(self, contents, kind=KIND_DESCRIPTION):
+        """Tartalmak archiválása egy tranzakcióban - hash lista (üres / hiányzó értéknél None)"""
+        digests = [content_digest(content) if _has_text(content) else None for content in contents]
+        unique = {}
+        for digest, content in zip(digests, contents):
+            if digest is not None:
+                unique.setdefault(digest, content)
+        if not unique:
+            return digests
+
+        now = time.time()
+        with self._lock:
+            known = self._known(list(unique))
+            rows = []
+            for digest, content in unique.items():
+                if digest in known:
+                    continue
+                data = _as_bytes(content)
+                codec, blob = compress(data)
+                rows.append((digest, kind, codec, len(data), blob, now))
+            if rows:
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO blobs (hash, kind, codec, raw_size, data, created_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)', rows
+                )
+                self._conn.commit()
+        return digests
+
+    def put(self, content, kind=KIND_DESCRIPTION):
+        """Egy tartalom archiválása - hash (üres tartalomnál None)"""
+        return self.put_many([content], kind)[0]
+
+    def get_many(self, digests):
+        """hash -> szöveg dict (csak a meglévők)"""
+        digests = [d for d in dict.fromkeys(digests) if isinstance(d, str) and d]
+        found = {}
+        with self._lock:
+            for start in range(0, len(digests), _QUERY_BATCH):
+                batch = digests[start:start + _QUERY_BATCH]
+                placeholders = ','.join('?' * len(batch))
+                rows = self._conn.execute(
+                    f'SELECT hash, codec, data FROM blobs WHERE hash IN ({placeholders})', batch
+                ).fetchall()
+                for digest, codec, blob in rows:
+                    found[digest] = decompress(codec, blob).decode('utf-8')
+        return found
+
+    def get(self, digest):
+        """Egy tartalom szövegként - None, ha nincs az archívumban"""
+        return self.get_many([digest]).get(digest)
+
+    def stats(self):
+        """Darabszám, nyers és tárolt méret típusonként"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT kind, codec, COUNT(*), SUM(raw_size), SUM(LENGTH(data)) FROM blobs GROUP BY kind, codec'
+            ).fetchall()
+        return [{'kind': kind, 'codec': codec, 'count': count, 'raw_bytes': raw, 'stored_bytes': stored}
+                for kind, codec, count, raw, stored in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM blobs').fetchone()[0]
+
+    def close(self):
+        """Adatbázis kapcsolat bezárása"""
+        with self._lock:
+            self._conn.close()
+
+
+def archive_columns(df, path=None):
+    """Szöveg oszlopok archiválása, hash oszlop kitöltése (helyben) - visszaadja a df-et"""
+    columns = [column for column in ARCHIVED_COLUMNS if column in df.columns]
+    if df.empty or not columns:
+        return df
+    archive = ContentArchive(path)
+    try:
+        for column in columns:
+            values = df[column].tolist()
+            df[ARCHIVED_COLUMNS[column]] = pd.Series(archive.put_many(values, column), index=df.index, dtype=object)
+    finally:
+        archive.close()
+    return df
+
+
+def strip_archived_columns(df):
+    """Archivált szöveg oszlopok elhagyása, ahol a hash oszlop megvan (származtatott másolatokhoz)"""
+    drop = [column for column, hash_column in ARCHIVED_COLUMNS.items()
+            if column in df.columns and hash_column in df.columns]
+    return df.drop(columns=drop) if drop else df
+
+
+def restore_archived_columns(df, path=None):
+    """Hiányzó szöveg értékek visszaállítása a hash oszlopból - archívum nélkül változatlan df
+
+    Az oszlop hiányozhat teljesen (parquet / koordinátás másolat) vagy csak egyes sorokban
+    (régi és új pillanatképek vegyesen).
+    """
+    path = archive_path(path)
+    missing = {column: hash_column for column, hash_column in ARCHIVED_COLUMNS.items()
+               if hash_column in df.columns and (column not in df.columns or df[column].isna().any())}
+    if df.empty or not missing or not os.path.exists(path):
+        return df
+
+    df = df.copy()
+    archive = ContentArchive(path)
+    try:
+        for column, hash_column in missing.items():
+            values = df[column] if column in df.columns else pd.Series(None, index=df.index, dtype=object)
+            need = values.isna() & df[hash_column].notna()
+            if not need.any():
+                continue
+            found = archive.get_many(df.loc[need, hash_column].tolist())
+            df[column] = values.astype(object).where(~need, df[hash_column].map(found))
+    finally:
+        archive.close()
+    return df
+
+
+def _format_size(num_bytes):
+    return f"{(num_bytes or 0) / 1024 / 1024:.1f} MB"
+
+
+def main():
+    """Meglévő CSV leírások archiválása / statisztika / egy tartalom kiírása"""
+    parser = argparse.ArgumentParser(description='Tartalom archívum (hash szerint kulcsolt leírások, nyers HTML)')
+    parser.add_argument('command', choices=['import', 'stats', 'get'])
+    parser.add_argument('inputs', nargs='*', help="CSV fájlok / glob minták (import) vagy hash (get)")
+    parser.add_argument('--archive', default=None,
+                        help=f"Archívum fájl (alap: CONTENT_ARCHIVE_PATH vagy {DEFAULT_ARCHIVE_PATH})")
+    parser.add_argument('--output', default=None, help="Kimeneti fájl (get) - alapértelmezés: stdout")
+    args = parser.parse_args()
+
+    if args.command == 'get':
+        if len(args.inputs) != 1:
+            parser.error("get: pontosan egy hash szükséges")
+        if not os.path.exists(archive_path(args.archive)):
+            print(f"❌ Archívum nem található: {archive_path(args.archive)}")
+            sys.exit(1)
+        archive = ContentArchive(args.archive)
+        try:
+            content = archive.get(args.inputs[0])
+        finally:
+            archive.close()
+        if content is None:
+            print(f"❌ Nincs ilyen hash az archívumban: {args.inputs[0]}")
+            sys.exit(1)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(content)
+            print(f"💾 Kiírva: {args.output}")
+        else:
+            print(content)
+        return
+
+    if args.command == 'import':
+        from dataset_io import read_detailed_csv
+
+        files = []
+        for pattern in args.inputs or ['ingatlan_reszletes_*.csv']:
+            matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+            files.extend(f for f in matches if f not in files and os.path.exists(f))
+        if not files:
+            print("❌ Nincs archiválható CSV")
+            sys.exit(1)
+        for csv_file in files:
+            df = read_detailed_csv(csv_file, usecols=lambda name: name in ARCHIVED_COLUMNS)
+            if df.columns.empty:
+                print(f"⏭️  Kihagyva (nincs archiválható oszlop): {csv_file}")
+                continue
+            archive_columns(df, args.archive)
+            hashes = df[[ARCHIVED_COLUMNS[column] for column in df.columns if column in ARCHIVED_COLUMNS]]
+            print(f"🗜️ {csv_file}: {int(hashes.nunique().sum())} egyedi szöveg")
+
+    if not os.path.exists(archive_path(args.archive)):
+        print("📭 Üres archívum")
+        return
+    archive = ContentArchive(args.archive)
+    try:
+        stats = archive.stats()
+    finally:
+        archive.close()
+    print(f"\n🗄️ Tartalom archívum ({archive_path(args.archive)}):")
+    for row in stats:
+        ratio = row['raw_bytes'] / row['stored_bytes'] if row['stored_bytes'] else 0
+        print(f"   {row['kind']:<8} {row['codec']:<5} {row['count']:>7} db  "
+              f"{_format_size(row['raw_bytes'])} -> {_format_size(row['stored_bytes'])} ({ratio:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
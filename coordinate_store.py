@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KOORDINÁTA SIDECAR TÁR (SQLite)
+===============================
+
+🎯 CÉL:
+A koordináták ne egy teljes CSV másolatban (`*_koordinatak_<timestamp>.csv`)
+éljenek, hanem egy hirdetés azonosító szerint kulcsolt tárban. Néhány új
+hirdetés geocodolása így néhány sor írása, nem a teljes adatkészlet
+újraírása. A betöltők (dashboardok) lustán, olvasáskor csatolják.
+
+📋 HASZNÁLAT:
+    store = CoordinateStore()
+    store.upsert_many([('34921205', 47.47, 19.02, 'Budapest, ...')])
+    df = attach_coordinates(df)   # geo_latitude / geo_longitude / geo_address_from_api kitöltése
+
+⚡ Jellemzők:
+- Kulcs: ingatlan.com hirdetés azonosító (a `link` oszlop végén lévő szám)
+- Csak a hiányzó koordináták töltődnek ki - a CSV-ben meglévő érték elsőbbséget élvez
+- Ha a tár fájl nem létezik, a csatolás semmit nem csinál (olvasáskor nem jön létre üres DB)
+
+💡 Tár helye: COORDINATE_STORE_PATH környezeti változó, alapértelmezés: koordinatak.sqlite
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+DEFAULT_STORE_PATH = 'koordinatak.sqlite'
+COORD_COLUMNS = ['geo_latitude', 'geo_longitude', 'geo_address_from_api']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS coordinates (
+    listing_id TEXT PRIMARY KEY,
+    lat REAL NOT NULL,
+    lng REAL NOT NULL,
+    formatted_address TEXT,
+    updated_at REAL NOT NULL
+)
+"""
+
+# SQLite paraméter limit alatt maradva kötegelt IN (...) lekérdezés
+_QUERY_BATCH = 900
+
+
+def listing_ids(df):
+    """Hirdetés azonosítók a `link` oszlopból (vektorizált) - None ahol nincs"""
+    if 'link' not in df.columns:
+        return pd.Series([None] * len(df), index=df.index, dtype=object)
+    ids = df['link'].astype(str).str.extract(r'(\d{5,})\D*$', expand=False)
+    return ids.astype(object).where(ids.notna(), None)
+
+
+def store_path(db_path=None):
+    """Tár fájl útvonala"""
+    return db_path or os.environ.get('COORDINATE_STORE_PATH', DEFAULT_STORE_PATH)
+
+
+class CoordinateStore:
+    """Hirdetés azonosító -> lat/lng/formatted address tár"""
+
+    def __init__(self, db_path=None):
+        self.db_path = store_path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def get_many(self, ids):
+        """Koordináták lekérése - DataFrame listing_id indexszel (csak a meglévők)"""
+        ids = [str(i) for i in dict.fromkeys(ids) if i]
+        frames = []
+        with self._lock:
+            for start in range(0, len(ids), _QUERY_BATCH):
+                batch = ids[start:start + _QUERY_BATCH]
+                placeholders = ','.join('?' * len(batch))
+                frames.append(pd.read_sql_query(
+                    f'SELECT listing_id, lat, lng, formatted_address FROM coordinates '
+                    f'WHERE listing_id IN ({placeholders})', self._conn, params=batch
+                ))
+        if not frames:
+            return pd.DataFrame(columns=['lat', 'lng', 'formatted_address'], index=pd.Index([], name='listing_id'))
+        return pd.concat(frames).set_index('listing_id')
+
+    def known_ids(self, ids):
+        """A tárban már szereplő azonosítók halmaza"""
+        return set(self.get_many(ids).index)
+
+    def upsert_many(self, rows):
+        """(listing_id, lat, lng, formatted_address) sorok beszúrása / frissítése - egy tranzakció"""
+        now = time.time()
+        values = [(str(i), float(lat), float(lng), addr or '', now)
+                  for i, lat, lng, addr in rows
+                  if i and lat is not None and lng is not None and lat == lat and lng == lng]
+        if not values:
+            return 0
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO coordinates (listing_id, lat, lng, formatted_address, updated_at) '
+                'VALUES (?, ?, ?, ?, ?)', values
+            )
+            self._conn.commit()
+        return len(values)
+
+    def upsert_from_dataframe(self, df):
+        """DataFrame koordinátáinak mentése (link + geo_* oszlopok alapján)"""
+        if not set(COORD_COLUMNS[:2]).issubset(df.columns):
+            return 0
+        ids = listing_ids(df)
+        addresses = df['geo_address_from_api'] if 'geo_address_from_api' in df.columns else [''] * len(df)
+        return self.upsert_many(zip(
+            ids, pd.to_numeric(df['geo_latitude'], errors='coerce'),
+            pd.to_numeric(df['geo_longitude'], errors='coerce'), addresses
+        ))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM coordinates').fetchone()[0]
+
+    def close(self):
+        """Adatbázis kapcsolat bezárása"""
+        with self._lock:
+            self._conn.close()
+
+
+def attach_coordinates(df, db_path=None):
+    """Hiányzó geo_* értékek kitöltése a sidecar tárból (lusta join betöltéskor)"""
+    path = store_path(db_path)
+    if df.empty or 'link' not in df.columns or not os.path.exists(path):
+        return df
+
+    df = df.copy()
+    for col in COORD_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    missing = pd.to_numeric(df['geo_latitude'], errors='coerce').isna()
+    if not missing.any():
+        return df
+
+    ids = listing_ids(df)
+    store = CoordinateStore(path)
+    try:
+        found = store.get_many(ids[missing].dropna())
+    finally:
+        store.close()
+    if found.empty:
+        return df
+
+    matched = ids[missing].map(lambda i: i in found.index)
+    rows = matched[matched].index
+    keys = ids[rows]
+    df['geo_latitude'] = pd.to_numeric(df['geo_latitude'], errors='coerce')
+    df['geo_longitude'] = pd.to_numeric(df['geo_longitude'], errors='coerce')
+    df['geo_address_from_api'] = df['geo_address_from_api'].astype(object)
+    df.loc[rows, 'geo_latitude'] = found.loc[keys, 'lat'].to_numpy()
+    df.loc[rows, 'geo_longitude'] = found.loc[keys, 'lng'].to_numpy()
+    df.loc[rows, 'geo_address_from_api'] = found.loc[keys, 'formatted_address'].to_numpy()
+    return df
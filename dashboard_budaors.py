@@ -14,12 +14,17 @@ import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
 import re
-import os
 from datetime import datetime
-import glob
 import warnings
 import folium
 from streamlit_folium import st_folium
+from coordinate_store import attach_coordinates
+from listing_history import attach_history
+from dataset_io import DASHBOARD_EXCLUDED_COLUMNS, read_dataset
+from dataset_manifest import resolve_datasets
+from spatial_index import filter_within_radius
+from map_layers import add_listing_markers, add_price_surface_layer, cached_map, index_fingerprint, price_colors
+from price_hexbin import load_price_surface
 warnings.filterwarnings('ignore')
 
 # BUDAÖRS SPECIFIKUS BEÁLLÍTÁSOK
@@ -28,6 +33,7 @@ def get_location_from_filename():
     return "BUDAÖRS"
 
 location_name = get_location_from_filename()
+DATASET_LOCATION = "budaors"  # manifest lokáció kulcs (dataset_manifest)
 timestamp = datetime.now().strftime("%Y.%m.%d %H:%M")
 
 # Streamlit konfiguráció
@@ -38,6 +44,11 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_data(show_spinner=False)
+def read_cached_dataset(path, content_hash):
+    """Adatkészlet beolvasása - a manifest tartalom hash a cache kulcs (változatlan fájl: nincs újraolvasás)"""
+    return read_dataset(path, exclude=DASHBOARD_EXCLUDED_COLUMNS, categories=False)
+
 def load_and_process_data():
     """Adatok betöltése és feldolgozása - Budaörs koordinátás CSV prioritással"""
     try:
@@ -48,43 +59,35 @@ def load_and_process_data():
             "ingatlan_*budaors*.csv"                           # Általános pattern
         ]
         
-        # Fix lokáció pattern keresés - mindig a legfrissebb CSV-t választja
-        for pattern in location_patterns:
-            matching_files = glob.glob(pattern)
-            if matching_files:
-                # Legfrissebb fájl kiválasztása időbélyeg alapján (fájl módosítás ideje szerint)
-                latest_file = max(matching_files, key=lambda f: os.path.getmtime(f))
-                print(f"📊 Legfrissebb CSV betöltése ({pattern}): {latest_file}")
-                
-                df = pd.read_csv(latest_file, encoding='utf-8-sig', sep='|')
-                
-                # Ellenőrizzük, hogy sikerült-e betölteni
-                if df.empty:
-                    continue  # Próbáljuk a következő pattern-t
-                
-                # Numerikus konverziók - hibakezelő módon
-                if 'teljes_ar' in df.columns:
-                    df['teljes_ar_millió'] = df['teljes_ar'].apply(parse_million_ft)
-                
-                if 'terulet' in df.columns:
-                    df['terulet_szam'] = df['terulet'].apply(parse_area)
-                
-                if 'szobak' in df.columns:
-                    df['szobak_szam'] = df['szobak'].apply(parse_rooms)
-                
-                # Családbarát pontszám számítása
-                df['csaladbarati_pontszam'] = df.apply(create_family_score, axis=1)
-                
-                # Modern nettó pont számítás
-                modern_columns = ['zold_energia_premium_pont', 'wellness_luxury_pont', 'smart_technology_pont', 'premium_design_pont']
-                available_modern_cols = [col for col in modern_columns if col in df.columns]
-                if available_modern_cols:
-                    df['modern_netto_pont'] = df[available_modern_cols].fillna(0).sum(axis=1)
-                else:
-                    df['modern_netto_pont'] = 0
-                
-                print(f"✅ Betöltve: {len(df)} rekord")
-                return df
+        # Legfrissebb adatkészlet a manifestből (O(1) lookup) - régi, nem regisztrált CSV-nél glob fallback
+        for dataset in resolve_datasets(DATASET_LOCATION, location_patterns):
+            latest_file = dataset['path']
+            print(f"📊 Legfrissebb CSV betöltése ({dataset['forras']}): {latest_file}")
+            
+            df = read_cached_dataset(latest_file, dataset['content_hash'])
+            
+            # Sidecar koordináta tár csatolása (hiányzó geo_* értékek)
+            df = attach_coordinates(df)
+            df = attach_history(df)  # piacon töltött napok, árváltozás (történet adatbázis)
+            df.attrs['forras_fajl'] = latest_file  # előre számolt artefaktumokhoz (ár/m² felület)
+            
+            # Ellenőrizzük, hogy sikerült-e betölteni
+            if df.empty:
+                continue  # Próbáljuk a következő jelöltet
+            
+            # Családbarát pontszám számítása
+            df['csaladbarati_pontszam'] = df.apply(create_family_score, axis=1)
+            
+            # Modern nettó pont számítás
+            modern_columns = ['zold_energia_premium_pont', 'wellness_luxury_pont', 'smart_technology_pont', 'premium_design_pont']
+            available_modern_cols = [col for col in modern_columns if col in df.columns]
+            if available_modern_cols:
+                df['modern_netto_pont'] = df[available_modern_cols].fillna(0).sum(axis=1)
+            else:
+                df['modern_netto_pont'] = 0
+            
+            print(f"✅ Betöltve: {len(df)} rekord")
+            return df
         
         # Ha egyik pattern sem működött
         st.error("HIBA: Nincs található Budaörs CSV fájl!")
@@ -94,33 +97,6 @@ def load_and_process_data():
         st.error(f"Adatbetöltési hiba: {e}")
         return pd.DataFrame()
 
-def parse_million_ft(text):
-    """Millió Ft konvertálása számra"""
-    if pd.isna(text):
-        return None
-    text_str = str(text).replace(',', '.')
-    # "159 M Ft" -> 159, "263,80 M Ft" -> 263.80
-    match = re.search(r'(\d+(?:\.\d+)?)\s*M', text_str)
-    return float(match.group(1)) if match else None
-
-def parse_area(text):
-    """Terület konvertálása számra"""
-    if pd.isna(text):
-        return None
-    text_str = str(text)
-    # "133 m2" -> 133
-    match = re.search(r'(\d+)', text_str)
-    return int(match.group(1)) if match else None
-
-def parse_rooms(text):
-    """Szobaszám konvertálása számra"""
-    if pd.isna(text):
-        return None
-    text_str = str(text)
-    # "5 + 1 fél" -> 5, "4 + 1 fél" -> 4, "3" -> 3
-    match = re.search(r'(\d+)', text_str)
-    return int(match.group(1)) if match else None
-
 def create_family_score(row):
     """Családbarát pontszám számítása (0-100)"""
     score = 0
@@ -257,20 +233,20 @@ def main():
     
     # Szobaszám szűrő
     if 'szobak_szam' in df.columns and df['szobak_szam'].notna().any():
-        min_rooms = int(df['szobak_szam'].min())
-        max_rooms = int(df['szobak_szam'].max())
+        min_rooms = float(np.floor(df['szobak_szam'].min()))  # fél szoba: tört szobaszám
+        max_rooms = float(np.ceil(df['szobak_szam'].max()))
         
         # Ha min és max azonos, akkor nem csinálunk slider-t
         if min_rooms == max_rooms:
             rooms_range = None
-            st.sidebar.write(f"🛏️ Szobák: {min_rooms} (fix)")
+            st.sidebar.write(f"🛏️ Szobák: {min_rooms:g} (fix)")
         else:
             rooms_range = st.sidebar.slider(
                 "🛏️ Szobák száma",
                 min_value=min_rooms,
                 max_value=max_rooms,
                 value=(min_rooms, max_rooms),
-                step=1
+                step=0.5
             )
     else:
         rooms_range = None
@@ -293,6 +269,17 @@ def main():
     filter_smart = st.sidebar.checkbox("🏠 Smart Technology", value=False)
     filter_premium = st.sidebar.checkbox("💎 Premium Design", value=False)
     
+    # 🕒 Piaci történet szűrő - csak ha van történet adatbázis (listing_history)
+    filter_price_drop = False
+    max_market_days = None
+    if 'piacon_napok' in df.columns and df['piacon_napok'].notna().any():
+        st.sidebar.subheader("🕒 Piaci Történet")
+        filter_price_drop = st.sidebar.checkbox("📉 Csak árcsökkentett", value=False)
+        longest_days = int(df['piacon_napok'].max())
+        if longest_days > 0:
+            max_market_days = st.sidebar.slider("📅 Max. napok a piacon", min_value=0, max_value=longest_days,
+                                                value=longest_days)
+    
     # Szűrés alkalmazása
     filtered_df = df.copy()
     
@@ -330,6 +317,28 @@ def main():
     if filter_premium:
         filtered_df = filtered_df[filtered_df['van_premium_design'] == True]
     
+    if filter_price_drop:
+        filtered_df = filtered_df[filtered_df['arcsokkentes'] == True]
+    if max_market_days is not None:
+        filtered_df = filtered_df[
+            (filtered_df['piacon_napok'].isna()) |
+            (filtered_df['piacon_napok'] <= max_market_days)
+        ]
+    
+    # 📍 Közelség szűrő - térképre kattintott pont körüli sugár (térbeli index)
+    st.sidebar.subheader("📍 Közelség")
+    proximity_center = st.session_state.get('kozelseg_kozeppont')
+    if proximity_center:
+        radius_m = st.sidebar.slider("📏 Sugár (m)", min_value=100, max_value=5000, value=1000, step=100)
+        st.session_state['kozelseg_sugar'] = radius_m
+        st.sidebar.caption(f"Középpont: {proximity_center[0]:.5f}, {proximity_center[1]:.5f}")
+        if st.sidebar.button("✖️ Közelség szűrő törlése"):
+            del st.session_state['kozelseg_kozeppont']
+            st.rerun()
+        filtered_df = filter_within_radius(filtered_df, proximity_center, radius_m, full_df=df)
+    else:
+        st.sidebar.caption("🖱️ Kattints a térképre a közelség szerinti szűréshez")
+    
     # Eredmények megjelenítése
     st.header(f"🏠 Találatok: {len(filtered_df)} ingatlan")
     
@@ -699,59 +708,85 @@ def create_interactive_map(df, location_name):
     st.markdown("## 🗺️ **INTERAKTÍV TÉRKÉP**")
     st.markdown(f"**📍 Lokáció:** {location_name} | **🏠 Ingatlanok:** {len(map_df)} db GPS koordinátával")
     
-    # Térkép alapbeállítások
-    center_lat = map_df['geo_latitude'].mean()
-    center_lng = map_df['geo_longitude'].mean()
-    
-    # Folium térkép létrehozása
-    m = folium.Map(
-        location=[center_lat, center_lng],
-        zoom_start=12,
-        tiles='OpenStreetMap'
-    )
-    
-    # Színkódolás ár szerint
-    def get_price_color(price):
-        if pd.isna(price):
-            return '#95A5A6'  # Szürke - nincs ár adat
-        elif price <= 100:
-            return '#2ECC71'  # Zöld - olcsó (≤100M)
-        elif price <= 200:
-            return '#F39C12'  # Narancssárga - közepes (101-200M)
-        elif price <= 300:
-            return '#E74C3C'  # Piros - drága (201-300M)
+    # Térkép réteg beállítások - a widgetek a cache-elt térkép építésen kívül
+    surface, resolution = None, None
+    if st.checkbox("🔷 Ár/m² hexagon felület", value=False, key=f"arfelulet_{location_name}"):
+        surface = load_price_surface(df.attrs.get('forras_fajl'), map_df)
+        resolutions = sorted(surface['felbontas_m'].unique().tolist())
+        if resolutions:
+            resolution = st.select_slider("Hexagon sugár (m)", options=resolutions,
+                                          value=500 if 500 in resolutions else resolutions[0],
+                                          key=f"arfelulet_felbontas_{location_name}")
         else:
-            return '#8E44AD'  # Lila - nagyon drága (300M+)
-    
-    # Enhanced lokáció oszlop meghatározása (már nem használjuk színkódolásra)
-    district_col = 'enhanced_keruleti_resz' if 'enhanced_keruleti_resz' in map_df.columns else 'varosresz_kategoria'
-    
-    # Markerek hozzáadása
-    for idx, row in map_df.iterrows():
-        # Popup tartalom
-        price = row.get('teljes_ar_millió', 'N/A')
-        # Ingatlan.com URL generálása
-        ingatlan_url = row.get('link', '#')
-        popup_content = f"""
-        <b>{row.get('cim', 'N/A')}</b><br/>
-        💰 Ár: {row.get('teljes_ar', 'N/A')}<br/>
-        📏 Terület: {row.get('terulet', 'N/A')}<br/>
-        🛏️ Szobák: {row.get('szobak', 'N/A')}<br/>
-        🔧 Állapot: {row.get('ingatlan_allapota', 'N/A')}<br/>
-        👨‍👩‍👧‍👦 Családbarát pont: {row.get('csaladbarati_pontszam', 0):.0f}<br/>
-        🔗 <a href='{ingatlan_url}' target='_blank' style='color: #2E86AB;'>Hirdetés megnyitása</a>
-        """
+            st.info("🔷 Nincs ár/m² adat koordinátás hirdetésekhez")
+    proximity_center = st.session_state.get('kozelseg_kozeppont')
+    proximity_radius = st.session_state.get('kozelseg_sugar', 1000)
+    
+    def build_map():
+        # Térkép alapbeállítások
+        center_lat = map_df['geo_latitude'].mean()
+        center_lng = map_df['geo_longitude'].mean()
+    
+        # Folium térkép létrehozása
+        m = folium.Map(
+            location=[center_lat, center_lng],
+            zoom_start=12,
+            tiles='OpenStreetMap',
+            prefer_canvas=True
+        )
+    
+        # Markerek hozzáadása - egyetlen GeoJSON réteg, stílus és popup a tulajdonságokból
+        map_mode = add_listing_markers(
+            m, map_df,
+            popup_fields=[
+                ('💰 Ár', 'teljes_ar'),
+                ('📏 Terület', 'terulet'),
+                ('🛏️ Szobák', 'szobak'),
+                ('🔧 Állapot', 'ingatlan_allapota'),
+                ('👨‍👩‍👧‍👦 Családbarát pont', map_df['csaladbarati_pontszam'].map('{:.0f}'.format)),
+            ],
+            colors=price_colors(map_df['teljes_ar_millió']),
+            links=map_df['link'] if 'link' in map_df.columns else None,
+            prices=map_df['teljes_ar_millió'],
+        )
+        
+        # Hexagon ár/m² felület - előre számolt artefaktum (price_hexbin), egyetlen choropleth réteg
+        cell_count = 0
+        if resolution is not None:
+            cell_count = add_price_surface_layer(m, surface, resolution)
+            folium.LayerControl(collapsed=True).add_to(m)
         
-        # Marker hozzáadása
-        folium.Marker(
-            location=[row['geo_latitude'], row['geo_longitude']],
-            popup=folium.Popup(popup_content, max_width=300),
-            tooltip=f"{row.get('cim', 'N/A')} - {row.get('teljes_ar', 'N/A')}",
-            icon=folium.Icon(color='white', icon_color=get_price_color(price))
-        ).add_to(m)
-    
-    # Térkép megjelenítése Streamlit-ben
-    st_folium(m, width=900, height=500, key=f"map_{location_name.lower().replace(' ', '_')}")
+        # Közelség szűrő köre
+        if proximity_center:
+            folium.Circle(
+                location=list(proximity_center),
+                radius=proximity_radius,
+                color='#2E86AB',
+                fill=True,
+                fill_opacity=0.08
+            ).add_to(m)
+        return m, map_mode, cell_count
+    
+    # Kész térkép cache-ből - csak a szűrt hirdetés halmaz vagy a réteg beállítások változására
+    # épül újra (pl. a scatter plot változójának váltása nem építi újra)
+    map_key = (location_name, df.attrs.get('forras_fajl'), index_fingerprint(map_df.index),
+               resolution, proximity_center, proximity_radius)
+    m, map_mode, cell_count = cached_map(map_key, build_map)
+    if map_mode == 'grid':
+        st.info(f"🗺️ {len(map_df)} ingatlan - rács cellákba aggregálva (cellánként darabszám + medián ár)")
+    if cell_count:
+        st.caption(f"🔷 {cell_count} hexagon cella | szín: medián ár/m² (zöld: olcsó -> piros: drága)")
+    
+    # Térkép megjelenítése Streamlit-ben - csak a kattintás kerül vissza (pan/zoom nem indít rerun-t)
+    map_state = st_folium(m, width=900, height=500, key=f"map_{location_name.lower().replace(' ', '_')}",
+                          returned_objects=["last_clicked"])
+    clicked = (map_state or {}).get('last_clicked')
+    if clicked:
+        click = (round(clicked['lat'], 6), round(clicked['lng'], 6))
+        if click != st.session_state.get('kozelseg_utolso_kattintas'):
+            st.session_state['kozelseg_utolso_kattintas'] = click
+            st.session_state['kozelseg_kozeppont'] = click
+            st.rerun()
 
 if __name__ == "__main__":
     main()
@@ -4,7 +4,7 @@ STREAMLIT DASHBOARD - BUDAÖRS INGATLAN ELEMZÉS (GPS koordinátákkal + Iskolak
 
 🎯 Egyedi dashboard Budaörsi ingatlanokhoz koordináta alapú térképpel + 1-es számú iskola körzeti szűrővel
 📊 Adatforrás: ingatlan_reszletes_budaors_20250822_220240_koordinatak_20250822_221556.csv
-🏫 Iskolakörzet: iskola_budaors_cimek.txt alapján
+🏫 Iskolakörzet: iskola_budaors_cimek.txt alapján (school_catchment - betöltéskor számolva)
 ⚡ Template alapján generálva - dinamikus időbélyeg + fix lokáció
 """
 
@@ -15,11 +15,17 @@ import plotly.graph_objects as go
 import numpy as np
 import folium
 from streamlit_folium import st_folium
-import glob
 import re
 import warnings
-import os
 from datetime import datetime
+from coordinate_store import attach_coordinates
+from listing_history import attach_history
+from dataset_io import DASHBOARD_EXCLUDED_COLUMNS, read_dataset
+from dataset_manifest import resolve_datasets
+from spatial_index import filter_within_radius
+from map_layers import add_listing_markers, add_price_surface_layer, cached_map, index_fingerprint, price_colors
+from price_hexbin import load_price_surface
+from school_catchment import apply_school_catchments
 
 warnings.filterwarnings('ignore')
 
@@ -29,6 +35,7 @@ def get_location_from_filename():
     return "BUDAÖRS"
 
 location_name = get_location_from_filename()
+DATASET_LOCATION = "budaors"  # manifest lokáció kulcs (dataset_manifest)
 timestamp = datetime.now().strftime("%Y.%m.%d %H:%M")
 
 # Streamlit konfiguráció
@@ -39,84 +46,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-def load_school_streets():
-    """1-es számú iskola körzeti utcáinak betöltése - JAVÍTOTT multi-street parsing"""
-    try:
-        with open('iskola_budaors_cimek.txt', 'r', encoding='utf-8') as f:
-            school_addresses = f.readlines()
-        
-        # Utcanevek kinyerése - MULTI-STREET support
-        school_streets = set()
-        for address in school_addresses:
-            address = address.strip()
-            if address:
-                # Előfeldolgozás: páratlan/páros/számok eltávolítása
-                cleaned = re.sub(r'\s+(páratlan|páros).*$', '', address)
-                cleaned = re.sub(r'\s+\d+.*$', '', cleaned)
-                cleaned = re.sub(r'\s+-től.*$', '', cleaned)
-                
-                # Multi-street parsing: "DÉZSMA UTCA DIÓFA UTCA" -> ["dézsma utca", "diófa utca"]
-                parts = re.split(r'(UTCA|KÖZ|ÚT|TÉR|DŰLŐ)', cleaned, flags=re.IGNORECASE)
-                
-                if len(parts) > 3:  # Multi-street detected
-                    # Páronként feldolgozzuk: név + típus
-                    for i in range(0, len(parts)-1, 2):
-                        if i+1 < len(parts):
-                            street_name = parts[i].strip()
-                            street_type = parts[i+1].strip()
-                            if street_name and street_type:
-                                full_street = f'{street_name} {street_type}'.strip()
-                                normalized = ' '.join(full_street.lower().split())
-                                if len(normalized) > 2:
-                                    school_streets.add(normalized)
-                else:
-                    # Single street
-                    normalized_street = ' '.join(cleaned.strip().lower().split())
-                    if normalized_street and len(normalized_street) > 2:
-                        school_streets.add(normalized_street)
-        
-        st.sidebar.info(f"🏫 Betöltött iskolakörzeti utcák: {len(school_streets)} db")
-        
-        # Debug: első 5 utca megjelenítése
-        if school_streets:
-            sample_streets = sorted(list(school_streets))[:5]
-            st.sidebar.info(f"🔍 Minta utcák: {', '.join(sample_streets)}")
-            
-        return school_streets
-        
-    except FileNotFoundError:
-        st.sidebar.error("❌ Iskola címek fájl nem található: iskola_budaors_cimek.txt")
-        return set()
-    except Exception as e:
-        st.sidebar.error(f"❌ Iskola címek betöltési hiba: {e}")
-        return set()
-
-def is_in_school_district(property_address, school_streets):
-    """Ellenőrzi, hogy az ingatlan címe iskolakörzeti utcában van-e - JAVÍTOTT matching"""
-    if not property_address or not school_streets:
-        return False
-    
-    # Ingatlan cím normalizálása
-    property_address_clean = str(property_address).lower()
-    # Extra szóközök eltávolítása és normalizálás
-    property_address_clean = ' '.join(property_address_clean.split())
-    
-    # Direkte utcanév egyezés keresése
-    for school_street in school_streets:
-        if school_street in property_address_clean:
-            return True
-    
-    # Alternatív keresés: kulcsszavak alapján
-    # pl. "budaörs, diófa utca" -> "diófa utca" kikeresése
-    for school_street in school_streets:
-        # Utcanév főbb részei (első 2-3 szó)
-        street_words = school_street.split()
-        if len(street_words) >= 2:
-            main_part = ' '.join(street_words[:2])  # pl. "diófa utca"
-            if main_part in property_address_clean:
-                return True
-    
-    return False
+@st.cache_data(show_spinner=False)
+def read_cached_dataset(path, content_hash):
+    """Adatkészlet beolvasása - a manifest tartalom hash a cache kulcs (változatlan fájl: nincs újraolvasás)"""
+    return read_dataset(path, exclude=DASHBOARD_EXCLUDED_COLUMNS, categories=False)
 
 def load_and_process_data():
     """Adatok betöltése és feldolgozása - Budaörs koordinátás CSV"""
@@ -128,42 +61,43 @@ def load_and_process_data():
             "ingatlan_*budaors*.csv"                           # Wildcard fallback
         ]
         
-        # Fix lokáció pattern keresés - mindig a legfrissebb koordinátás CSV-t választja
-        for pattern in location_patterns:
-            matching_files = glob.glob(pattern)
-            if matching_files:
-                latest_file = max(matching_files, key=lambda x: os.path.getmtime(x))
-                st.info(f"📂 Betöltött adatforrás: **{latest_file}** ({len(matching_files)} találat közül)")
-                
-                # CSV betöltés pipe elválasztóval
-                df = pd.read_csv(latest_file, sep='|', encoding='utf-8')
-                
-                # Iskolakörzeti utcák betöltése
-                school_streets = load_school_streets()
-                
-                # Adatfeldolgozás
-                df['teljes_ar_millió'] = df['teljes_ar'].apply(parse_million_ft)
-                df['terulet_szam'] = df['terulet'].apply(parse_area)
-                df['szobak_szam'] = df['szobak'].apply(parse_rooms)
-                
-                # Családbarát pontszám számítása
-                df['csaladbarati_pontszam'] = df.apply(create_family_score, axis=1)
-                
-                # Modern pontszám hozzáadása ha létezik
-                if 'netto_szoveg_pont' in df.columns:
-                    df['modern_netto_pont'] = df['netto_szoveg_pont']
-                else:
-                    df['modern_netto_pont'] = 0
-                
-                # 🏫 ISKOLAKÖRZETI SZŰRŐ HOZZÁADÁSA
-                df['iskola_korzetben'] = df['cim'].apply(lambda x: is_in_school_district(x, school_streets))
-                
-                # Statisztika megjelenítése
-                iskola_count = df['iskola_korzetben'].sum()
-                total_count = len(df)
-                st.info(f"🏫 Iskolakörzeti ingatlanok: **{iskola_count}/{total_count}** ({iskola_count/total_count*100:.1f}%)")
-                
-                return df
+        # Legfrissebb adatkészlet a manifestből (O(1) lookup) - régi, nem regisztrált CSV-nél glob fallback
+        for dataset in resolve_datasets(DATASET_LOCATION, location_patterns):
+            latest_file = dataset['path']
+            st.info(f"📂 Betöltött adatforrás: **{latest_file}** ({dataset['forras']})")
+            
+            # CSV betöltés pipe elválasztóval
+            df = read_cached_dataset(latest_file, dataset['content_hash'])
+            
+            # Sidecar koordináta tár csatolása (hiányzó geo_* értékek)
+            df = attach_coordinates(df)
+            df = attach_history(df)  # piacon töltött napok, árváltozás (történet adatbázis)
+            df.attrs['forras_fajl'] = latest_file  # előre számolt artefaktumokhoz (ár/m² felület)
+            
+            # Családbarát pontszám számítása
+            df['csaladbarati_pontszam'] = df.apply(create_family_score, axis=1)
+            
+            # Modern pontszám hozzáadása ha létezik
+            if 'netto_szoveg_pont' in df.columns:
+                df['modern_netto_pont'] = df['netto_szoveg_pont']
+            else:
+                df['modern_netto_pont'] = 0
+            
+            # 🏫 ISKOLAKÖRZETI SZŰRŐ - a részletes CSV készítésekor számolva;
+            # régebbi (oszlop nélküli) CSV-nél egyszeri számítás a körzet fájlokból
+            if 'iskola_korzetben' not in df.columns:
+                apply_school_catchments(df)
+            if 'iskola_korzetben' not in df.columns:
+                st.sidebar.error("❌ Iskola címek fájl nem található: iskola_budaors_cimek.txt")
+                df['iskola_korzetben'] = False
+            df['iskola_korzetben'] = df['iskola_korzetben'].fillna(False).astype(bool)
+            
+            # Statisztika megjelenítése
+            iskola_count = df['iskola_korzetben'].sum()
+            total_count = len(df)
+            st.info(f"🏫 Iskolakörzeti ingatlanok: **{iskola_count}/{total_count}** ({iskola_count/total_count*100:.1f}%)")
+            
+            return df
         
         # Ha egyik pattern sem működött
         st.error("HIBA: Nincs található Budaörsi CSV fájl!")
@@ -173,33 +107,6 @@ def load_and_process_data():
         st.error(f"Adatbetöltési hiba: {e}")
         return pd.DataFrame()
 
-def parse_million_ft(text):
-    """Millió Ft konvertálása számra"""
-    if pd.isna(text):
-        return None
-    text_str = str(text).replace(',', '.')
-    # "159 M Ft" -> 159, "263,80 M Ft" -> 263.80
-    match = re.search(r'(\d+(?:\.\d+)?)\s*M', text_str)
-    return float(match.group(1)) if match else None
-
-def parse_area(text):
-    """Terület konvertálása számra"""
-    if pd.isna(text):
-        return None
-    text_str = str(text)
-    # "133 m2" -> 133
-    match = re.search(r'(\d+)', text_str)
-    return int(match.group(1)) if match else None
-
-def parse_rooms(text):
-    """Szobaszám konvertálása számra"""
-    if pd.isna(text):
-        return None
-    text_str = str(text)
-    # "5 + 1 fél" -> 5, "4 + 1 fél" -> 4, "3" -> 3
-    match = re.search(r'(\d+)', text_str)
-    return int(match.group(1)) if match else None
-
 def create_family_score(row):
     """Családbarát pontszám számítása (0-100)"""
     score = 0
@@ -339,19 +246,20 @@ def main():
     
     # Szobaszám szűrő
     if 'szobak_szam' in df.columns and df['szobak_szam'].notna().any():
-        min_rooms = int(df['szobak_szam'].min())
-        max_rooms = int(df['szobak_szam'].max())
+        min_rooms = float(np.floor(df['szobak_szam'].min()))  # fél szoba: tört szobaszám
+        max_rooms = float(np.ceil(df['szobak_szam'].max()))
         
         # Ha min és max azonos, akkor nem csinálunk slider-t
         if min_rooms == max_rooms:
-            st.sidebar.write(f"🏠 **Szobaszám:** {min_rooms}")
+            st.sidebar.write(f"🏠 **Szobaszám:** {min_rooms:g}")
             rooms_range = (min_rooms, max_rooms)
         else:
             rooms_range = st.sidebar.slider(
                 "🏠 Szobaszám", 
                 min_value=min_rooms, 
                 max_value=max_rooms, 
-                value=(min_rooms, max_rooms)
+                value=(min_rooms, max_rooms),
+                step=0.5
             )
     else:
         rooms_range = None
@@ -374,6 +282,17 @@ def main():
     filter_smart = st.sidebar.checkbox("🏠 Smart Technology", value=False)
     filter_premium = st.sidebar.checkbox("💎 Premium Design", value=False)
     
+    # 🕒 Piaci történet szűrő - csak ha van történet adatbázis (listing_history)
+    filter_price_drop = False
+    max_market_days = None
+    if 'piacon_napok' in df.columns and df['piacon_napok'].notna().any():
+        st.sidebar.subheader("🕒 Piaci Történet")
+        filter_price_drop = st.sidebar.checkbox("📉 Csak árcsökkentett", value=False)
+        longest_days = int(df['piacon_napok'].max())
+        if longest_days > 0:
+            max_market_days = st.sidebar.slider("📅 Max. napok a piacon", min_value=0, max_value=longest_days,
+                                                value=longest_days)
+    
     # Szűrés alkalmazása
     filtered_df = df.copy()
     
@@ -415,6 +334,28 @@ def main():
     if filter_premium:
         filtered_df = filtered_df[filtered_df.get('van_premium_design', False) == True]
     
+    if filter_price_drop:
+        filtered_df = filtered_df[filtered_df['arcsokkentes'] == True]
+    if max_market_days is not None:
+        filtered_df = filtered_df[
+            (filtered_df['piacon_napok'].isna()) |
+            (filtered_df['piacon_napok'] <= max_market_days)
+        ]
+    
+    # 📍 Közelség szűrő - térképre kattintott pont körüli sugár (térbeli index)
+    st.sidebar.subheader("📍 Közelség")
+    proximity_center = st.session_state.get('kozelseg_kozeppont')
+    if proximity_center:
+        radius_m = st.sidebar.slider("📏 Sugár (m)", min_value=100, max_value=5000, value=1000, step=100)
+        st.session_state['kozelseg_sugar'] = radius_m
+        st.sidebar.caption(f"Középpont: {proximity_center[0]:.5f}, {proximity_center[1]:.5f}")
+        if st.sidebar.button("✖️ Közelség szűrő törlése"):
+            del st.session_state['kozelseg_kozeppont']
+            st.rerun()
+        filtered_df = filter_within_radius(filtered_df, proximity_center, radius_m, full_df=df)
+    else:
+        st.sidebar.caption("🖱️ Kattints a térképre a közelség szerinti szűréshez")
+    
     # Eredmények megjelenítése
     st.header(f"🏠 Találatok: {len(filtered_df)} ingatlan")
     
@@ -665,113 +606,129 @@ def create_interactive_map(df, location_name):
     school_count = map_df['iskola_korzetben'].sum()
     st.markdown(f"**🏫 Iskolakörzeti ingatlanok:** {school_count}/{len(map_df)} ({school_count/len(map_df)*100:.1f}%)")
     
-    # Térkép alapbeállítások
-    center_lat = map_df['geo_latitude'].mean()
-    center_lng = map_df['geo_longitude'].mean()
-    
-    # Folium térkép létrehozása
-    m = folium.Map(
-        location=[center_lat, center_lng],
-        zoom_start=12,
-        tiles='OpenStreetMap'
-    )
-    
-    # Színkódolás ár szerint
-    def get_price_color(price):
-        """Ár alapú színkódolás"""
-        if pd.isna(price):
-            return 'gray'
-        elif price <= 100:
-            return 'green'
-        elif price <= 200:
-            return 'orange'
-        elif price <= 300:
-            return 'red'
+    # Térkép réteg beállítások - a widgetek a cache-elt térkép építésen kívül
+    surface, resolution = None, None
+    if st.checkbox("🔷 Ár/m² hexagon felület", value=False, key=f"arfelulet_{location_name}"):
+        surface = load_price_surface(df.attrs.get('forras_fajl'), map_df)
+        resolutions = sorted(surface['felbontas_m'].unique().tolist())
+        if resolutions:
+            resolution = st.select_slider("Hexagon sugár (m)", options=resolutions,
+                                          value=500 if 500 in resolutions else resolutions[0],
+                                          key=f"arfelulet_felbontas_{location_name}")
         else:
-            return 'purple'
+            st.info("🔷 Nincs ár/m² adat koordinátás hirdetésekhez")
+    proximity_center = st.session_state.get('kozelseg_kozeppont')
+    proximity_radius = st.session_state.get('kozelseg_sugar', 1000)
+    
+    def build_map():
+        # Térkép alapbeállítások
+        center_lat = map_df['geo_latitude'].mean()
+        center_lng = map_df['geo_longitude'].mean()
+    
+        # Folium térkép létrehozása
+        m = folium.Map(
+            location=[center_lat, center_lng],
+            zoom_start=12,
+            tiles='OpenStreetMap',
+            prefer_canvas=True
+        )
     
-    # Marker ikon kiválasztása iskolakörzet szerint
-    def get_marker_icon(is_in_school_district):
-        """Marker ikon iskolakörzet alapján"""
-        return 'graduation-cap' if is_in_school_district else 'home'
+        # Markerek hozzáadása - egyetlen GeoJSON réteg, stílus és popup a tulajdonságokból
+        gps = ('(' + map_df['geo_latitude'].map('{:.4f}'.format) + ', '
+               + map_df['geo_longitude'].map('{:.4f}'.format) + ')')
+        map_mode = add_listing_markers(
+            m, map_df,
+            popup_fields=[
+                ('💰 Ár', 'teljes_ar'),
+                ('📐 Terület', 'terulet'),
+                ('🏠 Szobák', 'szobak'),
+                ('🔧 Állapot', 'ingatlan_allapota'),
+                ('👨‍👩‍👧‍👦 Családbarát pont', map_df['csaladbarati_pontszam'].map('{:.1f}'.format)),
+                ('🏫 Iskolakörzet', map_df['iskola_korzetben'].map({True: 'Iskola körzetben', False: ''})),
+                ('🗺️ GPS', gps),
+            ],
+            colors=price_colors(map_df['teljes_ar_millió'], bins=[(100, 'green'), (200, 'orange'), (300, 'red')],
+                                max_color='purple', missing_color='gray'),
+            links=map_df.apply(generate_ingatlan_url, axis=1),
+            link_label='🔗 Megtekintés',
+            highlight=map_df['iskola_korzetben'],
+            prices=map_df['teljes_ar_millió'],
+        )
     
-    # Markerek hozzáadása
-    for idx, row in map_df.iterrows():
-        try:
-            lat = row['geo_latitude']
-            lng = row['geo_longitude']
-            is_school = row.get('iskola_korzetben', False)
-            
-            # Popup tartalma
-            school_text = "🏫 Iskola körzetben" if is_school else ""
-            popup_content = f"""
-            <b>{row.get('cim', 'Cím hiányzik')}</b><br>
-            💰 Ár: {row.get('teljes_ar', 'N/A')}<br>
-            📐 Terület: {row.get('terulet', 'N/A')}<br>
-            🏠 Szobák: {row.get('szobak', 'N/A')}<br>
-            🔧 Állapot: {row.get('ingatlan_allapota', 'N/A')}<br>
-            👨‍👩‍👧‍👦 Családbarát pont: {row.get('csaladbarati_pontszam', 0):.1f}<br>
-            {school_text}<br>
-            🗺️ GPS: ({lat:.4f}, {lng:.4f})
-            """
-            
-            # URL hozzáadása ha van
-            ingatlan_url = generate_ingatlan_url(row)
-            if ingatlan_url:
-                popup_content += f"<br><a href='{ingatlan_url}' target='_blank'>🔗 Megtekintés</a>"
-            
-            folium.Marker(
-                [lat, lng],
-                popup=folium.Popup(popup_content, max_width=300),
-                icon=folium.Icon(
-                    color=get_price_color(row.get('teljes_ar_millió')), 
-                    icon=get_marker_icon(is_school),
-                    prefix='fa'
-                )
+        # Legenda hozzáadása - ár alapú színkódolás + iskolakörzet
+        legend_html = f"""
+        <div style='position: fixed; 
+                    top: 10px; right: 10px; width: 200px; height: auto; 
+                    background-color: white; border:2px solid grey; z-index:9999; 
+                    font-size:12px; padding: 10px'>
+        <h4 style='margin-top:0;'>🏠 Térképi jelek</h4>
+        <p style='margin: 3px 0; font-weight: bold;'>Árszínkódolás:</p>
+        <p style='margin: 3px 0;'>
+            <span style='color:#2ECC71; font-size: 16px;'>●</span> 
+            ≤100 M Ft: olcsó
+        </p>
+        <p style='margin: 3px 0;'>
+            <span style='color:#F39C12; font-size: 16px;'>●</span> 
+            101-200 M Ft: közepes
+        </p>
+        <p style='margin: 3px 0;'>
+            <span style='color:#E74C3C; font-size: 16px;'>●</span> 
+            201-300 M Ft: drága
+        </p>
+        <p style='margin: 3px 0;'>
+            <span style='color:#8E44AD; font-size: 16px;'>●</span> 
+            300+ M Ft: nagyon drága
+        </p>
+        <hr style='margin: 8px 0;'>
+        <p style='margin: 3px 0; font-weight: bold;'>Ikonok:</p>
+        <p style='margin: 3px 0;'><span style='color:#2E86AB; font-size: 16px;'>◉</span> Iskola körzetben (kék keret)</p>
+        <p style='margin: 3px 0;'><span style='color:white; font-size: 16px;'>○</span> Nem iskola körzetben</p>
+        <hr style='margin: 8px 0;'>
+        <p style='margin: 3px 0; font-size: 10px;'>
+            🔗 Kattints a markerekre<br/>részletes információkért
+        </p>
+        </div>
+        """
+    
+        m.get_root().html.add_child(folium.Element(legend_html))
+        
+        # Hexagon ár/m² felület - előre számolt artefaktum (price_hexbin), egyetlen choropleth réteg
+        cell_count = 0
+        if resolution is not None:
+            cell_count = add_price_surface_layer(m, surface, resolution)
+            folium.LayerControl(collapsed=True).add_to(m)
+        
+        # Közelség szűrő köre
+        if proximity_center:
+            folium.Circle(
+                location=list(proximity_center),
+                radius=proximity_radius,
+                color='#2E86AB',
+                fill=True,
+                fill_opacity=0.08
             ).add_to(m)
-            
-        except Exception as e:
-            continue
-    
-    # Legenda hozzáadása - ár alapú színkódolás + iskolakörzet
-    legend_html = f"""
-    <div style='position: fixed; 
-                top: 10px; right: 10px; width: 200px; height: auto; 
-                background-color: white; border:2px solid grey; z-index:9999; 
-                font-size:12px; padding: 10px'>
-    <h4 style='margin-top:0;'>🏠 Térképi jelek</h4>
-    <p style='margin: 3px 0; font-weight: bold;'>Árszínkódolás:</p>
-    <p style='margin: 3px 0;'>
-        <span style='color:#2ECC71; font-size: 16px;'>●</span> 
-        ≤100 M Ft: olcsó
-    </p>
-    <p style='margin: 3px 0;'>
-        <span style='color:#F39C12; font-size: 16px;'>●</span> 
-        101-200 M Ft: közepes
-    </p>
-    <p style='margin: 3px 0;'>
-        <span style='color:#E74C3C; font-size: 16px;'>●</span> 
-        201-300 M Ft: drága
-    </p>
-    <p style='margin: 3px 0;'>
-        <span style='color:#8E44AD; font-size: 16px;'>●</span> 
-        300+ M Ft: nagyon drága
-    </p>
-    <hr style='margin: 8px 0;'>
-    <p style='margin: 3px 0; font-weight: bold;'>Ikonok:</p>
-    <p style='margin: 3px 0;'>🎓 Iskola körzetben</p>
-    <p style='margin: 3px 0;'>🏠 Nem iskola körzetben</p>
-    <hr style='margin: 8px 0;'>
-    <p style='margin: 3px 0; font-size: 10px;'>
-        🔗 Kattints a markerekre<br/>részletes információkért
-    </p>
-    </div>
-    """
-    
-    m.get_root().html.add_child(folium.Element(legend_html))
-    
-    # Térkép megjelenítése Streamlit-ben
-    st_folium(m, width=900, height=500, key=f"map_{location_name.lower().replace(' ', '_').replace('.', '')}")
+        return m, map_mode, cell_count
+    
+    # Kész térkép cache-ből - csak a szűrt hirdetés halmaz vagy a réteg beállítások változására
+    # épül újra (pl. a scatter plot változójának váltása nem építi újra)
+    map_key = (location_name, df.attrs.get('forras_fajl'), index_fingerprint(map_df.index),
+               resolution, proximity_center, proximity_radius)
+    m, map_mode, cell_count = cached_map(map_key, build_map)
+    if map_mode == 'grid':
+        st.info(f"🗺️ {len(map_df)} ingatlan - rács cellákba aggregálva (cellánként darabszám + medián ár)")
+    if cell_count:
+        st.caption(f"🔷 {cell_count} hexagon cella | szín: medián ár/m² (zöld: olcsó -> piros: drága)")
+    
+    # Térkép megjelenítése Streamlit-ben - csak a kattintás kerül vissza (pan/zoom nem indít rerun-t)
+    map_state = st_folium(m, width=900, height=500, key=f"map_{location_name.lower().replace(' ', '_').replace('.', '')}",
+                          returned_objects=["last_clicked"])
+    clicked = (map_state or {}).get('last_clicked')
+    if clicked:
+        click = (round(clicked['lat'], 6), round(clicked['lng'], 6))
+        if click != st.session_state.get('kozelseg_utolso_kattintas'):
+            st.session_state['kozelseg_utolso_kattintas'] = click
+            st.session_state['kozelseg_kozeppont'] = click
+            st.rerun()
 
 if __name__ == "__main__":
     main()
@@ -7,6 +7,7 @@ STREAMLIT DASHBOARD TEMPLATE - INGATLAN ELEMZÉS
 2. Cseréld le a TEMPLATE placeholder-eket:
    - ORSZÁGÚT-VÍZIVÁROS II.-KRISZTINAVÁROS XII. -> "TÖRÖKBÁLINT-TÜKÖRHEGY", "XII. KERÜLET", stb.
    - ingatlan_reszletes_orszagut_vizivaros_ii_krisztinavaros_xii_*.csv, ingatlan_lista_orszagut_vizivaros_ii_krisztinavaros_xii_*.csv, ingatlan_reszletes_orszagut_vizivaros_ii_krisztinavaros_xii_*_koordinatak_*.csv -> konkrét CSV pattern-ek
+   - orszagut_vizivaros_ii_krisztinavaros_xii -> manifest lokáció kulcs ("torokbalint_tukorhegy", "xii_ker", stb.)
 
 📋 PÉLDA CSERÉK:
 - Törökbálint-Tükörhegy esetén:
@@ -25,13 +26,17 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
-import re
-import os
 from datetime import datetime
-import glob
 import warnings
 import folium
 from streamlit_folium import st_folium
+from coordinate_store import attach_coordinates
+from listing_history import attach_history
+from dataset_io import DASHBOARD_EXCLUDED_COLUMNS, read_dataset
+from dataset_manifest import resolve_datasets
+from spatial_index import filter_within_radius
+from map_layers import add_listing_markers, add_price_surface_layer, cached_map, index_fingerprint, price_colors
+from price_hexbin import load_price_surface
 warnings.filterwarnings('ignore')
 
 # TEMPLATE PLACEHOLDER - Location név és CSV pattern
@@ -41,6 +46,7 @@ def get_location_from_filename():
     return "ORSZÁGÚT-VÍZIVÁROS II.-KRISZTINAVÁROS XII."  # TEMPLATE: pl. "TÖRÖKBÁLINT-TÜKÖRHEGY", "XII. KERÜLET", "BUDAÖRS"
 
 location_name = get_location_from_filename()
+DATASET_LOCATION = "orszagut_vizivaros_ii_krisztinavaros_xii"  # manifest lokáció kulcs (dataset_manifest)
 timestamp = datetime.now().strftime("%Y.%m.%d %H:%M")
 
 # Streamlit konfiguráció
@@ -51,6 +57,11 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_data(show_spinner=False)
+def read_cached_dataset(path, content_hash):
+    """Adatkészlet beolvasása - a manifest tartalom hash a cache kulcs (változatlan fájl: nincs újraolvasás)"""
+    return read_dataset(path, exclude=DASHBOARD_EXCLUDED_COLUMNS, categories=False)
+
 def load_and_process_data():
     """Adatok betöltése és feldolgozása - TEMPLATE: fix lokáció, dinamikus időbélyeg"""
     try:
@@ -61,35 +72,30 @@ def load_and_process_data():
             "ingatlan_lista_orszagut_vizivaros_ii_krisztinavaros_xii_*.csv",  # TEMPLATE: pl. "ingatlan_modern_enhanced_budaors_*.csv" 
             "ingatlan_reszletes_orszagut_vizivaros_ii_krisztinavaros_xii_*_koordinatak_*.csv"   # TEMPLATE: pl. "ingatlan_reszletes_*budaors*.csv"
         ]
+        location_patterns = [p for p in location_patterns if not (p.startswith("{{") and p.endswith("}}"))]  # TEMPLATE placeholder-ek kihagyása
         
-        # Fix lokáció pattern keresés - mindig a legfrissebb CSV-t választja
-        for pattern in location_patterns:
-            if pattern.startswith("{{") and pattern.endswith("}}"):
-                continue  # Skip template placeholders
-                
-            matching_files = glob.glob(pattern)
-            if matching_files:
-                # Legfrissebb fájl kiválasztása időbélyeg alapján (fájl módosítás ideje szerint)
-                latest_file = max(matching_files, key=lambda f: os.path.getmtime(f))
-                print(f"📊 Legfrissebb CSV betöltése ({pattern}): {latest_file}")
-                
-                df = pd.read_csv(latest_file, encoding='utf-8-sig', sep='|')
-                
-                # Ellenőrizzük, hogy sikerült-e betölteni
-                if df.empty:
-                    continue  # Próbáljuk a következő pattern-t
-                
-                print(f"✅ Sikeresen betöltve: {len(df)} sor")
-                
-                # Numerikus konverziók
-                df['teljes_ar_millió'] = df['teljes_ar'].apply(parse_million_ft)
-                df['terulet_szam'] = df['terulet'].apply(parse_area)
-                df['szobak_szam'] = df['szobak'].apply(parse_rooms)
-                
-                # Családbarát pontszám számítása
-                df['csaladbarati_pontszam'] = df.apply(create_family_score, axis=1)
-                
-                return df
+        # Legfrissebb adatkészlet a manifestből (O(1) lookup) - régi, nem regisztrált CSV-nél glob fallback
+        for dataset in resolve_datasets(DATASET_LOCATION, location_patterns):
+            latest_file = dataset['path']
+            print(f"📊 Legfrissebb CSV betöltése ({dataset['forras']}): {latest_file}")
+            
+            df = read_cached_dataset(latest_file, dataset['content_hash'])
+            
+            # Sidecar koordináta tár csatolása (hiányzó geo_* értékek)
+            df = attach_coordinates(df)
+            df = attach_history(df)  # piacon töltött napok, árváltozás (történet adatbázis)
+            df.attrs['forras_fajl'] = latest_file  # előre számolt artefaktumokhoz (ár/m² felület)
+            
+            # Ellenőrizzük, hogy sikerült-e betölteni
+            if df.empty:
+                continue  # Próbáljuk a következő jelöltet
+            
+            print(f"✅ Sikeresen betöltve: {len(df)} sor")
+            
+            # Családbarát pontszám számítása
+            df['csaladbarati_pontszam'] = df.apply(create_family_score, axis=1)
+            
+            return df
         
         # Ha egyik pattern sem működött
         st.error("HIBA: Nincs található CSV fájl a megadott pattern-ekhez!")
@@ -99,33 +105,6 @@ def load_and_process_data():
         st.error(f"Adatbetöltési hiba: {e}")
         return pd.DataFrame()
 
-def parse_million_ft(text):
-    """Millió Ft konvertálása számra"""
-    if pd.isna(text):
-        return None
-    text_str = str(text).replace(',', '.')
-    # "159 M Ft" -> 159, "263,80 M Ft" -> 263.80
-    match = re.search(r'(\d+(?:\.\d+)?)\s*M', text_str)
-    return float(match.group(1)) if match else None
-
-def parse_area(text):
-    """Terület konvertálása számra"""
-    if pd.isna(text):
-        return None
-    text_str = str(text)
-    # "133 m2" -> 133
-    match = re.search(r'(\d+)', text_str)
-    return int(match.group(1)) if match else None
-
-def parse_rooms(text):
-    """Szobaszám konvertálása számra"""
-    if pd.isna(text):
-        return None
-    text_str = str(text)
-    # "5 + 1 fél" -> 5, "4 + 1 fél" -> 4, "3" -> 3
-    match = re.search(r'(\d+)', text_str)
-    return int(match.group(1)) if match else None
-
 def create_family_score(row):
     """Családbarát pontszám számítása (0-100)"""
     score = 0
@@ -263,19 +242,20 @@ def main():
     
     # Szobaszám szűrő
     if 'szobak_szam' in df.columns and df['szobak_szam'].notna().any():
-        min_rooms = int(df['szobak_szam'].min())
-        max_rooms = int(df['szobak_szam'].max())
+        min_rooms = float(np.floor(df['szobak_szam'].min()))  # fél szoba: tört szobaszám
+        max_rooms = float(np.ceil(df['szobak_szam'].max()))
         
         # Ha min és max azonos, akkor nem csinálunk slider-t
         if min_rooms == max_rooms:
-            st.sidebar.write(f"🏠 **Szobaszám:** {min_rooms}")
+            st.sidebar.write(f"🏠 **Szobaszám:** {min_rooms:g}")
             rooms_range = (min_rooms, max_rooms)
         else:
             rooms_range = st.sidebar.slider(
                 "🏠 Szobaszám", 
                 min_value=min_rooms, 
                 max_value=max_rooms, 
-                value=(min_rooms, max_rooms)  # VÁLTOZÁS: teljes tartomány alapértelmezett
+                value=(min_rooms, max_rooms),  # VÁLTOZÁS: teljes tartomány alapértelmezett
+                step=0.5
             )
     else:
         rooms_range = None
@@ -298,6 +278,17 @@ def main():
     filter_smart = st.sidebar.checkbox("🏠 Smart Technology", value=False)
     filter_premium = st.sidebar.checkbox("💎 Premium Design", value=False)
     
+    # 🕒 Piaci történet szűrő - csak ha van történet adatbázis (listing_history)
+    filter_price_drop = False
+    max_market_days = None
+    if 'piacon_napok' in df.columns and df['piacon_napok'].notna().any():
+        st.sidebar.subheader("🕒 Piaci Történet")
+        filter_price_drop = st.sidebar.checkbox("📉 Csak árcsökkentett", value=False)
+        longest_days = int(df['piacon_napok'].max())
+        if longest_days > 0:
+            max_market_days = st.sidebar.slider("📅 Max. napok a piacon", min_value=0, max_value=longest_days,
+                                                value=longest_days)
+    
     # Szűrés alkalmazása
     filtered_df = df.copy()
     
@@ -335,6 +326,28 @@ def main():
     if filter_premium:
         filtered_df = filtered_df[filtered_df.get('van_premium_design', False) == True]
     
+    if filter_price_drop:
+        filtered_df = filtered_df[filtered_df['arcsokkentes'] == True]
+    if max_market_days is not None:
+        filtered_df = filtered_df[
+            (filtered_df['piacon_napok'].isna()) |
+            (filtered_df['piacon_napok'] <= max_market_days)
+        ]
+    
+    # 📍 Közelség szűrő - térképre kattintott pont körüli sugár (térbeli index)
+    st.sidebar.subheader("📍 Közelség")
+    proximity_center = st.session_state.get('kozelseg_kozeppont')
+    if proximity_center:
+        radius_m = st.sidebar.slider("📏 Sugár (m)", min_value=100, max_value=5000, value=1000, step=100)
+        st.session_state['kozelseg_sugar'] = radius_m
+        st.sidebar.caption(f"Középpont: {proximity_center[0]:.5f}, {proximity_center[1]:.5f}")
+        if st.sidebar.button("✖️ Közelség szűrő törlése"):
+            del st.session_state['kozelseg_kozeppont']
+            st.rerun()
+        filtered_df = filter_within_radius(filtered_df, proximity_center, radius_m, full_df=df)
+    else:
+        st.sidebar.caption("🖱️ Kattints a térképre a közelség szerinti szűréshez")
+    
     # Eredmények megjelenítése
     st.header(f"🏠 Találatok: {len(filtered_df)} ingatlan")
     
@@ -946,117 +959,121 @@ def create_interactive_map(df, location_name):
     st.markdown("## 🗺️ **INTERAKTÍV TÉRKÉP**")
     st.markdown(f"**📍 Lokáció:** {location_name} | **🏠 Ingatlanok:** {len(map_df)} db GPS koordinátával")
     
-    # Térkép alapbeállítások
-    center_lat = map_df['geo_latitude'].mean()
-    center_lng = map_df['geo_longitude'].mean()
-    
-    # Folium térkép létrehozása
-    m = folium.Map(
-        location=[center_lat, center_lng],
-        zoom_start=12,
-        tiles='OpenStreetMap'
-    )
-    
-    # Színkódolás ár szerint
-    def get_price_color(price):
-        """Ár alapú színkódolás"""
-        if pd.isna(price):
-            return '#95A5A6'  # Szürke, ha nincs ár
-        elif price <= 100:
-            return '#2ECC71'  # Zöld - olcsó
-        elif price <= 200:
-            return '#F39C12'  # Narancs - közepes
-        elif price <= 300:
-            return '#E74C3C'  # Piros - drága  
+    # Térkép réteg beállítások - a widgetek a cache-elt térkép építésen kívül
+    surface, resolution = None, None
+    if st.checkbox("🔷 Ár/m² hexagon felület", value=False, key=f"arfelulet_{location_name}"):
+        surface = load_price_surface(df.attrs.get('forras_fajl'), map_df)
+        resolutions = sorted(surface['felbontas_m'].unique().tolist())
+        if resolutions:
+            resolution = st.select_slider("Hexagon sugár (m)", options=resolutions,
+                                          value=500 if 500 in resolutions else resolutions[0],
+                                          key=f"arfelulet_felbontas_{location_name}")
         else:
-            return '#8E44AD'  # Lila - nagyon drága
+            st.info("🔷 Nincs ár/m² adat koordinátás hirdetésekhez")
+    proximity_center = st.session_state.get('kozelseg_kozeppont')
+    proximity_radius = st.session_state.get('kozelseg_sugar', 1000)
+    
+    def build_map():
+        # Térkép alapbeállítások
+        center_lat = map_df['geo_latitude'].mean()
+        center_lng = map_df['geo_longitude'].mean()
+    
+        # Folium térkép létrehozása
+        m = folium.Map(
+            location=[center_lat, center_lng],
+            zoom_start=12,
+            tiles='OpenStreetMap',
+            prefer_canvas=True
+        )
     
-    # Markerek hozzáadása
-    for idx, row in map_df.iterrows():
-        try:
-            # Ingatlan adatok
-            lat = float(row['geo_latitude'])
-            lng = float(row['geo_longitude'])
-            cim = row.get('cim', 'N/A')[:50]
-            ar = row.get('teljes_ar', 'N/A')
-            terulet = row.get('terulet', 'N/A')
-            allapot = row.get('ingatlan_allapota', 'N/A')
-            url = row.get('link', '#')
-            
-            # Nettó pontszám (Enhanced AI feature)
-            netto_pont = row.get('netto_szoveg_pont', 0)
-            
-            # Színkód meghatározása ár szerint
-            price_value = row.get('teljes_ar_millió', None)
-            color = get_price_color(price_value)
-            
-            # Tooltip HTML tartalma
-            tooltip_html = f"""
-            <div style='width: 250px; font-family: Arial;'>
-                <h4 style='margin: 0; color: #2E86AB;'>🏠 {cim}</h4>
-                <hr style='margin: 5px 0;'>
-                <p style='margin: 2px 0;'><b>💰 Ár:</b> {ar}</p>
-                <p style='margin: 2px 0;'><b>📐 Terület:</b> {terulet}</p>
-                <p style='margin: 2px 0;'><b>🏗️ Állapot:</b> {allapot}</p>
-                <p style='margin: 2px 0;'><b>⭐ AI Pontszám:</b> {netto_pont:.1f}</p>
-                <p style='margin: 5px 0;'><a href='{url}' target='_blank' style='color: #2E86AB;'>🔗 Hirdetés megnyitása</a></p>
-            </div>
-            """
-            
-            # Marker hozzáadása
-            folium.CircleMarker(
-                location=[lat, lng],
-                radius=8,
-                popup=folium.Popup(tooltip_html, max_width=300),
-                tooltip=f"{cim} - {ar}",
-                color='white',
-                weight=2,
-                fillColor=color,
-                fillOpacity=0.8
+        # Markerek hozzáadása - egyetlen GeoJSON réteg, stílus és popup a tulajdonságokból
+        netto_pont = pd.to_numeric(map_df.get('netto_szoveg_pont', pd.Series(0, index=map_df.index)), errors='coerce').fillna(0)
+        map_mode = add_listing_markers(
+            m, map_df,
+            popup_fields=[
+                ('💰 Ár', 'teljes_ar'),
+                ('📐 Terület', 'terulet'),
+                ('🏗️ Állapot', 'ingatlan_allapota'),
+                ('⭐ AI Pontszám', netto_pont.map('{:.1f}'.format)),
+            ],
+            colors=price_colors(map_df['teljes_ar_millió']),
+            links=map_df['link'] if 'link' in map_df.columns else None,
+            prices=map_df['teljes_ar_millió'],
+        )
+    
+        # Legenda hozzáadása - ár alapú színkódolás (DARK MODE kompatibilis)
+        legend_html = f"""
+        <div style='position: fixed; 
+                    top: 10px; right: 10px; width: 180px; height: auto; 
+                    background-color: rgba(40, 40, 40, 0.9); border:2px solid #666; z-index:9999; 
+                    font-size:12px; padding: 10px; color: white;'>
+        <h4 style='margin-top:0; color: white;'>� Árszínkódolás</h4>
+        <p style='margin: 3px 0;'>
+            <span style='color:#2ECC71; font-size: 16px;'>●</span> 
+            ≤100 M Ft: olcsó
+        </p>
+        <p style='margin: 3px 0;'>
+            <span style='color:#F39C12; font-size: 16px;'>●</span> 
+            101-200 M Ft: közepes
+        </p>
+        <p style='margin: 3px 0;'>
+            <span style='color:#E74C3C; font-size: 16px;'>●</span> 
+            201-300 M Ft: drága
+        </p>
+        <p style='margin: 3px 0;'>
+            <span style='color:#8E44AD; font-size: 16px;'>●</span> 
+            300+ M Ft: nagyon drága
+        </p>
+        <p style='margin: 3px 0;'>
+            <span style='color:#95A5A6; font-size: 16px;'>●</span> 
+            Nincs ár adat
+        </p>
+        <hr style='margin: 8px 0;'>
+        <p style='margin: 3px 0; font-size: 10px;'>
+            🔗 Kattints a markerekre<br/>részletes információkért
+        </p>
+        </div>
+        """
+    
+        m.get_root().html.add_child(folium.Element(legend_html))
+        
+        # Hexagon ár/m² felület - előre számolt artefaktum (price_hexbin), egyetlen choropleth réteg
+        cell_count = 0
+        if resolution is not None:
+            cell_count = add_price_surface_layer(m, surface, resolution)
+            folium.LayerControl(collapsed=True).add_to(m)
+        
+        # Közelség szűrő köre
+        if proximity_center:
+            folium.Circle(
+                location=list(proximity_center),
+                radius=proximity_radius,
+                color='#2E86AB',
+                fill=True,
+                fill_opacity=0.08
             ).add_to(m)
-            
-        except Exception as e:
-            st.warning(f"Marker hiba: {e}")
-            continue
-    
-    # Legenda hozzáadása - ár alapú színkódolás (DARK MODE kompatibilis)
-    legend_html = f"""
-    <div style='position: fixed; 
-                top: 10px; right: 10px; width: 180px; height: auto; 
-                background-color: rgba(40, 40, 40, 0.9); border:2px solid #666; z-index:9999; 
-                font-size:12px; padding: 10px; color: white;'>
-    <h4 style='margin-top:0; color: white;'>� Árszínkódolás</h4>
-    <p style='margin: 3px 0;'>
-        <span style='color:#2ECC71; font-size: 16px;'>●</span> 
-        ≤100 M Ft: olcsó
-    </p>
-    <p style='margin: 3px 0;'>
-        <span style='color:#F39C12; font-size: 16px;'>●</span> 
-        101-200 M Ft: közepes
-    </p>
-    <p style='margin: 3px 0;'>
-        <span style='color:#E74C3C; font-size: 16px;'>●</span> 
-        201-300 M Ft: drága
-    </p>
-    <p style='margin: 3px 0;'>
-        <span style='color:#8E44AD; font-size: 16px;'>●</span> 
-        300+ M Ft: nagyon drága
-    </p>
-    <p style='margin: 3px 0;'>
-        <span style='color:#95A5A6; font-size: 16px;'>●</span> 
-        Nincs ár adat
-    </p>
-    <hr style='margin: 8px 0;'>
-    <p style='margin: 3px 0; font-size: 10px;'>
-        🔗 Kattints a markerekre<br/>részletes információkért
-    </p>
-    </div>
-    """
-    
-    m.get_root().html.add_child(folium.Element(legend_html))
-    
-    # Térkép megjelenítése Streamlit-ben
-    st_folium(m, width=900, height=500, key=f"map_{location_name.lower().replace(' ', '_')}")
+        return m, map_mode, cell_count
+    
+    # Kész térkép cache-ből - csak a szűrt hirdetés halmaz vagy a réteg beállítások változására
+    # épül újra (pl. a scatter plot változójának váltása nem építi újra)
+    map_key = (location_name, df.attrs.get('forras_fajl'), index_fingerprint(map_df.index),
+               resolution, proximity_center, proximity_radius)
+    m, map_mode, cell_count = cached_map(map_key, build_map)
+    if map_mode == 'grid':
+        st.info(f"🗺️ {len(map_df)} ingatlan - rács cellákba aggregálva (cellánként darabszám + medián ár)")
+    if cell_count:
+        st.caption(f"🔷 {cell_count} hexagon cella | szín: medián ár/m² (zöld: olcsó -> piros: drága)")
+    
+    # Térkép megjelenítése Streamlit-ben - csak a kattintás kerül vissza (pan/zoom nem indít rerun-t)
+    map_state = st_folium(m, width=900, height=500, key=f"map_{location_name.lower().replace(' ', '_')}",
+                          returned_objects=["last_clicked"])
+    clicked = (map_state or {}).get('last_clicked')
+    if clicked:
+        click = (round(clicked['lat'], 6), round(clicked['lng'], 6))
+        if click != st.session_state.get('kozelseg_utolso_kattintas'):
+            st.session_state['kozelseg_utolso_kattintas'] = click
+            st.session_state['kozelseg_kozeppont'] = click
+            st.rerun()
 
 if __name__ == "__main__":
     main()
@@ -3,11 +3,12 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
-import re
 from datetime import datetime
-import glob
-import os
 import warnings
+from coordinate_store import attach_coordinates
+from listing_history import attach_history
+from dataset_io import DASHBOARD_EXCLUDED_COLUMNS, read_dataset
+from dataset_manifest import resolve_datasets
 warnings.filterwarnings('ignore')
 
 # Fix location_name és CSV fájl beégetése - TÖRÖKBÁLINT-TÜKÖRHEGY
@@ -16,6 +17,7 @@ def get_location_from_filename():
     return "TÖRÖKBÁLINT-TÜKÖRHEGY"
 
 location_name = get_location_from_filename()
+DATASET_LOCATION = "torokbalint_tukorhegy"  # manifest lokáció kulcs (dataset_manifest)
 timestamp = datetime.now().strftime("%Y.%m.%d %H:%M")
 
 # Streamlit konfiguráció
@@ -26,25 +28,33 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_data(show_spinner=False)
+def read_cached_dataset(path, content_hash):
+    """Adatkészlet beolvasása - a manifest tartalom hash a cache kulcs (változatlan fájl: nincs újraolvasás)"""
+    return read_dataset(path, exclude=DASHBOARD_EXCLUDED_COLUMNS, categories=False)
+
 def load_and_process_data():
     """Adatok betöltése és feldolgozása - FIX lokáció, dinamikus időbélyeg: Törökbálint-Tükörhegy"""
     try:
         # Fix lokáció pattern - mindig a legfrissebb Törökbálint-Tükörhegy CSV-t keressük
         location_pattern = "ingatlan_reszletes_torokbalint_tukorhegy_*.csv"
         
-        # Keresés a fix lokációra
-        matching_files = glob.glob(location_pattern)
+        # Legfrissebb adatkészlet a manifestből (O(1) lookup) - régi, nem regisztrált CSV-nél glob fallback
+        dataset = next(resolve_datasets(DATASET_LOCATION, [location_pattern]), None)
         
-        if not matching_files:
+        if dataset is None:
             st.error(f"HIBA: Nincs található CSV fájl a mintához: {location_pattern}")
             return pd.DataFrame()
         
-        # Legfrissebb fájl kiválasztása időbélyeg alapján (fájl módosítás ideje szerint)
-        latest_file = max(matching_files, key=lambda f: os.path.getmtime(f))
+        latest_file = dataset['path']
+        
+        print(f"📊 Legfrissebb Törökbálint-Tükörhegy CSV betöltése ({dataset['forras']}): {latest_file}")
         
-        print(f"📊 Legfrissebb Törökbálint-Tükörhegy CSV betöltése: {latest_file}")
+        df = read_cached_dataset(latest_file, dataset['content_hash'])
         
-        df = pd.read_csv(latest_file, encoding='utf-8-sig', sep='|')
+        # Sidecar koordináta tár csatolása (hiányzó geo_* értékek)
+        df = attach_coordinates(df)
+        df = attach_history(df)  # piacon töltött napok, árváltozás (történet adatbázis)
         
         # Ellenőrizzük, hogy sikerült-e betölteni
         if df.empty:
@@ -53,11 +63,6 @@ def load_and_process_data():
         
         print(f"✅ Sikeresen betöltve: {len(df)} sor")
         
-        # Numerikus konverziók
-        df['teljes_ar_millió'] = df['teljes_ar'].apply(parse_million_ft)
-        df['terulet_szam'] = df['terulet'].apply(parse_area)
-        df['szobak_szam'] = df['szobak'].apply(parse_rooms)
-        
         # Családbarát pontszám számítása
         df['csaladbarati_pontszam'] = df.apply(create_family_score, axis=1)
         
@@ -67,33 +72,6 @@ def load_and_process_data():
         st.error(f"Adatbetöltési hiba: {e}")
         return pd.DataFrame()
 
-def parse_million_ft(text):
-    """Millió Ft konvertálása számra"""
-    if pd.isna(text):
-        return None
-    text_str = str(text).replace(',', '.')
-    # "159 M Ft" -> 159, "263,80 M Ft" -> 263.80
-    match = re.search(r'(\d+(?:\.\d+)?)\s*M', text_str)
-    return float(match.group(1)) if match else None
-
-def parse_area(text):
-    """Terület konvertálása számra"""
-    if pd.isna(text):
-        return None
-    text_str = str(text)
-    # "133 m2" -> 133
-    match = re.search(r'(\d+)', text_str)
-    return int(match.group(1)) if match else None
-
-def parse_rooms(text):
-    """Szobaszám konvertálása számra"""
-    if pd.isna(text):
-        return None
-    text_str = str(text)
-    # "5 + 1 fél" -> 5, "4 + 1 fél" -> 4, "3" -> 3
-    match = re.search(r'(\d+)', text_str)
-    return int(match.group(1)) if match else None
-
 def create_family_score(row):
     """Családbarát pontszám számítása (0-100)"""
     score = 0
@@ -231,19 +209,20 @@ def main():
     
     # Szobaszám szűrő
     if 'szobak_szam' in df.columns and df['szobak_szam'].notna().any():
-        min_rooms = int(df['szobak_szam'].min())
-        max_rooms = int(df['szobak_szam'].max())
+        min_rooms = float(np.floor(df['szobak_szam'].min()))  # fél szoba: tört szobaszám
+        max_rooms = float(np.ceil(df['szobak_szam'].max()))
         
         # Ha min és max azonos, akkor nem csinálunk slider-t
         if min_rooms == max_rooms:
-            st.sidebar.write(f"🏠 **Szobaszám:** {min_rooms}")
+            st.sidebar.write(f"🏠 **Szobaszám:** {min_rooms:g}")
             rooms_range = (min_rooms, max_rooms)
         else:
             rooms_range = st.sidebar.slider(
                 "🏠 Szobaszám", 
                 min_value=min_rooms, 
                 max_value=max_rooms, 
-                value=(min_rooms, max_rooms)  # VÁLTOZÁS: teljes tartomány alapértelmezett
+                value=(min_rooms, max_rooms),  # VÁLTOZÁS: teljes tartomány alapértelmezett
+                step=0.5
             )
     else:
         rooms_range = None
@@ -266,6 +245,17 @@ def main():
     filter_smart = st.sidebar.checkbox("🏠 Smart Technology", value=False)
     filter_premium = st.sidebar.checkbox("💎 Premium Design", value=False)
     
+    # 🕒 Piaci történet szűrő - csak ha van történet adatbázis (listing_history)
+    filter_price_drop = False
+    max_market_days = None
+    if 'piacon_napok' in df.columns and df['piacon_napok'].notna().any():
+        st.sidebar.subheader("🕒 Piaci Történet")
+        filter_price_drop = st.sidebar.checkbox("📉 Csak árcsökkentett", value=False)
+        longest_days = int(df['piacon_napok'].max())
+        if longest_days > 0:
+            max_market_days = st.sidebar.slider("📅 Max. napok a piacon", min_value=0, max_value=longest_days,
+                                                value=longest_days)
+    
     # Szűrés alkalmazása
     filtered_df = df.copy()
     
@@ -303,6 +293,14 @@ def main():
     if filter_premium:
         filtered_df = filtered_df[filtered_df.get('van_premium_design', False) == True]
     
+    if filter_price_drop:
+        filtered_df = filtered_df[filtered_df['arcsokkentes'] == True]
+    if max_market_days is not None:
+        filtered_df = filtered_df[
+            (filtered_df['piacon_napok'].isna()) |
+            (filtered_df['piacon_napok'] <= max_market_days)
+        ]
+    
     # Eredmények megjelenítése
     st.header(f"🏠 Találatok: {len(filtered_df)} ingatlan")
     
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADATKÉSZLET I/O SEGÉDFÜGGVÉNYEK
+===============================
+
+Közös olvasó/író függvények a pipe (|) elválasztós ingatlan CSV-khez.
+Az írás ATOMIKUS: ideiglenes fájlba ír ugyanabban a könyvtárban, majd
+`os.replace`-szel cseréli - megszakadt futás nem hagy félkész CSV-t.
+
+A parse-olt szám oszlopok (listing_parsers: teljes_ar_ft, teljes_ar_millió, nm_ar_ft,
+terulet_szam, telek_m2, szobak_szam) ingestkor a CSV-be kerülnek; régi, ezek nélküli
+CSV-nél olvasáskor pótlódnak.
+
+Oszlopos másolat: a CSV mellé azonos nevű .parquet (pyarrow) is készül, az oszlop
+típusok a `schema` modul szerint (kategória, int8 jelzők, float32 pontszámok). A
+`read_dataset` ezt tölti be, ha frissebb a CSV-nél - csak a kért oszlopokat.
+Minden olvasó a sémát alkalmazza, így betöltéskor nincs típus kikövetkeztetés.
+
+Rekord napló (RecordJournal): a részletes scraper minden kész rekordot azonnal egy
+`<cél>.part.jsonl` fájlba fűz - a futás nem tartja memóriában az összes rekordot, és
+megszakadt futás rekordjai sem vesznek el. A végén egy beolvasás, egy atomikus CSV írás.
+
+Tartalom archívum (content_archive): a parquet másolatba a `leiras` helyett csak a
+`leiras_hash` kerül; az olvasók a hiányzó leírást az archívumból állítják vissza.
+"""
+
+import json
+import os
+import stat
+import tempfile
+
+import pandas as pd
+
+from content_archive import ARCHIVED_COLUMNS, restore_archived_columns, strip_archived_columns
+from listing_parsers import PARSED_COLUMNS, add_parsed_columns  # noqa: F401 - re-export
+from schema import SCHEMA_VERSION, apply_schema, csv_dtypes, missing_required_columns  # noqa: F401 - SCHEMA_VERSION re-export
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+CSV_SEP = '|'
+CSV_ENCODING = 'utf-8-sig'
+
+# Parquet séma metaadat kulcs - régebbi séma verzióval írt másolat helyett a CSV töltődik
+SCHEMA_VERSION_KEY = b'ingatlan_schema_version'
+# Hosszú szabad szöveg - a dashboardok nem töltik be
+DASHBOARD_EXCLUDED_COLUMNS = ('leiras',)
+
+
+def read_detailed_csv(path, categories=False, **kwargs):
+    """Részletes (vagy lista) CSV beolvasása a repo szabványos formátumában, séma típusokkal
+
+    `categories=False` (alap): a kategória oszlopok str-ként - a pipeline új értéket is írhat beléjük.
+    Leírás nélküli (csak `leiras_hash`) CSV-nél a leírás a tartalom archívumból töltődik.
+    """
+    kwargs.setdefault('sep', CSV_SEP)
+    kwargs.setdefault('encoding', CSV_ENCODING)
+    kwargs.setdefault('dtype', csv_dtypes(categories))
+    return apply_schema(restore_archived_columns(pd.read_csv(path, **kwargs)), categories)
+
+
+def columnar_path(csv_path):
+    """Oszlopos másolat útvonala a CSV mellett (azonos név, .parquet)"""
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+
+def to_columnar(df):
+    """Típusos másolat: parse-olt számok + séma szerinti kompakt típusok, archivált leírás nélkül"""
+    return apply_schema(add_parsed_columns(strip_archived_columns(df).copy()))
+
+
+def write_columnar(df, csv_path):
+    """Oszlopos (.parquet) másolat atomikus mentése a CSV mellé - None, ha nincs pyarrow"""
+    missing = missing_required_columns(df)
+    if missing:
+        print(f"⚠️  Hiányzó kötelező oszlopok ({os.path.basename(csv_path)}): {', '.join(missing)}")
+    if not PARQUET_AVAILABLE:
+        return None
+    table = pa.Table.from_pandas(to_columnar(df), preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           SCHEMA_VERSION_KEY: str(SCHEMA_VERSION).encode()})
+    return atomic_write(columnar_path(csv_path),
+                        lambda tmp_path: pq.write_table(table, tmp_path, compression='zstd'))
+
+
+def _columnar_is_fresh(csv_path):
+    """Friss a másolat, ha nem régebbi a CSV-nél és a jelenlegi séma verzióval készült"""
+    path = columnar_path(csv_path)
+    if not (PARQUET_AVAILABLE and os.path.exists(path)
+            and (not os.path.exists(csv_path) or os.path.getmtime(path) >= os.path.getmtime(csv_path))):
+        return False
+    metadata = pq.read_schema(path).metadata or {}
+    return metadata.get(SCHEMA_VERSION_KEY) == str(SCHEMA_VERSION).encode()
+
+
+def read_dataset(path, columns=None, exclude=(), categories=True):
+    """Adatkészlet betöltése: friss .parquet másolatból (oszlop projekcióval), különben CSV-ből
+
+    - `columns` / `exclude`: csak a szükséges oszlopok kerülnek beolvasásra
+    - A parse-olt szám oszlopok (PARSED_COLUMNS) mindkét úton jelen vannak - CSV-ből
+      csak a régi (ingest előtti) fájloknál parse-olódnak
+    - `categories=False`: a kategória oszlopok sima szövegként (pl. value_counts
+      szűrt adaton ne listázza a 0 darabos kategóriákat)
+    - A parquet másolatban nem tárolt leírás kérésre a tartalom archívumból töltődik
+    """
+    def wanted(name):
+        return (columns is None or name in columns) and name not in exclude
+
+    if path.endswith('.parquet') or _columnar_is_fresh(path):
+        parquet_path = path if path.endswith('.parquet') else columnar_path(path)
+        available = pq.read_schema(parquet_path).names
+        # Kért, de csak hash-ként tárolt szöveg oszlop: a hash oszlop is beolvasandó
+        archived = {hash_column for column, hash_column in ARCHIVED_COLUMNS.items()
+                    if wanted(column) and column not in available and hash_column in available}
+        df = pd.read_parquet(parquet_path, columns=[name for name in available if wanted(name) or name in archived])
+        if archived:
+            df = restore_archived_columns(df)
+            df = df[[name for name in df.columns if wanted(name)]]
+        # Régebbi séma verzióval írt másolat is a jelenlegi típusokra kerül
+        apply_schema(df, categories)
+    else:
+        sources = ({source for source, _ in PARSED_COLUMNS.values()}
+                   | {hash_column for column, hash_column in ARCHIVED_COLUMNS.items() if wanted(column)})
+        df = read_detailed_csv(path, categories=categories, usecols=lambda name: wanted(name) or name in sources)
+        add_parsed_columns(df)
+        apply_schema(df, categories)
+        df = df[[name for name in df.columns if wanted(name)]]
+
+    if not categories:
+        for column in df.columns:
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                df[column] = df[column].astype(df[column].cat.categories.dtype)
+    return df
+
+
+def _current_umask():
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# mkstemp 0600-as fájlt hoz létre - a cél az open() szerinti jogosultságot kapja
+_DEFAULT_FILE_MODE = 0o666 & ~_current_umask()
+
+
+def atomic_write(path, write_func, suffix=''):
+    """Általános atomikus írás: write_func(tmp_path) után rename a célfájlra
+
+    A jogosultság a meglévő célfájlé, új fájlnál 0666 & ~umask (nem a mkstemp 0600-a).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', suffix=suffix or os.path.splitext(path)[1], dir=directory)
+    os.close(fd)
+    try:
+        write_func(tmp_path)
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = _DEFAULT_FILE_MODE
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def atomic_write_csv(df, path, **kwargs):
+    """DataFrame atomikus mentése pipe elválasztós CSV-be"""
+    kwargs.setdefault('sep', CSV_SEP)
+    kwargs.setdefault('encoding', CSV_ENCODING)
+    kwargs.setdefault('index', False)
+    return atomic_write(path, lambda tmp_path: df.to_csv(tmp_path, **kwargs))
+
+
+def journal_path(csv_path):
+    """Rekord napló útvonala a cél CSV mellett"""
+    return f"{csv_path}.part.jsonl"
+
+
+def _json_value(value):
+    if isinstance(value, float) and value != value:
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+
+class RecordJournal:
+    """Soronként appendelt JSON Lines rekord napló (rekordonként flush)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+        self.count = 0
+
+    def append(self, record):
+        """Egy kész rekord (dict) hozzáfűzése - a kulcskészlet rekordonként eltérhet"""
+        line = json.dumps({key: _json_value(value) for key, value in record.items()},
+                          ensure_ascii=False, default=str)
+        self._file.write(line + '\n')
+        self._file.flush()
+        self.count += 1
+
+    def read_frame(self):
+        """A napló összes rekordja DataFrame-ként (a JSON típusok megmaradnak, nincs kikövetkeztetés)"""
+        self._file.flush()
+        if os.path.getsize(self.path) == 0:
+            return pd.DataFrame()
+        return pd.read_json(self.path, lines=True, dtype=False, convert_dates=False)
+
+    def close(self):
+        """Napló fájl bezárása (a fájl megmarad)"""
+        if not self._file.closed:
+            self._file.close()
+
+    def discard(self):
+        """Napló törlése - sikeres végleges írás után"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
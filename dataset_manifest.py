@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ADATKÉSZLET MANIFEST - LEGFRISSEBB CSV LOKÁCIÓNKÉNT, GLOB NÉLKÜL
+================================================================
+
+🎯 CÉL:
+A dashboardok minden újrafuttatáskor glob-oltak több mintára, majd minden
+találatra os.path.getmtime-ot hívtak - másolt fájloknál a módosítási idő ráadásul
+félrevezető. A pipeline (scraper, add_coordinates, refeaturize) minden kiírt
+adatkészletet regisztrál egy JSON manifestben: lokáció, típus, futás időbélyege
+(a fájlnévből), sorok száma, séma verzió, tartalom hash.
+
+📋 HASZNÁLAT:
+    register_dataset(csv_file, df)                      # pipeline: írás után
+    dataset = latest_dataset('xi_ker')                  # dashboard: O(1) lookup
+    for dataset in resolve_datasets('xi_ker', patterns): # manifest, majd glob fallback
+        df = read_cached_dataset(dataset['path'], dataset['content_hash'])
+
+python dataset_manifest.py rebuild "ingatlan_*.csv"     # meglévő CSV-k regisztrálása
+python dataset_manifest.py list
+
+⚡ Jellemzők:
+- Lokációnként típusonként (koordinatak / reszletes / lista) a legutóbbi futás útvonala
+  külön `latest` táblában - a dashboard egy dict lookuppal kapja meg
+- Tartalom hash (sha256) - a dashboard ezzel kulcsolja a beolvasás cache-t
+- Atomikus írás fájlzár alatt; a dashboardok csak akkor olvassák újra, ha a manifest változott
+- Az útvonalak a manifest könyvtárához relatívak - bármely könyvtárból futtatva ugyanaz a kulcs
+
+💡 Manifest helye: DATASET_MANIFEST_PATH környezeti változó, alapértelmezés: ingatlan_manifest.json
+"""
+
+import argparse
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from functools import lru_cache
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from dataset_io import CSV_ENCODING, CSV_SEP, SCHEMA_VERSION, atomic_write, columnar_path
+
+DEFAULT_MANIFEST_PATH = 'ingatlan_manifest.json'
+MANIFEST_FORMAT = 1
+
+KIND_COORDINATES = 'koordinatak'
+KIND_DETAILED = 'reszletes'
+KIND_LIST = 'lista'
+# Dashboard preferencia: azonos futásból a koordinátás változat, lista csak végső esetben
+DASHBOARD_KINDS = (KIND_COORDINATES, KIND_DETAILED, KIND_LIST)
+# Lista CSV csak akkor jelölt, ha nincs részletes adatkészlet (futás közben / hibás részletes lépés után)
+FALLBACK_KINDS = (KIND_LIST,)
+
+_RUN_TIMESTAMP_RE = re.compile(r'_(\d{8}_\d{6})')
+_HASH_CHUNK = 1 << 20
+
+
+def manifest_path(path=None):
+    """Manifest fájl útvonala"""
+    return path or os.environ.get('DATASET_MANIFEST_PATH', DEFAULT_MANIFEST_PATH)
+
+
+def run_timestamp(csv_file):
+    """Futás időpontja a fájlnévből (első _YYYYMMDD_HHMMSS), különben módosítási idő"""
+    match = _RUN_TIMESTAMP_RE.search(os.path.basename(csv_file))
+    if match:
+        return datetime.strptime(match.group(1), '%Y%m%d_%H%M%S').timestamp()
+    return os.path.getmtime(csv_file)
+
+
+def dataset_kind(csv_file):
+    """koordinatak / reszletes / lista a fájlnév alapján"""
+    name = os.path.basename(csv_file)
+    if '_koordinatak_' in name:
+        return KIND_COORDINATES
+    if name.startswith('ingatlan_lista_'):
+        return KIND_LIST
+    return KIND_DETAILED
+
+
+def dataset_location(csv_file):
+    """Lokáció kulcs (pl. 'xi_ker') - pontos egyezés, ugyanaz, mint a dashboard generátoré"""
+    from generate_dashboard import location_key
+
+    return location_key(csv_file)
+
+
+def content_hash(path):
+    """Fájl tartalom sha256 (darabonként olvasva)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _manifest_dir(path):
+    return os.path.dirname(os.path.abspath(path))
+
+
+def manifest_key(file_path, path=None):
+    """Adatkészlet kulcs a manifestben: útvonal a manifest könyvtárához képest (nem a futtató cwd-jéhez)"""
+    return os.path.relpath(os.path.abspath(file_path), _manifest_dir(manifest_path(path))).replace(os.sep, '/')
+
+
+def _resolve(entry, path):
+    """Manifest bejegyzés a hívó számára használható útvonalakkal"""
+    directory = _manifest_dir(path)
+    resolved = dict(entry, path=os.path.normpath(os.path.join(directory, entry['path'])))
+    if entry.get('columnar_path'):
+        resolved['columnar_path'] = os.path.normpath(os.path.join(directory, entry['columnar_path']))
+    return resolved
+
+
+@contextlib.contextmanager
+def _manifest_lock(path):
+    """Kizárólagos zár a manifest olvasás-módosítás-írás idejére (párhuzamos pipeline lépések)"""
+    with open(f"{path}.lock", 'a+b') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _empty_manifest():
+    return {'format': MANIFEST_FORMAT, 'datasets': {}, 'latest': {}}
+
+
+@lru_cache(maxsize=2)
+def _read_manifest(path, mtime_ns):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_manifest(path=None):
+    """Manifest betöltése (módosításonként egyszer) - üres manifest, ha nincs fájl"""
+    path = manifest_path(path)
+    try:
+        return _read_manifest(path, os.stat(path).st_mtime_ns)
+    except FileNotFoundError:
+        return _empty_manifest()
+
+
+def _order(entry):
+    return entry['run_timestamp'], entry['registered_at']
+
+
+def register_dataset(csv_file, df=None, path=None):
+    """Kiírt adatkészlet regisztrálása (írás után) - visszaadja a manifest bejegyzést"""
+    if df is None:
+        df = pd.read_csv(csv_file, sep=CSV_SEP, encoding=CSV_ENCODING, usecols=[0], on_bad_lines='skip')
+    path = manifest_path(path)
+    columnar = columnar_path(csv_file)
+    entry = {
+        'path': manifest_key(csv_file, path),
+        'location': dataset_location(csv_file),
+        'kind': dataset_kind(csv_file),
+        'run_timestamp': run_timestamp(csv_file),
+        'row_count': int(len(df)),
+        'schema_version': SCHEMA_VERSION,
+        'content_hash': content_hash(csv_file),
+        'columnar_path': manifest_key(columnar, path) if os.path.exists(columnar) else None,
+        'registered_at': time.time(),
+    }
+
+    # Zár alatt: olvasás közvetlenül írás előtt (nem a cache-ből) - párhuzamos pipeline lépések
+    # bejegyzései nem íródnak felül
+    with _manifest_lock(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            manifest = _empty_manifest()
+        manifest['datasets'][entry['path']] = entry
+
+        latest = manifest['latest'].setdefault(entry['location'], {})
+        current = manifest['datasets'].get(latest.get(entry['kind']))
+        if current is None or _order(entry) >= _order(current):
+            latest[entry['kind']] = entry['path']
+
+        def write(tmp):
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+        atomic_write(path, write, suffix='.json')
+    return _resolve(entry, path)
+
+
+def latest_dataset(location, kinds=DASHBOARD_KINDS, path=None):
+    """Legfrissebb futás adatkészlete a lokációhoz (O(1)) - azonos futásból a `kinds` sorrend dönt
+
+    `FALLBACK_KINDS` (lista) csak akkor, ha egyetlen részletes adatkészlet sincs - bármilyen régi is.
+    """
+    manifest = load_manifest(path)
+    latest = manifest['latest'].get(location, {})
+    candidates = [_resolve(manifest['datasets'][latest[kind]], manifest_path(path)) for kind in kinds
+                  if latest.get(kind) in manifest['datasets']]
+    candidates = [entry for entry in candidates if os.path.exists(entry['path'])]
+    candidates = [entry for entry in candidates if entry['kind'] not in FALLBACK_KINDS] or candidates
+    if not candidates:
+        return None
+    newest = max(entry['run_timestamp'] for entry in candidates)
+    return next(entry for entry in candidates if entry['run_timestamp'] == newest)
+
+
+def resolve_datasets(location, patterns, path=None):
+    """Betöltendő adatkészlet jelöltek: manifest bejegyzés, majd glob fallback mintánként
+
+    A fallback csak nem regisztrált (régi) fájloknál fut: a fájlnév időbélyege szerint
+    választ, a cache kulcs méret + módosítási idő.
+    """
+    dataset = latest_dataset(location, path=path)
+    if dataset:
+        yield dict(dataset, forras='manifest')
+
+    registered = load_manifest(path)['datasets']
+    for pattern in patterns:
+        matching_files = glob.glob(pattern)
+        if not matching_files:
+            continue
+        latest_file = max(matching_files, key=lambda f: (run_timestamp(f), f))
+        key = manifest_key(latest_file, path)
+        if dataset and os.path.abspath(latest_file) == os.path.abspath(dataset['path']):
+            continue
+        if key in registered:
+            yield dict(_resolve(registered[key], manifest_path(path)), forras=pattern)
+            continue
+        print(f"💡 Nem regisztrált adatkészlet ({pattern}) - python dataset_manifest.py rebuild \"{pattern}\"")
+        stat = os.stat(latest_file)
+        yield {'path': latest_file, 'location': location, 'kind': dataset_kind(latest_file),
+               'run_timestamp': run_timestamp(latest_file), 'forras': pattern,
+               'content_hash': f"{stat.st_size}-{stat.st_mtime_ns}"}
+
+
+def main():
+    """Meglévő CSV-k regisztrálása / manifest listázása"""
+    parser = argparse.ArgumentParser(description='Adatkészlet manifest (legfrissebb CSV lokációnként)')
+    parser.add_argument('command', choices=['rebuild', 'list'])
+    parser.add_argument('inputs', nargs='*', help="CSV fájlok vagy glob minták (rebuild)")
+    parser.add_argument('--manifest', default=None,
+                        help=f"Manifest fájl (alap: DATASET_MANIFEST_PATH vagy {DEFAULT_MANIFEST_PATH})")
+    args = parser.parse_args()
+
+    if args.command == 'rebuild':
+        files = []
+        for pattern in args.inputs or ['ingatlan_*.csv']:
+            files.extend(f for f in sorted(glob.glob(pattern)) if f not in files)
+        # Származtatott artefaktumok (ár/m² felület) nem adatkészletek
+        files = [f for f in files if not f.endswith('_arfelulet.csv')]
+        if not files:
+            print("❌ Nincs regisztrálható CSV")
+            sys.exit(1)
+        for csv_file in sorted(files, key=run_timestamp):
+            entry = register_dataset(csv_file, path=args.manifest)
+            print(f"📇 {entry['location']:<25} {entry['kind']:<12} {entry['row_count']:>6} sor  {csv_file}")
+
+    manifest = load_manifest(args.manifest)
+    if not manifest['latest']:
+        print("📭 Üres manifest")
+        return
+    print(f"\n📚 Legfrissebb adatkészletek ({manifest_path(args.manifest)}):")
+    for location in sorted(manifest['latest']):
+        for kind, dataset_path in sorted(manifest['latest'][location].items()):
+            entry = manifest['datasets'][dataset_path]
+            when = datetime.fromtimestamp(entry['run_timestamp']).strftime('%Y-%m-%d %H:%M')
+            print(f"   {location:<25} {kind:<12} {when}  {entry['row_count']:>6} sor  "
+                  f"{entry['content_hash'][:12]}  {dataset_path}")
+
+
+if __name__ == "__main__":
+    main()
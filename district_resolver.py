@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+POLIGON ALAPÚ KERÜLET / VÁROSRÉSZ FELOLDÓ
+=========================================
+
+🎯 CÉL:
+Koordinátából determinisztikus kerület és városrész címke - API hívás és
+`formatted_address` regex találgatás nélkül. A helyi GeoJSON poligonok
+(kerületek, városrészek: Krisztinaváros, Svábhegy, budaörsi negyedek...)
+egy STR módszerrel csomagolt R-fába kerülnek, a pontok kötegben,
+vektorizáltan (numpy) kapják meg a címkéjüket.
+
+📋 HASZNÁLAT:
+    resolver = DistrictResolver.from_geojson('varosresz_poligonok.geojson')
+    resolver.resolve(47.4979, 19.0402)
+    # {'kerulet': 'XII. kerület', 'varosresz': 'Svábhegy', ...}
+    resolver.resolve_batch(df['geo_latitude'], df['geo_longitude'])   # DataFrame
+
+python district_resolver.py varosresz_poligonok.geojson --lookup 47.50 18.98
+
+⚡ GeoJSON feature properties:
+- `name` (kötelező): a poligon neve
+- `level`: telepules | kerulet | varosresz (vagy OSM admin_level: 8 / 9 / 10)
+- `kategoria`, `premium_szorzo` (opcionális): városrész kategória a
+  `varosresz_kategoria` / `varosresz_premium_szorzo` oszlopokhoz - ha megvan,
+  felülírja a kulcsszavas becslést
+- Átfedésnél szintenként a legkisebb területű poligon nyer
+
+💡 Poligon fájl(ok): DISTRICT_POLYGONS_PATH környezeti változó (több fájl os.pathsep-pel),
+   alapértelmezés: varosresz_poligonok.geojson
+"""
+
+import argparse
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_POLYGONS_PATH = 'varosresz_poligonok.geojson'
+LEVELS = ('telepules', 'kerulet', 'varosresz')
+_ADMIN_LEVELS = {'8': 'telepules', '9': 'kerulet', '10': 'varosresz'}
+
+# Ennyi pont × él felett darabolva számolunk (memória korlát)
+_PIP_CHUNK_CELLS = 4_000_000
+
+
+class PackedRTree:
+    """Statikus, STR (Sort-Tile-Recursive) módszerrel csomagolt R-fa bbox-okra
+
+    A pontlekérdezés kötegelt: szintenként numpy-val szűri a (pont, csomópont) párokat.
+    """
+
+    def __init__(self, boxes, node_capacity=16):
+        boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)  # minx, miny, maxx, maxy
+        self.capacity = node_capacity
+        self.items = self._str_order(boxes)
+        level_boxes = boxes[self.items]
+        self.levels = [level_boxes]  # levels[0] = levelek, levels[-1] = gyökér
+        while len(level_boxes) > 1:
+            groups = -(-len(level_boxes) // node_capacity)
+            padded = np.full((groups * node_capacity, 4), np.nan)
+            padded[:len(level_boxes)] = level_boxes
+            padded = padded.reshape(groups, node_capacity, 4)
+            level_boxes = np.column_stack([
+                np.nanmin(padded[:, :, 0], axis=1), np.nanmin(padded[:, :, 1], axis=1),
+                np.nanmax(padded[:, :, 2], axis=1), np.nanmax(padded[:, :, 3], axis=1)
+            ])
+            self.levels.append(level_boxes)
+
+    def _str_order(self, boxes):
+        """Elemek STR sorrendje: x szerinti szeletek, azon belül y szerint"""
+        count = len(boxes)
+        if count == 0:
+            return np.zeros(0, dtype=int)
+        centers_x = (boxes[:, 0] + boxes[:, 2]) / 2
+        centers_y = (boxes[:, 1] + boxes[:, 3]) / 2
+        leaves = -(-count // self.capacity)
+        slice_size = int(np.ceil(np.sqrt(leaves))) * self.capacity
+        by_x = np.argsort(centers_x, kind='stable')
+        order = []
+        for start in range(0, count, slice_size):
+            part = by_x[start:start + slice_size]
+            order.append(part[np.argsort(centers_y[part], kind='stable')])
+        return np.concatenate(order)
+
+    def query_points(self, xs, ys):
+        """Pontokat tartalmazó bbox-ok: (pont_index, elem_index) tömbök"""
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        if not len(self.items) or not len(xs):
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+
+        point_idx = np.arange(len(xs))
+        node_idx = np.zeros(len(xs), dtype=int)
+        for depth in range(len(self.levels) - 1, -1, -1):
+            boxes = self.levels[depth][node_idx]
+            inside = ((xs[point_idx] >= boxes[:, 0]) & (xs[point_idx] <= boxes[:, 2]) &
+                      (ys[point_idx] >= boxes[:, 1]) & (ys[point_idx] <= boxes[:, 3]))
+            point_idx, node_idx = point_idx[inside], node_idx[inside]
+            if depth == 0:
+                break
+            # Gyerekek kibontása: j. csomópont gyerekei [j*cap, (j+1)*cap)
+            child_count = len(self.levels[depth - 1])
+            point_idx = np.repeat(point_idx, self.capacity)
+            node_idx = (np.repeat(node_idx * self.capacity, self.capacity) +
+                        np.tile(np.arange(self.capacity), len(node_idx)))
+            valid = node_idx < child_count
+            point_idx, node_idx = point_idx[valid], node_idx[valid]
+
+        return point_idx, self.items[node_idx]
+
+
+def _polygon_rings(geometry):
+    """Polygon / MultiPolygon gyűrűi numpy tömbként (lng, lat)"""
+    geom_type = geometry.get('type')
+    coords = geometry.get('coordinates') or []
+    if geom_type == 'Polygon':
+        polygons = [coords]
+    elif geom_type == 'MultiPolygon':
+        polygons = coords
+    else:
+        return [], []
+    rings = [np.asarray(ring, dtype=float)[:, :2] for polygon in polygons for ring in polygon if len(ring) >= 3]
+    outers = [np.asarray(polygon[0], dtype=float)[:, :2] for polygon in polygons if polygon and len(polygon[0]) >= 3]
+    return rings, outers
+
+
+def _ring_area(ring):
+    """Gyűrű területe (shoelace, fok² - csak összehasonlításhoz)"""
+    x, y = ring[:, 0], ring[:, 1]
+    return abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2
+
+
+def _feature_level(props):
+    """Poligon szintje a properties alapján"""
+    level = props.get('level') or props.get('szint')
+    if level in LEVELS:
+        return level
+    admin_level = str(props.get('admin_level', '')).strip()
+    return _ADMIN_LEVELS.get(admin_level, 'varosresz')
+
+
+class DistrictResolver:
+    """Koordináta -> település / kerület / városrész poligonokból"""
+
+    def __init__(self, features):
+        self.features = []
+        edges = []
+        boxes = []
+        for feature in features:
+            props = feature.get('properties') or {}
+            name = props.get('name') or props.get('nev')
+            rings, outers = _polygon_rings(feature.get('geometry') or {})
+            if not name or not rings:
+                continue
+            # Élek: (x1, y1, x2, y2) - minden gyűrű zárva, páros-páratlan szabály a lyukakhoz is
+            ring_edges = [np.column_stack([ring, np.roll(ring, -1, axis=0)]) for ring in rings]
+            all_points = np.vstack(rings)
+            boxes.append([all_points[:, 0].min(), all_points[:, 1].min(),
+                          all_points[:, 0].max(), all_points[:, 1].max()])
+            edges.append(np.vstack(ring_edges))
+            premium = props.get('premium_szorzo')
+            self.features.append({
+                'name': str(name),
+                'level': _feature_level(props),
+                'area': sum(_ring_area(ring) for ring in outers),
+                'kategoria': props.get('kategoria'),
+                'premium_szorzo': float(premium) if premium not in (None, '') else None,
+            })
+        self._edges = edges
+        self._tree = PackedRTree(boxes)
+
+    @classmethod
+    def from_geojson(cls, *paths):
+        """Resolver GeoJSON FeatureCollection fájl(ok)ból"""
+        features = []
+        for path in paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            features.extend(data.get('features', []) if data.get('type') == 'FeatureCollection' else [data])
+        return cls(features)
+
+    def __len__(self):
+        return len(self.features)
+
+    def _contains(self, feature_idx, xs, ys):
+        """Páros-páratlan sugárkövetés: mely pontok vannak a poligonban (vektorizált)"""
+        edges = self._edges[feature_idx]
+        x1, y1, x2, y2 = edges[:, 0], edges[:, 1], edges[:, 2], edges[:, 3]
+        inside = np.zeros(len(xs), dtype=bool)
+        step = max(1, _PIP_CHUNK_CELLS // max(1, len(edges)))
+        for start in range(0, len(xs), step):
+            px = xs[start:start + step, None]
+            py = ys[start:start + step, None]
+            crosses = (y1 > py) != (y2 > py)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                x_at = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+            inside[start:start + step] = np.count_nonzero(crosses & (px < x_at), axis=1) % 2 == 1
+        return inside
+
+    def resolve_batch(self, lats, lngs):
+        """Kötegelt feloldás - DataFrame (telepules, kerulet, varosresz, varosresz_kategoria,
+        varosresz_premium_szorzo); ismeretlen érték: None / NaN"""
+        lats = pd.to_numeric(pd.Series(lats), errors='coerce').to_numpy(dtype=float)
+        lngs = pd.to_numeric(pd.Series(lngs), errors='coerce').to_numpy(dtype=float)
+        result = pd.DataFrame({level: pd.Series([None] * len(lats), dtype=object) for level in LEVELS})
+        result['varosresz_kategoria'] = pd.Series([None] * len(lats), dtype=object)
+        result['varosresz_premium_szorzo'] = np.nan
+
+        valid = np.flatnonzero(~(np.isnan(lats) | np.isnan(lngs)))
+        if not len(valid) or not self.features:
+            return result
+
+        xs, ys = lngs[valid], lats[valid]
+        point_idx, feature_idx = self._tree.query_points(xs, ys)
+
+        # Találatok poligononként, vektorizált pont-a-poligonban teszttel
+        hits_point, hits_feature = [], []
+        for feature in np.unique(feature_idx):
+            candidates = point_idx[feature_idx == feature]
+            inside = self._contains(feature, xs[candidates], ys[candidates])
+            hits_point.append(candidates[inside])
+            hits_feature.append(np.full(int(inside.sum()), feature))
+        if not hits_point:
+            return result
+
+        hits = pd.DataFrame({'point': np.concatenate(hits_point), 'feature': np.concatenate(hits_feature)})
+        meta = pd.DataFrame(self.features)
+        hits = hits.join(meta, on='feature')
+        # Szintenként a legkisebb területű poligon nyer
+        hits = hits.sort_values(['point', 'level', 'area']).drop_duplicates(['point', 'level'])
+
+        rows = valid[hits['point'].to_numpy()]
+        for level in LEVELS:
+            level_hits = hits['level'].to_numpy() == level
+            result.loc[rows[level_hits], level] = hits.loc[level_hits, 'name'].to_numpy()
+
+        # Kategória: a legkisebb poligon, amelyhez kategória tartozik
+        categorized = hits[hits['kategoria'].notna()].sort_values(['point', 'area']).drop_duplicates('point')
+        if not categorized.empty:
+            cat_rows = valid[categorized['point'].to_numpy()]
+            result.loc[cat_rows, 'varosresz_kategoria'] = categorized['kategoria'].to_numpy()
+            result.loc[cat_rows, 'varosresz_premium_szorzo'] = pd.to_numeric(
+                categorized['premium_szorzo'], errors='coerce').fillna(1.0).to_numpy(dtype=float)
+        return result
+
+    def resolve(self, lat, lng):
+        """Egy koordináta feloldása - {szint: név, ...} csak az ismert szintekkel"""
+        row = self.resolve_batch([lat], [lng]).iloc[0]
+        return {key: value for key, value in row.items() if value is not None and value == value}
+
+    def district_label(self, lat, lng):
+        """Legrészletesebb ismert címke (városrész > kerület > település) vagy None"""
+        resolved = self.resolve(lat, lng)
+        for level in ('varosresz', 'kerulet', 'telepules'):
+            if resolved.get(level):
+                return resolved[level]
+        return None
+
+
+@lru_cache(maxsize=4)
+def load_district_resolver(paths=None):
+    """Resolver betöltése processzenként egyszer - None ha nincs poligon fájl"""
+    paths = paths or os.environ.get('DISTRICT_POLYGONS_PATH', DEFAULT_POLYGONS_PATH)
+    existing = [p for p in paths.split(os.pathsep) if p and os.path.exists(p)]
+    if not existing:
+        return None
+    resolver = DistrictResolver.from_geojson(*existing)
+    return resolver if len(resolver) else None
+
+
+def main():
+    """Poligon fájl ellenőrzése / pont lekérdezés"""
+    parser = argparse.ArgumentParser(description="Poligon alapú kerület / városrész feloldás")
+    parser.add_argument('geojson', nargs='+', help="GeoJSON poligon fájl(ok)")
+    parser.add_argument('--lookup', nargs=2, type=float, action='append', default=[], metavar=('LAT', 'LNG'))
+    args = parser.parse_args()
+
+    resolver = DistrictResolver.from_geojson(*args.geojson)
+    by_level = pd.Series([f['level'] for f in resolver.features]).value_counts().to_dict()
+    print(f"🗺️  {len(resolver)} poligon betöltve: {by_level}")
+    for lat, lng in args.lookup:
+        print(f"📍 ({lat:.6f}, {lng:.6f}) -> {resolver.resolve(lat, lng) or 'nincs találat'}")
+
+
+if __name__ == "__main__":
+    main()
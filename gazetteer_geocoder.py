@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OFFLINE UTCA SZINTŰ GAZETTEER GEOCODER
+======================================
+
+🎯 HASZNÁLAT:
+python gazetteer_geocoder.py --osm budapest_cimek.geojson [--osm agglomeracio.geojson] [--from-listings "ingatlan_reszletes_*koordinatak*.csv"] [--from-history] [--output gazetteer_utcak.csv]
+
+📋 PÉLDA:
+python gazetteer_geocoder.py --osm budapest_addr.geojson --output gazetteer_utcak.csv
+python gazetteer_geocoder.py --from-listings "ingatlan_reszletes_*.csv"
+python gazetteer_geocoder.py --lookup "Budapest XI. kerület, Kenese utca 12."
+
+⚡ Működés:
+1. Egyszeri konverzió: OSM kivonat (GeoJSON, addr:city/addr:street/addr:housenumber
+   tagekkel - pl. osmium export vagy Overpass) -> pipe elválasztós gazetteer CSV
+   (telepules|kerulet|utca|hazszam|lat|lng). A már geocodolt listák koordinátái is
+   betölthetők utca szintű pontként.
+2. Memóriabeli index: (település, kerület) -> utcák; pontos kulcs találat dict-ből,
+   elírás/rövidítés esetén prefix fa (trie) + Levenshtein fuzzy keresés
+3. Házszám interpoláció: azonos paritású ismert házszámok között lineárisan,
+   házszám nélkül az utca középpontja
+4. `GazetteerGeocoder` - a geocoder_backends interfészét adja (GEOCODER_BACKEND=gazetteer),
+   és API kulcs nélkül automatikus fallback a GoogleMapsLocationAnalyzer-ben
+
+💡 Gazetteer helye: GAZETTEER_PATH környezeti változó, alapértelmezés: gazetteer_utcak.csv
+"""
+
+import argparse
+import bisect
+import csv
+import glob
+import json
+import os
+import re
+import sys
+import time
+from functools import lru_cache
+
+from address_normalizer import (district_from_postcode, fold_address as _fold, parse_district,
+                                parse_house_number, street_key, town_key)
+from geocoder_backends import GeocoderBackend
+
+DEFAULT_GAZETTEER_PATH = 'gazetteer_utcak.csv'
+GAZETTEER_COLUMNS = ['telepules', 'kerulet', 'utca', 'hazszam', 'lat', 'lng']
+
+_DISTRICT_SUFFIX_RE = re.compile(r'\s+[IVXL]+\.\s*kerület.*$', re.IGNORECASE)
+_IGNORED_PARTS = {'hungary', 'magyarorszag', 'hu'}
+# find_street eredmények (találat és hiány is) - egy utca minden házszáma egy trie keresés
+_STREET_CACHE_SIZE = 65536
+
+
+class StreetTrie:
+    """Prefix fa fuzzy utcanév kereséshez (Levenshtein DP soronként, közös prefixekkel)"""
+
+    __slots__ = ('children', 'word')
+
+    def __init__(self, words=()):
+        self.children = {}
+        self.word = None
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        node = self
+        for char in word:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = StreetTrie()
+            node = child
+        node.word = word
+
+    def search(self, word, max_dist):
+        """Legfeljebb max_dist szerkesztési távolságú szavak (távolság, szó) listája, növekvő sorrendben"""
+        found = []
+        first_row = list(range(len(word) + 1))
+        stack = [(char, child, first_row) for char, child in self.children.items()]
+        while stack:
+            char, node, previous = stack.pop()
+            current = [previous[0] + 1]
+            for j in range(1, len(word) + 1):
+                current.append(min(current[j - 1] + 1, previous[j] + 1, previous[j - 1] + (word[j - 1] != char)))
+            if node.word is not None and current[-1] <= max_dist:
+                found.append((current[-1], node.word))
+            # Ha a sor minimuma már nagyobb a küszöbnél, a részfa kiesik
+            if min(current) <= max_dist:
+                stack.extend((c, child, current) for c, child in node.children.items())
+        return sorted(found)
+
+
+class _Street:
+    """Egy utca ismert pontjai: házszámos pontok rendezve + középpont"""
+
+    __slots__ = ('name', 'numbered', 'lat_sum', 'lng_sum', 'count')
+
+    def __init__(self, name):
+        self.name = name
+        self.numbered = []  # (házszám, lat, lng) rendezve
+        self.lat_sum = 0.0
+        self.lng_sum = 0.0
+        self.count = 0
+
+    def add(self, number, lat, lng):
+        if number is not None:
+            bisect.insort(self.numbered, (number, lat, lng))
+        self.lat_sum += lat
+        self.lng_sum += lng
+        self.count += 1
+
+    @property
+    def centroid(self):
+        return self.lat_sum / self.count, self.lng_sum / self.count
+
+    def locate(self, number):
+        """Házszám pozíció: (lat, lng, location_type)"""
+        if number is None or not self.numbered:
+            return (*self.centroid, 'GEOMETRIC_CENTER')
+
+        # Azonos oldal (paritás) előnyben - a páros és páratlan oldal külön vonalon fekszik
+        same_side = [p for p in self.numbered if p[0] % 2 == number % 2]
+        points = same_side or self.numbered
+        numbers = [p[0] for p in points]
+        idx = bisect.bisect_left(numbers, number)
+
+        if idx < len(points) and numbers[idx] == number:
+            return points[idx][1], points[idx][2], 'ROOFTOP'
+        if 0 < idx < len(points):
+            (n0, lat0, lng0), (n1, lat1, lng1) = points[idx - 1], points[idx]
+            ratio = (number - n0) / (n1 - n0)
+            return lat0 + (lat1 - lat0) * ratio, lng0 + (lng1 - lng0) * ratio, 'RANGE_INTERPOLATED'
+        nearest = points[0] if idx == 0 else points[-1]
+        return nearest[1], nearest[2], 'APPROXIMATE'
+
+
+class Gazetteer:
+    """Memóriabeli utca index: (település, kerület) -> {utca kulcs: _Street}"""
+
+    def __init__(self):
+        self.towns = {}          # town_key -> megjelenítendő név
+        self._areas = {}         # (town_key, kerület|None) -> {street_key: _Street}
+        self._area_points = {}   # (town_key, kerület|None) -> [lat_sum, lng_sum, count]
+        self._trees = {}
+        self._street_cache = {}  # (town_key, kerület, street_key) -> (_Street|None, pontos_e)
+
+    def add(self, town, district, street, number, lat, lng):
+        """Egy gazetteer pont hozzáadása"""
+        t_key = town_key(town)
+        s_key = street_key(street)
+        if not t_key or not s_key:
+            return
+        self.towns.setdefault(t_key, str(town).strip())
+        for area in {(t_key, district), (t_key, None)}:
+            streets = self._areas.setdefault(area, {})
+            entry = streets.get(s_key)
+            if entry is None:
+                entry = streets[s_key] = _Street(str(street).strip())
+            entry.add(number, lat, lng)
+            sums = self._area_points.setdefault(area, [0.0, 0.0, 0])
+            sums[0] += lat
+            sums[1] += lng
+            sums[2] += 1
+            self._trees.pop(area, None)
+        self._street_cache.clear()
+
+    @classmethod
+    def load(cls, path):
+        """Gazetteer CSV betöltése"""
+        gazetteer = cls()
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f, delimiter='|'):
+                try:
+                    gazetteer.add(
+                        row['telepules'],
+                        int(row['kerulet']) if row.get('kerulet') else None,
+                        row['utca'],
+                        int(row['hazszam']) if row.get('hazszam') else None,
+                        float(row['lat']), float(row['lng'])
+                    )
+                except (KeyError, ValueError):
+                    continue
+        return gazetteer
+
+    def __len__(self):
+        return sum(len(streets) for (_, district), streets in self._areas.items() if district is None)
+
+    def _tree(self, area):
+        tree = self._trees.get(area)
+        if tree is None:
+            tree = self._trees[area] = StreetTrie(self._areas.get(area, {}))
+        return tree
+
+    def find_street(self, t_key, district, s_key):
+        """Utca keresése: pontos kulcs, majd trie alapú fuzzy - (_Street, pontos_e) vagy (None, False)
+
+        Memoizált (a sikertelen keresés is): egy utca minden házszáma egyetlen trie keresésen osztozik.
+        """
+        key = (t_key, district, s_key)
+        result = self._street_cache.get(key)
+        if result is None:
+            if len(self._street_cache) >= _STREET_CACHE_SIZE:
+                self._street_cache.clear()
+            result = self._street_cache[key] = self._find_street(t_key, district, s_key)
+        return result
+
+    def _find_street(self, t_key, district, s_key):
+        areas = [(t_key, district), (t_key, None)] if district is not None else [(t_key, None)]
+        for area in areas:
+            streets = self._areas.get(area)
+            if streets and s_key in streets:
+                return streets[s_key], True
+
+        # Először 1 hiba, majd hosszabb neveknél 2 - a szűkebb keresés nagyságrenddel gyorsabb.
+        # A 2 hibás kör csak a legszűkebb területen fut: ha a település szintű 1 hibás keresés
+        # sem talált, a teljes településen 2 hibával keresni lassú és megbízhatatlan is
+        for max_dist in ((1, 2) if len(s_key) > 8 else (1,)):
+            for area in (areas if max_dist == 1 else areas[:1]):
+                matches = self._tree(area).search(s_key, max_dist)
+                if matches:
+                    return self._areas[area][matches[0][1]], False
+        return None, False
+
+    def area_centroid(self, t_key, district):
+        """Település / kerület középpontja (ismert pontok átlaga)"""
+        sums = self._area_points.get((t_key, district)) or self._area_points.get((t_key, None))
+        if not sums:
+            return None
+        return sums[0] / sums[2], sums[1] / sums[2]
+
+    def parse_address(self, address):
+        """Cím -> (town_key, kerület, utca szöveg, házszám)"""
+        parts = [p.strip() for p in str(address or '').split(',') if p.strip()]
+        parts = [p for p in parts if _fold(p) not in _IGNORED_PARTS]
+
+        district = None
+        t_key = None
+        street_parts = []
+        for part in parts:
+            part_district = parse_district(part)
+            if part_district is not None and district is None:
+                district = part_district
+            part_town = town_key(part)
+            if t_key is None and part_town in self.towns:
+                t_key = part_town
+                continue
+            if part_town in self.towns or (part_district is not None and not part_town):
+                continue
+            street_parts.append(part)
+
+        if t_key is None and district is not None:
+            t_key = 'budapest'
+
+        street_text, number = parse_house_number(street_parts[0]) if street_parts else ('', None)
+        return t_key, district, street_text, number
+
+    def geocode(self, address):
+        """Egy cím geocodolása - Google-kompatibilis találat vagy None"""
+        t_key, district, street_text, number = self.parse_address(address)
+        if t_key is None:
+            return None
+
+        town_name = self.towns.get(t_key, t_key.title())
+        if district is not None:
+            town_name = f"Budapest {district}. kerület" if t_key == 'budapest' else town_name
+
+        street, exact = self.find_street(t_key, district, street_key(street_text)) if street_text else (None, False)
+        if street is None:
+            centroid = self.area_centroid(t_key, district)
+            if centroid is None:
+                return None
+            return _make_result(centroid[0], centroid[1], town_name, town_name, None, None,
+                                'APPROXIMATE', partial=True)
+
+        lat, lng, location_type = street.locate(number)
+        label = f"{street.name} {number}" if number is not None else street.name
+        return _make_result(lat, lng, f"{label}, {town_name}", town_name, street.name, number,
+                            location_type, partial=not exact)
+
+
+def _make_result(lat, lng, formatted_address, town_name, street_name, number, location_type, partial):
+    """Google Geocoding API formátumú találat összeállítása"""
+    components = []
+    if number is not None:
+        components.append({'long_name': str(number), 'short_name': str(number), 'types': ['street_number']})
+    if street_name:
+        components.append({'long_name': street_name, 'short_name': street_name, 'types': ['route']})
+    components.append({'long_name': town_name, 'short_name': town_name, 'types': ['locality', 'political']})
+    components.append({'long_name': 'Hungary', 'short_name': 'HU', 'types': ['country', 'political']})
+    result = {
+        'geometry': {'location': {'lat': round(lat, 7), 'lng': round(lng, 7)}, 'location_type': location_type},
+        'formatted_address': f"{formatted_address}, Hungary",
+        'address_components': components,
+        'source': 'gazetteer'
+    }
+    if partial:
+        result['partial_match'] = True
+    return result
+
+
+@lru_cache(maxsize=4)
+def load_gazetteer(path=None):
+    """Gazetteer betöltése processzenként egyszer - None ha a fájl nem létezik"""
+    path = path or os.environ.get('GAZETTEER_PATH', DEFAULT_GAZETTEER_PATH)
+    if not os.path.exists(path):
+        return None
+    return Gazetteer.load(path)
+
+
+class GazetteerGeocoder(GeocoderBackend):
+    """Offline geocoder backend a helyi gazetteer alapján (hálózat és API kulcs nélkül)"""
+
+    name = 'gazetteer'
+    # Gyors és determinisztikus - nem kerül a perzisztens (Google) cache-be
+    cacheable = False
+    local = True
+
+    def __init__(self, path=None, gazetteer=None):
+        self.gazetteer = gazetteer or load_gazetteer(path)
+        if self.gazetteer is None:
+            raise FileNotFoundError(f"Gazetteer fájl nem található: {path or os.environ.get('GAZETTEER_PATH', DEFAULT_GAZETTEER_PATH)}")
+        self._geocode_cached = lru_cache(maxsize=65536)(self.gazetteer.geocode)
+
+    def geocode(self, address):
+        result = self._geocode_cached(str(address))
+        return [result] if result else []
+
+
+# ---------------------------------------------------------------------------
+# Gazetteer építés (egyszeri konverzió)
+# ---------------------------------------------------------------------------
+
+def _feature_point(geometry):
+    """GeoJSON geometria reprezentatív pontja (pont vagy koordináták átlaga)"""
+    if not geometry:
+        return None
+    coords = geometry.get('coordinates')
+    if geometry.get('type') == 'Point':
+        return coords[1], coords[0]
+
+    flat = []
+
+    def collect(item):
+        if item and isinstance(item[0], (int, float)):
+            flat.append(item)
+        else:
+            for sub in item or []:
+                collect(sub)
+    collect(coords)
+    if not flat:
+        return None
+    return sum(c[1] for c in flat) / len(flat), sum(c[0] for c in flat) / len(flat)
+
+
+def _district_from_postcode(town, postcode):
+    """Budapesti irányítószám -> kerület (1118 -> 11)"""
+    return district_from_postcode(postcode) if town_key(town) == 'budapest' else None
+
+
+def rows_from_osm_geojson(path, default_town=None):
+    """OSM GeoJSON kivonat -> gazetteer sorok (címpontok + elnevezett utak)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    for feature in data.get('features', []):
+        props = feature.get('properties') or {}
+        tags = props.get('tags', props)
+        point = _feature_point(feature.get('geometry'))
+        if point is None:
+            continue
+
+        street = tags.get('addr:street')
+        town = tags.get('addr:city') or default_town
+        if street and town:
+            _, number = parse_house_number(f"x {tags.get('addr:housenumber', '')}")
+            yield {
+                'telepules': town,
+                'kerulet': _district_from_postcode(town, tags.get('addr:postcode')),
+                'utca': street,
+                'hazszam': number,
+                'lat': point[0], 'lng': point[1]
+            }
+        elif tags.get('highway') and tags.get('name') and default_town:
+            # Út geometria címpont nélkül - utca szintű pont
+            yield {'telepules': default_town, 'kerulet': None, 'utca': tags['name'],
+                   'hazszam': None, 'lat': point[0], 'lng': point[1]}
+
+
+def rows_from_frame(df):
+    """Geocodolt hirdetések (cim + geo_latitude/geo_longitude) -> gazetteer sorok"""
+    if not {'cim', 'geo_latitude', 'geo_longitude'}.issubset(df.columns):
+        return
+    df = df.dropna(subset=['cim', 'geo_latitude', 'geo_longitude'])
+    for cim, lat, lng in zip(df['cim'], df['geo_latitude'], df['geo_longitude']):
+        parts = [p.strip() for p in str(cim).split(',')]
+        if len(parts) < 2:
+            continue
+        street_text, number = parse_house_number(parts[1])
+        # Városrész nevek (pl. 'Svábhegy') nem utcák - csak utcatípusos nevek kellenek
+        if not re.search(r'\b(utca|ut|ter|koz|korut|sor|lejto|lepcso|setany|fasor|dulo|liget|park|sugarut)\b',
+                         street_key(street_text)):
+            continue
+        yield {
+            'telepules': _DISTRICT_SUFFIX_RE.sub('', parts[0]).strip(),
+            'kerulet': parse_district(parts[0]),
+            'utca': street_text,
+            'hazszam': number,
+            'lat': float(lat), 'lng': float(lng)
+        }
+
+
+def rows_from_listings(patterns):
+    """Már geocodolt részletes CSV-k -> gazetteer sorok"""
+    import pandas as pd
+
+    for pattern in patterns:
+        for csv_file in sorted(glob.glob(pattern)):
+            yield from rows_from_frame(pd.read_csv(csv_file, sep='|', encoding='utf-8-sig', on_bad_lines='skip'))
+
+
+def rows_from_history(db_path=None):
+    """Hirdetés történet adatbázis (minden hirdetés, koordináta tárral kiegészítve) -> gazetteer sorok"""
+    from coordinate_store import attach_coordinates
+    from listing_history import load_latest_listings
+
+    df = load_latest_listings(db_path=db_path, include_inactive=True)
+    if df is not None:
+        yield from rows_from_frame(attach_coordinates(df))
+
+
+def write_gazetteer(rows, path):
+    """Gazetteer sorok mentése pipe elválasztós CSV-be"""
+    count = 0
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=GAZETTEER_COLUMNS, delimiter='|')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({k: ('' if row.get(k) is None else row.get(k)) for k in GAZETTEER_COLUMNS})
+            count += 1
+    return count
+
+
+def main():
+    """Gazetteer építés / keresés CLI"""
+    parser = argparse.ArgumentParser(description="Offline gazetteer geocoder - építés és keresés")
+    parser.add_argument('--osm', action='append', default=[], help="OSM GeoJSON kivonat (többször megadható)")
+    parser.add_argument('--town', default=None, help="Alapértelmezett település az OSM utakhoz (addr:city nélkül)")
+    parser.add_argument('--from-listings', action='append', default=[], help="Geocodolt részletes CSV glob minta")
+    parser.add_argument('--from-history', action='store_true',
+                        help="Hirdetés történet adatbázisból (LISTING_HISTORY_PATH) - CSV glob helyett")
+    parser.add_argument('--output', default=os.environ.get('GAZETTEER_PATH', DEFAULT_GAZETTEER_PATH))
+    parser.add_argument('--lookup', action='append', default=[], help="Cím keresése a meglévő gazetteerben")
+    args = parser.parse_args()
+
+    if args.osm or args.from_listings or args.from_history:
+        def all_rows():
+            for path in args.osm:
+                yield from rows_from_osm_geojson(path, args.town)
+            yield from rows_from_listings(args.from_listings)
+            if args.from_history:
+                yield from rows_from_history()
+
+        count = write_gazetteer(all_rows(), args.output)
+        print(f"✅ Gazetteer mentve: {args.output} ({count} pont)")
+        load_gazetteer.cache_clear()
+
+    if args.lookup:
+        start = time.time()
+        gazetteer = load_gazetteer(args.output)
+        if gazetteer is None:
+            print(f"❌ Gazetteer fájl nem található: {args.output}")
+            sys.exit(1)
+        print(f"📚 Gazetteer betöltve: {len(gazetteer)} utca ({time.time() - start:.2f}s)")
+        for address in args.lookup:
+            result = gazetteer.geocode(address)
+            if result:
+                location = result['geometry']['location']
+                print(f"📍 {address} -> ({location['lat']:.6f}, {location['lng']:.6f}) "
+                      f"{result['formatted_address']} [{result['geometry']['location_type']}]")
+            else:
+                print(f"❌ {address} -> nincs találat")
+
+    if not (args.osm or args.from_listings or args.lookup):
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
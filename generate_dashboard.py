@@ -23,49 +23,49 @@ import re
 import glob
 from datetime import datetime
 
+# Lokáció kulcs -> megjelenített név (a kulcs a dashboard / manifest / történet azonosító)
+LOCATION_NAMES = {
+    # Kerületek
+    'xi_ker': 'XI. KERÜLET',
+    'xii_ker': 'XII. KERÜLET',
+    'xxii_ker': 'XXII. KERÜLET',
+
+    # Összetett nevek
+    'torokbalint_tukorhegy': 'TÖRÖKBÁLINT-TÜKÖRHEGY',
+    'budaors': 'BUDAÖRS',
+    'kobanya_hegyi_lakotelep': 'KŐBÁNYA HEGYI LAKÓTELEP',
+    'orszagut_vizivaros_ii_krisztinavaros_xii': 'ORSZÁGÚT-VÍZIVÁROS II.-KRISZTINAVÁROS XII.',
+    'erd_erdliget_diosd': 'ÉRD-ÉRDLIGET-DIÓSD',
+}
+
+# Régi / kézzel elnevezett fájlok kulcsa -> kanonikus kulcs
+LOCATION_ALIASES = {
+    'xii_kerület': 'xii_ker',
+    'uerd_erdliget_diosd': 'erd_erdliget_diosd',  # Javított verzió a bug miatt
+}
+
+_CSV_PREFIX_RE = re.compile(r'^ingatlan_(?:reszletes|lista)_')
+# Futás időbélyegek és koordináta jelölők a név végén (pl. _20250822_093251_koordinatak_20250823_183550)
+_CSV_SUFFIX_RE = re.compile(r'(?:_koordinatak|_\d{8}_\d{6})+$')
+
+
+def location_key(csv_filename):
+    """Lokáció kulcs a fájlnévből - előtag, időbélyegek, koordináta jelölő nélkül, pontos egyezéssel"""
+    base_name = os.path.splitext(os.path.basename(csv_filename))[0]
+    base_name = _CSV_SUFFIX_RE.sub('', _CSV_PREFIX_RE.sub('', base_name)).lower()
+    return LOCATION_ALIASES.get(base_name, base_name)
+
+
 def extract_location_from_csv_name(csv_filename):
     """Lokáció név kinyerése CSV fájlnévből és dashboard-kompatibilis név generálása"""
     try:
-        # Eltávolítjuk a .csv kiterjesztést és az "ingatlan_reszletes_" előtagot
-        base_name = csv_filename.replace('.csv', '').replace('ingatlan_reszletes_', '')
-        
-        # Dátum részek eltávolítása (pl. _20250823_135915)
-        # Pattern: _YYYYMMDD_HHMMSS formátum keresése és eltávolítása
-        base_name = re.sub(r'_\d{8}_\d{6}$', '', base_name)
-        
-        # Koordináta jelölők eltávolítása (pl. _koordinatak_20250822_221556)
-        base_name = re.sub(r'_koordinatak_\d{8}_\d{6}$', '', base_name)
-        
-        print(f"🔍 Feldolgozott base_name: {base_name}")
-        
-        # Speciális lokáció nevek felismerése és konverziója
-        location_mapping = {
-            # Kerületek
-            'xi_ker': 'XI. KERÜLET',
-            'xii_ker': 'XII. KERÜLET', 
-            'xxii_ker': 'XXII. KERÜLET',
-            
-            # Összetett nevek
-            'torokbalint_tukorhegy': 'TÖRÖKBÁLINT-TÜKÖRHEGY',
-            'budaors': 'BUDAÖRS',
-            'kobanya_hegyi_lakotelep': 'KŐBÁNYA HEGYI LAKÓTELEP',
-            'orszagut_vizivaros_ii_krisztinavaros_xii': 'ORSZÁGÚT-VÍZIVÁROS II.-KRISZTINAVÁROS XII.',
-            'erd_erdliget_diosd': 'ÉRD-ÉRDLIGET-DIÓSD',
-            'uerd_erdliget_diosd': 'ÉRD-ÉRDLIGET-DIÓSD',  # Javított verzió a bug miatt
-        }
-        
-        # Keressük meg a megfelelő lokációt
-        for key, display_name in location_mapping.items():
-            if key in base_name or base_name == key:
-                return display_name, key
-        
-        # Ha nincs előre definiált mapping, akkor generáljuk
-        # Alulvonások cseréje szóközökre és nagybetűsítés
-        display_name = base_name.replace('_', ' ').upper()
-        dashboard_key = base_name
-        
+        dashboard_key = location_key(csv_filename)
+        print(f"🔍 Feldolgozott base_name: {dashboard_key}")
+
+        # Ha nincs előre definiált név, akkor generáljuk: alulvonások helyett szóköz, nagybetűsítés
+        display_name = LOCATION_NAMES.get(dashboard_key, dashboard_key.replace('_', ' ').upper())
         return display_name, dashboard_key
-        
+
     except Exception as e:
         print(f"❌ Location extraction hiba: {e}")
         return "ISMERETLEN LOKÁCIÓ", "ismeretlen"
@@ -116,6 +116,7 @@ def create_dashboard_file(location_display, dashboard_key, csv_patterns, csv_fil
         
         # Placeholder-ek cseréje
         dashboard_content = template_content.replace('{{LOCATION_NAME}}', location_display)
+        dashboard_content = dashboard_content.replace('{{LOCATION_KEY}}', dashboard_key)
         
         # CSV pattern-ek behelyettesítése (max 3 pattern)
         for i, pattern in enumerate(csv_patterns[:3], 1):
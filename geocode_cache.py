@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PERZISZTENS GEOCODING CACHE (SQLite)
+====================================
+
+🎯 CÉL:
+Ugyanazt a címet ne geocodoljuk újra minden futásnál és minden átfedő
+lokációnál. Az add_coordinates.py és a GoogleMapsLocationAnalyzer is ezen
+a cache-en keresztül hívja a Google Maps API-t.
+
+📋 HASZNÁLAT:
+    cache = GeocodeCache()
+    result = cache.get_or_fetch("Budaörs, Ady Endre utca, Hungary", gmaps.geocode)
+    # result: Google-kompatibilis dict (geometry/location, formatted_address,
+    #         address_components) vagy None ha nincs találat
+
+⚡ Jellemzők:
+- Kulcs: kanonikus cím kulcs (address_normalizer - ékezet, rövidítés, kerület, házszám független)
+- Tárolt adat: lat/lng, formatted_address, nyers address_components (JSON)
+- TTL: pozitív találatok `ttl_days`, "nincs találat" (negatív cache) `negative_ttl_days`
+- API hiba (exception) NEM kerül a cache-be - következő futás újrapróbálja
+- Szálbiztos (WAL mód + zár), párhuzamos geocodinghoz is használható
+
+💡 Adatbázis helye: GEOCODE_CACHE_PATH környezeti változó, alapértelmezés: geocode_cache.sqlite
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from address_normalizer import address_key
+
+DEFAULT_CACHE_PATH = 'geocode_cache.sqlite'
+DEFAULT_TTL_DAYS = 365
+DEFAULT_NEGATIVE_TTL_DAYS = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocode_cache (
+    address_key TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    found INTEGER NOT NULL,
+    lat REAL,
+    lng REAL,
+    formatted_address TEXT,
+    components TEXT,
+    fetched_at REAL NOT NULL
+)
+"""
+
+
+def normalize_address_key(address):
+    """Cím kulcs normalizálása cache kereséshez (közös kanonikus cím kulcs)"""
+    return address_key(address)
+
+
+class GeocodeCache:
+    """SQLite alapú geocoding cache TTL-lel és negatív cache-eléssel"""
+
+    def __init__(self, db_path=None, ttl_days=DEFAULT_TTL_DAYS, negative_ttl_days=DEFAULT_NEGATIVE_TTL_DAYS):
+        self.db_path = db_path or os.environ.get('GEOCODE_CACHE_PATH', DEFAULT_CACHE_PATH)
+        self.ttl_seconds = ttl_days * 86400
+        self.negative_ttl_seconds = negative_ttl_days * 86400
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+        # Statisztika - hány kérés ment ki ténylegesen az API felé
+        self.hits = 0
+        self.misses = 0
+        self.api_calls = 0
+
+    def get(self, address):
+        """Cache keresés: (talált_e, eredmény) - eredmény None negatív találatnál"""
+        key = normalize_address_key(address)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT found, lat, lng, formatted_address, components, fetched_at '
+                'FROM geocode_cache WHERE address_key = ?', (key,)
+            ).fetchone()
+
+        if row is None:
+            return False, None
+
+        found, lat, lng, formatted_address, components, fetched_at = row
+        ttl = self.ttl_seconds if found else self.negative_ttl_seconds
+        if time.time() - fetched_at > ttl:
+            return False, None  # Lejárt bejegyzés
+
+        if not found:
+            return True, None
+
+        return True, {
+            'geometry': {'location': {'lat': lat, 'lng': lng}},
+            'formatted_address': formatted_address,
+            'address_components': json.loads(components) if components else [],
+            'cached': True
+        }
+
+    def put(self, address, result):
+        """Eredmény mentése - result=None negatív (nincs találat) bejegyzés"""
+        key = normalize_address_key(address)
+        if result:
+            location = result['geometry']['location']
+            values = (key, str(address), 1, location['lat'], location['lng'],
+                      result.get('formatted_address', ''),
+                      json.dumps(result.get('address_components', []), ensure_ascii=False),
+                      time.time())
+        else:
+            values = (key, str(address), 0, None, None, None, None, time.time())
+
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO geocode_cache '
+                '(address_key, query, found, lat, lng, formatted_address, components, fetched_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', values
+            )
+            self._conn.commit()
+
+    def get_or_fetch(self, address, fetch_func):
+        """Cache-elt geocoding: találat esetén nincs API hívás
+
+        `fetch_func(address)` a googlemaps.Client.geocode-hoz hasonlóan
+        találati listát ad vissza. Kivételt továbbdob és nem cache-el.
+        """
+        hit, result = self.get(address)
+        if hit:
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        if fetch_func is None:
+            return None  # Csak cache mód
+
+        self.api_calls += 1
+        results = fetch_func(address)
+        result = results[0] if results else None
+        self.put(address, result)
+        return result
+
+    def stats(self):
+        """Cache statisztika"""
+        return {'hits': self.hits, 'misses': self.misses, 'api_calls': self.api_calls}
+
+    def close(self):
+        """Adatbázis kapcsolat bezárása"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PÁRHUZAMOS, RATE-LIMITÁLT GEOCODING MOTOR
+=========================================
+
+🎯 CÉL:
+A soros `gmaps.geocode` + `time.sleep(0.05)` helyett a kérések párhuzamosan
+futnak (ThreadPoolExecutor), a beállított QPS-t token-bucket limiter tartja,
+így a teljes futásidő a rate-limit alsó korlátjához közelít
+(1000 cím @ 50 QPS ≈ 20 s), nem N × HTTP körülfordulási idő.
+
+⚡ Működés:
+1. Deduplikálás: azonos normalizált cím csak EGYSZER megy ki
+2. Cache: a GeocodeCache találatai rate-limit nélkül, azonnal visszajönnek
+3. Párhuzamos kérések token-bucket limiterrel (`qps`, `burst`)
+4. OVER_QUERY_LIMIT esetén exponenciális backoff + jitter, `max_retries`-ig
+
+📋 BENCHMARK (helyi, hálózat nélküli fake geocoderrel - lásd geocoder_backends.py):
+python geocoding_engine.py --bench 1000 --qps 50 --latency 0.2
+python geocoding_engine.py --backend fake-http --over-limit-rate 0.05 --error-rate 0.01
+"""
+
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from geocode_cache import GeocodeCache, normalize_address_key
+from geocoder_backends import GEOCODER_KINDS, create_geocoder
+
+DEFAULT_QPS = 45          # Google Maps Geocoding limit: 50 QPS - kis tartalékkal
+DEFAULT_WORKERS = 16
+DEFAULT_MAX_RETRIES = 5
+LOCAL_QPS = 1e6           # Helyi (hálózat nélküli) backendekhez - gyakorlatilag nincs limit
+
+
+class TokenBucket:
+    """Szálbiztos token-bucket rate limiter"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1.0, rate / 10))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blokkol, amíg egy token elérhető nem lesz"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def is_over_query_limit(error):
+    """Google OVER_QUERY_LIMIT hiba felismerése (googlemaps import nélkül)"""
+    if type(error).__name__ in ('_OverQueryLimit', 'OverQueryLimit'):
+        return True
+    return getattr(error, 'status', None) == 'OVER_QUERY_LIMIT' or 'OVER_QUERY_LIMIT' in str(error)
+
+
+class ConcurrentGeocoder:
+    """Címlisták párhuzamos geocodolása dedup + cache + rate limit + retry mellett"""
+
+    def __init__(self, fetch_func, cache=None, qps=DEFAULT_QPS, workers=DEFAULT_WORKERS,
+                 max_retries=DEFAULT_MAX_RETRIES, burst=None):
+        self.fetch_func = fetch_func
+        self.cache = cache
+        self.limiter = TokenBucket(qps, burst)
+        self.workers = workers
+        self.max_retries = max_retries
+
+        self.api_calls = 0
+        self.retries = 0
+        self._stats_lock = threading.Lock()
+
+    def _fetch_with_retry(self, address):
+        """Egy cím lekérése rate limittel, OVER_QUERY_LIMIT esetén backoff + jitter"""
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            with self._stats_lock:
+                self.api_calls += 1
+            try:
+                return self.fetch_func(address)
+            except Exception as e:
+                if not is_over_query_limit(e) or attempt >= self.max_retries:
+                    raise
+                with self._stats_lock:
+                    self.retries += 1
+                backoff = min(30.0, 0.5 * (2 ** attempt))
+                time.sleep(backoff * random.uniform(0.5, 1.5))
+
+    def _geocode_one(self, address):
+        """Egy egyedi cím: cache -> API; kivételt eredményként adja vissza"""
+        try:
+            if self.cache is not None:
+                return self.cache.get_or_fetch(address, self._fetch_with_retry)
+            if self.fetch_func is None:
+                return None  # Csak cache mód, cache nélkül
+            results = self._fetch_with_retry(address)
+            return results[0] if results else None
+        except Exception as e:
+            return e
+
+    def geocode_many(self, addresses, progress=None):
+        """Címlista geocodolása - {cím: eredmény | None | Exception}
+
+        Azonos normalizált kulcsú címek csak egyszer kerülnek lekérésre.
+        `progress(kész, összes)` opcionális visszahívás.
+        """
+        unique = {}
+        for address in addresses:
+            unique.setdefault(normalize_address_key(address), address)
+
+        # Cache találatok azonnal - ezekhez nem kell szál és token
+        by_key = {}
+        pending = []
+        for key, address in unique.items():
+            if self.cache is not None:
+                hit, result = self.cache.get(address)
+                if hit:
+                    self.cache.hits += 1
+                    by_key[key] = result
+                    continue
+            pending.append((key, address))
+
+        done = len(by_key)
+        total = len(unique)
+        if progress:
+            progress(done, total)
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = {key: executor.submit(self._geocode_one, address) for key, address in pending}
+                for key, future in futures.items():
+                    by_key[key] = future.result()
+                    done += 1
+                    if progress and (done % 25 == 0 or done == total):
+                        progress(done, total)
+
+        return {address: by_key[normalize_address_key(address)] for address in addresses}
+
+    def stats(self):
+        """Motor statisztika"""
+        return {'api_calls': self.api_calls, 'retries': self.retries}
+
+
+def main():
+    """Benchmark: N cím geocodolása helyi fake geocoderrel"""
+    parser = argparse.ArgumentParser(description="Geocoding motor benchmark (helyi fake geocoder)")
+    parser.add_argument('--bench', type=int, default=1000, help="Címek száma")
+    parser.add_argument('--backend', choices=[k for k in GEOCODER_KINDS if k.startswith('fake')], default='fake')
+    parser.add_argument('--qps', type=float, default=DEFAULT_QPS)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--latency', type=float, default=0.2, help="Fake kérés késleltetés (s)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Véletlen UNKNOWN_ERROR arány")
+    parser.add_argument('--over-limit-rate', type=float, default=0.0, help="Véletlen OVER_QUERY_LIMIT arány")
+    parser.add_argument('--duplicates', type=float, default=0.2, help="Duplikált címek aránya")
+    parser.add_argument('--cache', default=None, help="GeocodeCache SQLite fájl (alapértelmezés: nincs cache)")
+    args = parser.parse_args()
+
+    unique_count = max(1, int(args.bench * (1 - args.duplicates)))
+    addresses = [f"Teszt utca {i % unique_count}, Budapest" for i in range(args.bench)]
+
+    geocoder = create_geocoder(args.backend, latency=args.latency, error_rate=args.error_rate,
+                               over_limit_rate=args.over_limit_rate, seed=42)
+    cache = GeocodeCache(args.cache) if args.cache else None
+    engine = ConcurrentGeocoder(geocoder.fetch_func, cache=cache, qps=args.qps, workers=args.workers)
+    start = time.time()
+    results = engine.geocode_many(addresses)
+    elapsed = time.time() - start
+    if args.backend == 'fake-http':
+        geocoder.server.stop()
+
+    errors = sum(1 for r in results.values() if isinstance(r, Exception))
+    floor = unique_count / args.qps
+    print(f"📊 [{args.backend}] {args.bench} cím ({unique_count} egyedi) | {elapsed:.2f}s | rate-limit alsó korlát: {floor:.2f}s")
+    print(f"   Soros becslés (latency + 0.05s sleep): {unique_count * (args.latency + 0.05):.1f}s")
+    stats = engine.stats()
+    print(f"   API hívások: {stats['api_calls']} | újrapróba: {stats['retries']} | hibás cím: {errors}")
+    if cache is not None:
+        print(f"   🗄️  Cache találat: {cache.stats()['hits']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,7 @@ from dotenv import load_dotenv
 load_dotenv()
 import sys
 import random
+import time
 from datetime import datetime
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 import pandas as pd
@@ -26,50 +27,107 @@ import numpy as np
 import subprocess
 from collections import Counter, defaultdict
 from playwright.async_api import async_playwright
+from concurrent.futures import ProcessPoolExecutor
+from text_normalizer import normalize_text, combine_normalized, keyword_pattern
+from address_normalizer import address_keys, address_text
+from dataset_io import RecordJournal, atomic_write_csv, journal_path, write_columnar
+from listing_parsers import add_parsed_columns, area_m2_value, price_huf_value
+from dataset_manifest import register_dataset
+from geocode_cache import GeocodeCache
+from coordinate_store import CoordinateStore
+from content_archive import KIND_HTML, ContentArchive, archive_columns
+from listing_history import ListingHistory
+from geocoder_backends import GOOGLE_MAPS_AVAILABLE, GoogleGeocoder, create_geocoder
+from gazetteer_geocoder import GazetteerGeocoder, load_gazetteer
+from district_resolver import load_district_resolver
+from school_catchment import apply_school_catchments
+from poi_features import apply_poi_features
+from price_hexbin import refresh_price_surface
+from geocoding_engine import ConcurrentGeocoder, DEFAULT_QPS, DEFAULT_WORKERS
 
 # ENHANCED LOKÁCIÓ MEGHATÁROZÁS - GOOGLE MAPS + SZEMANTIKUS ELEMZÉS
-try:
-    import googlemaps
-    from geopy.distance import geodesic
-    GOOGLE_MAPS_AVAILABLE = True
-except ImportError:
-    print("⚠️ Google Maps és geopy csomagok nem elérhetők. pip install googlemaps geopy")
-    GOOGLE_MAPS_AVAILABLE = False
+# googlemaps kliens: geocoder_backends.GoogleGeocoder (ott van az import guard)
+if not GOOGLE_MAPS_AVAILABLE:
+    print("⚠️ Google Maps csomag nem elérhető. pip install googlemaps")
 
 # ==== ENHANCED LOKÁCIÓ MEGHATÁROZÁSI RENDSZER ====
 
 class GoogleMapsLocationAnalyzer:
     """Egyszerűsített Google Maps geocoding - dinamikus városrész felismeréssel"""
     
-    def __init__(self, api_key=None):
-        self.gmaps = None
+    def __init__(self, api_key=None, cache=None, geocoder=None):
+        self.geocoder = geocoder
         self.available = False
-        if api_key and GOOGLE_MAPS_AVAILABLE:
+        # Perzisztens geocoding cache - API kulcs nélkül is kiszolgálja a korábbi találatokat
+        self.cache = cache
+        if self.cache is None:
             try:
-                self.gmaps = googlemaps.Client(key=api_key)
-                self.available = True
+                self.cache = GeocodeCache()
+            except Exception as e:
+                print(f"⚠️ Geocoding cache nem elérhető: {e}")
+        
+        # Geocoder backend: explicit > GEOCODER_BACKEND env (pl. fake) > Google API kulccsal
+        backend = os.environ.get('GEOCODER_BACKEND', 'google').lower()
+        if self.geocoder is None and backend != 'google':
+            try:
+                self.geocoder = create_geocoder(backend, cache=self.cache)
+            except Exception as e:
+                print(f"⚠️ Geocoder backend hiba ({backend}): {e}")
+        elif self.geocoder is None and api_key and GOOGLE_MAPS_AVAILABLE:
+            try:
+                self.geocoder = GoogleGeocoder(api_key)
                 print("✅ Google Maps API inicializálva")
             except Exception as e:
                 print(f"⚠️ Google Maps API hiba: {e}")
+        
+        # API kulcs nélkül: offline gazetteer, ha van helyi gazetteer fájl
+        if self.geocoder is None and load_gazetteer() is not None:
+            self.geocoder = GazetteerGeocoder()
+        self.available = self.geocoder is not None and self.geocoder.fetches
+    
+    @staticmethod
+    def geocode_query(address):
+        """Geocoding lekérdezés szöveg - Budapest hozzáadása ha nincs benne"""
+        if 'budapest' not in address.lower():
+            address += ', Budapest, Hungary'
+        return address
+    
+    @property
+    def can_prefetch(self):
+        """Érdemes-e előre, háttérben geocodolni (API backend + perzisztens cache)"""
+        return self.available and self.cache is not None and self.geocoder.cacheable
+    
+    def prefetch(self, addresses, qps=DEFAULT_QPS, workers=DEFAULT_WORKERS):
+        """Címek párhuzamos, előzetes geocodolása a cache-be - a későbbi geocode_address hívások már cache találatok"""
+        if not self.can_prefetch:
+            return {}
+        queries = [self.geocode_query(str(address)) for address in addresses]
+        engine = ConcurrentGeocoder(self.geocoder.fetch_func, cache=self.cache, qps=qps, workers=workers)
+        results = engine.geocode_many(queries)
+        return results
     
     def geocode_address(self, address):
-        """Cím geocoding-ja Google Maps API-val - teljes információval"""
-        if not self.available:
+        """Cím geocoding-ja a beállított backenddel (cache-en keresztül) - teljes információval"""
+        if not self.available and self.cache is None:
             return None
         
         try:
-            # Budapest hozzáadása ha nincs benne
-            if 'budapest' not in address.lower():
-                address += ', Budapest, Hungary'
+            address = self.geocode_query(address)
+            
+            fetch_func = self.geocoder.fetch_func if self.available else None
+            if self.cache is not None and (self.geocoder is None or self.geocoder.cacheable):
+                result = self.cache.get_or_fetch(address, fetch_func)
+            else:
+                results = fetch_func(address)
+                result = results[0] if results else None
             
-            result = self.gmaps.geocode(address)
             if result:
-                location = result[0]['geometry']['location']
-                formatted_address = result[0].get('formatted_address', address)
+                location = result['geometry']['location']
+                formatted_address = result.get('formatted_address', address)
                 return {
                     'coordinates': (location['lat'], location['lng']),
                     'formatted_address': formatted_address,
-                    'raw_result': result[0]
+                    'raw_result': result
                 }
         except Exception as e:
             print(f"Geocoding hiba {address}: {e}")
@@ -96,9 +154,16 @@ class GoogleMapsLocationAnalyzer:
         return results
     
     def _extract_district_from_result(self, geocode_result, original_address):
-        """Városrész kinyerése Google Maps eredményből"""
+        """Városrész kinyerése - helyi poligonokból, ezek hiányában a Google Maps eredmény szövegéből"""
         import re
         
+        # 0. Poligon alapú feloldás (determinisztikus, API nélkül) - ha vannak helyi poligonok
+        resolver = load_district_resolver()
+        if resolver is not None and geocode_result.get('coordinates'):
+            district = resolver.district_label(*geocode_result['coordinates'])
+            if district:
+                return district
+        
         formatted_address = geocode_result.get('formatted_address', '')
         raw_result = geocode_result.get('raw_result', {})
         
@@ -183,16 +248,16 @@ class DescriptionLocationExtractor:
     
     def extract_locations_from_text(self, text):
         """Szövegből lokáció pattern-ek kinyerése"""
+        text = normalize_text(text)
         if not text:
             return []
         
-        text = text.lower().strip()
         found_locations = []
         
         # 1. Közvetlen kerületi rész említések
         for district, keywords in self.corrected_street_mapping.items():
             for keyword in keywords:
-                if keyword.lower() in text:
+                if text.contains(keyword):
                     # Kontextuális elemzés
                     context_score = self._calculate_context_confidence(text)
                     confidence = min(0.95, 0.7 + context_score)
@@ -211,8 +276,9 @@ class DescriptionLocationExtractor:
         """Kontextuális konfidencia számítás"""
         confidence_boost = 0.0
         
+        text = normalize_text(text)
         for category, keywords in self.context_modifiers.items():
-            matches = sum(1 for kw in keywords if kw in text)
+            matches = text.count_matches(keywords)
             if matches > 0:
                 confidence_boost += min(0.15, matches * 0.05)
         
@@ -256,6 +322,11 @@ class EnhancedLocationCategorizer:
             'Virányos': ['virányos', 'istenhegyi', 'alkotás'],
             'Zugliget': ['zugliget', 'hűvösvölgy', 'máriaremete']
         }
+        # Minták a címekkel azonos kanonikus alakban (ékezet, rövidítés, szóköz független)
+        self._address_pattern_keys = [
+            (district, pattern, address_text(pattern).strip())
+            for district, patterns in self.address_patterns.items() for pattern in patterns
+        ]
     
     def categorize_location(self, address="", description="", price=None):
         """4-lépéses lokáció kategorizálás"""
@@ -286,17 +357,16 @@ class EnhancedLocationCategorizer:
     
     def _simple_address_match(self, address):
         """Egyszerű cím pattern matching fallback módszer"""
-        address_lower = address.lower()
+        address_norm = address_text(address)
         
-        for district, patterns in self.address_patterns.items():
-            for pattern in patterns:
-                if pattern in address_lower:
-                    return {
-                        'district': district,
-                        'confidence': 0.4,
-                        'source': 'address_pattern',
-                        'matched_pattern': pattern
-                    }
+        for district, pattern, pattern_key in self._address_pattern_keys:
+            if pattern_key in address_norm:
+                return {
+                    'district': district,
+                    'confidence': 0.4,
+                    'source': 'address_pattern',
+                    'matched_pattern': pattern
+                }
         
         return {'district': 'Ismeretlen', 'confidence': 0.0, 'source': 'address_pattern'}
     
@@ -518,18 +588,12 @@ class IngatlanSzovegelemzo:
         }
     
     def clean_text(self, text):
-        """Szöveg tisztítása és normalizálása"""
-        if pd.isna(text):
-            return ""
-        text = str(text).lower()
-        text = re.sub(r'<[^>]+>', ' ', text)
-        text = re.sub(r'[^\w\s]', ' ', text)
-        text = re.sub(r'\s+', ' ', text)
-        return text.strip()
+        """Szöveg tisztítása és normalizálása (közös text_normalizer alapján)"""
+        return normalize_text(text).text
     
     def extract_category_scores(self, text):
-        """Kategória pontszámok kinyerése egy szövegből"""
-        clean_text = self.clean_text(text)
+        """Kategória pontszámok kinyerése egy szövegből (nyers vagy normalizált)"""
+        norm = normalize_text(text)
         
         scores = {}
         details = {}
@@ -542,10 +606,10 @@ class IngatlanSzovegelemzo:
             ossz_pontszam = 0
             
             for kulcsszo in kulcsszavak:
-                if kulcsszo in clean_text:
+                # Többszörösen előforduló szavak többet érnek
+                elofordulas = norm.count(kulcsszo)
+                if elofordulas:
                     talalt_szavak.append(kulcsszo)
-                    # Többszörösen előforduló szavak többet érnek
-                    elofordulas = clean_text.count(kulcsszo)
                     ossz_pontszam += pontszam * elofordulas
             
             scores[kategoria] = ossz_pontszam
@@ -557,6 +621,26 @@ class IngatlanSzovegelemzo:
         
         return scores, details
 
+    def extract_category_scores_batch(self, texts):
+        """Kategória pontszámok VEKTORIZÁLTAN egy teljes leírás oszlopra
+
+        `texts`: pandas Series (nyers vagy normalizált leírások).
+        Kulcsszavanként egyetlen `.str.count` fut az egész oszlopon, az
+        eredmény soronként azonos az `extract_category_scores` pontszámaival.
+        """
+        canonical = texts.map(lambda t: normalize_text(t).text)
+        scores = pd.DataFrame(index=texts.index)
+        
+        for kategoria, info in self.kategoriak.items():
+            ossz = pd.Series(0.0, index=texts.index)
+            for kulcsszo in info['kulcsszavak']:
+                pattern = keyword_pattern(kulcsszo)
+                if pattern:
+                    ossz += canonical.str.count(pattern) * info['pontszam']
+            scores[kategoria] = ossz
+        
+        return scores
+
     def enhanced_location_analysis(self, address="", description="", price=None):
         """
         🗺️ ENHANCED LOKÁCIÓ ELEMZÉS - 4-lépéses hibrid rendszer
@@ -604,6 +688,212 @@ class IngatlanSzovegelemzo:
                 'geocoded_address': ''
             }
 
+# ==== SZÖVEG + LOKÁCIÓ FEATURE-K (közös útvonal scraperhez és offline újraszámoláshoz) ====
+
+# Kategória -> (pontszám oszlop, dummy oszlop)
+KATEGORIA_OSZLOPOK = {
+    'ZOLD_ENERGIA_PREMIUM': ('zold_energia_premium_pont', 'van_zold_energia'),
+    'WELLNESS_LUXURY': ('wellness_luxury_pont', 'van_wellness_luxury'),
+    'SMART_TECHNOLOGY': ('smart_technology_pont', 'van_smart_tech'),
+    'PREMIUM_DESIGN': ('premium_design_pont', 'van_premium_design'),
+    'PREMIUM_PARKING': ('premium_parking_pont', 'van_premium_parking'),
+    'PREMIUM_LOCATION': ('premium_location_pont', 'van_premium_location'),
+    'BUILD_QUALITY': ('build_quality_pont', 'van_build_quality'),
+    'NEGATIV_TENYEZOK': ('negativ_tenyezok_pont', 'van_negativ_elem'),
+}
+
+POZITIV_KATEGORIAK = ['ZOLD_ENERGIA_PREMIUM', 'WELLNESS_LUXURY', 'SMART_TECHNOLOGY',
+                      'PREMIUM_DESIGN', 'PREMIUM_PARKING', 'PREMIUM_LOCATION', 'BUILD_QUALITY']
+
+# Új oszlopok alapértékei - MODERN ÁRFELHAJTÓ KATEGÓRIÁK (2025) + ENHANCED LOKÁCIÓ
+TEXT_FEATURE_COLUMNS = {
+    # Pontszám oszlopok - ÚJ MODERN KATEGÓRIÁK
+    'zold_energia_premium_pont': 0.0,
+    'wellness_luxury_pont': 0.0,
+    'smart_technology_pont': 0.0,
+    'premium_design_pont': 0.0,
+    'premium_parking_pont': 0.0,
+    'premium_location_pont': 0.0,
+    'build_quality_pont': 0.0,
+    'negativ_tenyezok_pont': 0.0,
+    
+    # Binary dummy változók (0/1) - modern kategóriákhoz
+    'van_zold_energia': 0,
+    'van_wellness_luxury': 0,
+    'van_smart_tech': 0,
+    'van_premium_design': 0,
+    'van_premium_parking': 0,
+    'van_premium_location': 0,
+    'van_build_quality': 0,
+    'van_negativ_elem': 0,
+    
+    # Összesített pontszámok
+    'ossz_pozitiv_pont': 0.0,
+    'ossz_negativ_pont': 0.0,
+    'netto_szoveg_pont': 0.0,
+    
+    # 🗺️ ENHANCED LOKÁCIÓ OSZLOPOK - XII. KERÜLETI RÉSZEK + KOORDINÁTÁK
+    'enhanced_keruleti_resz': 'Ismeretlen',
+    'lokacio_konfidencia': 0.0,
+    'lokacio_elemzesi_modszer': 'none',
+    'lokacio_forras': 'none',
+    'lokacio_elemzesek_szama': 0,
+    
+    # 🌍 GEOLOKÁCIÓS KOORDINÁTÁK
+    'geo_latitude': None,
+    'geo_longitude': None,
+    'geo_address_from_api': '',
+    
+    # VÁROSRÉSZ KATEGORIZÁLÁS - BUDAÖRS SPECIFIKUS (régi, kompatibilitás miatt)
+    'varosresz_kategoria': 'Ismeretlen',
+    'varosresz_premium_szorzo': 1.0
+}
+
+GEO_COLUMNS = ['geo_latitude', 'geo_longitude', 'geo_address_from_api']
+
+# Google Maps eredményből származó oszlopok - offline nem számolhatók újra hűen
+GEOCODED_COLUMNS = ['enhanced_keruleti_resz', 'lokacio_konfidencia', 'lokacio_elemzesi_modszer',
+                    'lokacio_forras', 'lokacio_elemzesek_szama'] + GEO_COLUMNS
+
+
+def _location_features_chunk(payload):
+    """Soronkénti lokáció feature-k egy darabra (ProcessPoolExecutor worker)"""
+    rows, location_name, google_api_key = payload
+    analyzer = IngatlanSzovegelemzo(google_maps_api_key=google_api_key)
+    return _location_features_rows(rows, location_name, analyzer)
+
+
+def _location_features_rows(rows, location_name, analyzer):
+    """Enhanced lokáció + városrész kategória soronként"""
+    district_scraper = DetailedScraper(None, location_name)
+    
+    results = []
+    for cim, reszletes_cim, leiras, ar in rows:
+        norm = normalize_text(leiras)
+        enhanced_location = analyzer.enhanced_location_analysis(address=cim, description=norm, price=ar)
+        varosresz_info = district_scraper._categorize_district(cim, reszletes_cim, norm, location_name)
+        results.append({
+            'enhanced_keruleti_resz': enhanced_location['keruleti_resz'],
+            'lokacio_konfidencia': enhanced_location['konfidencia'],
+            'lokacio_elemzesi_modszer': enhanced_location['elemzesi_modszer'],
+            'lokacio_forras': enhanced_location['forras'],
+            'lokacio_elemzesek_szama': enhanced_location['elemzesek_szama'],
+            'geo_latitude': enhanced_location.get('latitude', None),
+            'geo_longitude': enhanced_location.get('longitude', None),
+            'geo_address_from_api': enhanced_location.get('geocoded_address', ''),
+            'varosresz_kategoria': varosresz_info['kategoria'],
+            'varosresz_premium_szorzo': varosresz_info['premium_szorzo'],
+        })
+    return results
+
+
+def compute_text_features(df, location_name="", google_api_key=None, workers=1,
+                          keep_geocoded=False, analyzer=None):
+    """🌟 Minden származtatott oszlop (szöveg pontok + lokáció) újraszámolása
+
+    - Kategória pontszámok: vektorizáltan, kulcsszavanként egy oszlopművelet
+    - Lokáció / városrész: soronként, `workers` > 1 esetén párhuzamos processzekben
+    - `keep_geocoded`: a meglévő geo_* és enhanced lokáció oszlopokat megtartja
+      (offline újraszámolás Google Maps hívás nélkül)
+
+    Csak a leírással rendelkező sorok kapnak értéket, a többi az alapértékeken marad.
+    Az ár / terület / telek / szoba szám oszlopok (listing_parsers) minden sorra újraszámolódnak.
+    """
+    df = df.copy()
+    # 0. SZÁM OSZLOPOK - kanonikus, vektorizált parse-olás egyszer ingestkor (a CSV-be kerül)
+    add_parsed_columns(df, refresh=True)
+    kept_columns = [c for c in GEOCODED_COLUMNS if c in df.columns] if keep_geocoded else []
+    
+    for col_name, default_value in TEXT_FEATURE_COLUMNS.items():
+        if col_name not in kept_columns:
+            df[col_name] = default_value
+    # Vegyes típusú oszlopok - object dtype, hogy a None/str értékek beférjenek
+    for col_name in GEO_COLUMNS:
+        if col_name not in kept_columns:
+            df[col_name] = df[col_name].astype(object)
+    
+    if 'leiras' not in df.columns or df.empty:
+        return df
+    
+    mask = df['leiras'].notna()
+    if not mask.any():
+        return df
+    
+    if analyzer is None:
+        analyzer = IngatlanSzovegelemzo(google_maps_api_key=google_api_key)
+    leiras_norm = df.loc[mask, 'leiras'].map(normalize_text)
+    
+    # 1. VEKTORIZÁLT kategória pontszámok
+    scores = analyzer.extract_category_scores_batch(leiras_norm)
+    for kategoria, (pont_col, van_col) in KATEGORIA_OSZLOPOK.items():
+        df.loc[mask, pont_col] = scores[kategoria]
+        if kategoria == 'NEGATIV_TENYEZOK':
+            df.loc[mask, van_col] = (scores[kategoria] < 0).astype(int)
+        else:
+            df.loc[mask, van_col] = (scores[kategoria] > 0).astype(int)
+    
+    ossz_pozitiv = scores[POZITIV_KATEGORIAK].clip(lower=0).sum(axis=1)
+    ossz_negativ = scores['NEGATIV_TENYEZOK'].clip(upper=0).abs()
+    df.loc[mask, 'ossz_pozitiv_pont'] = ossz_pozitiv.round(2)
+    df.loc[mask, 'ossz_negativ_pont'] = ossz_negativ.round(2)
+    df.loc[mask, 'netto_szoveg_pont'] = (ossz_pozitiv - ossz_negativ).round(2)
+    
+    # 2. LOKÁCIÓ + VÁROSRÉSZ - soronként, opcionálisan párhuzamosan
+    subset = df.loc[mask]
+    rows = list(zip(
+        subset['cim'].astype(str) if 'cim' in subset.columns else [''] * len(subset),
+        subset['reszletes_cim'].astype(str) if 'reszletes_cim' in subset.columns else [''] * len(subset),
+        subset['leiras'].astype(str),
+        subset['ar'] if 'ar' in subset.columns else [None] * len(subset),
+    ))
+    
+    workers = max(1, int(workers or 1))
+    if workers > 1 and len(rows) > workers:
+        chunk_size = -(-len(rows) // workers)
+        chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            location_rows = [r for part in executor.map(
+                _location_features_chunk,
+                [(chunk, location_name, google_api_key) for chunk in chunks]
+            ) for r in part]
+    else:
+        location_rows = _location_features_rows(rows, location_name, analyzer)
+    
+    location_df = pd.DataFrame(location_rows, index=subset.index)
+    for col_name in location_df.columns:
+        if col_name not in kept_columns:
+            df.loc[mask, col_name] = location_df[col_name]
+    
+    # 3. POLIGON ALAPÚ VÁROSRÉSZ - koordinátákból, kötegben; felülírja a kulcsszavas becslést
+    apply_polygon_districts(df)
+    
+    # 4. ISKOLAKÖRZET TAGSÁG - minden körzet fájllal rendelkező településre, egyszer az adatkészítéskor
+    apply_school_catchments(df)
+    
+    # 5. TÁVOLSÁG FEATURE-K - legközelebbi POI (iskola, megálló, bolt...) távolsága és darabszám sugáron belül
+    apply_poi_features(df)
+    
+    return df
+
+
+def apply_polygon_districts(df, resolver=None):
+    """varosresz_kategoria / premium szorzó a helyi poligonokból, ahol a koordináta ismert
+
+    Poligon fájl hiányában (vagy kategória nélküli poligonnál) a kulcsszavas érték marad.
+    """
+    resolver = resolver or load_district_resolver()
+    if resolver is None or not {'geo_latitude', 'geo_longitude'}.issubset(df.columns):
+        return df
+    
+    resolved = resolver.resolve_batch(df['geo_latitude'], df['geo_longitude'])
+    resolved.index = df.index
+    found = resolved['varosresz_kategoria'].notna()
+    if found.any():
+        df.loc[found, 'varosresz_kategoria'] = resolved.loc[found, 'varosresz_kategoria']
+        df.loc[found, 'varosresz_premium_szorzo'] = resolved.loc[found, 'varosresz_premium_szorzo']
+    return df
+
+
 class KomplettIngatlanPipeline:
     def __init__(self):
         self.search_url = ""
@@ -612,6 +902,7 @@ class KomplettIngatlanPipeline:
         self.details_csv_file = ""
         self.dashboard_file = ""
         self.user_limit = 50  # Alapértelmezett limit
+        self.list_complete = False  # a lista scraper tölti ki (teljes találati lista?)
         
     def step_1_get_search_url(self):
         """1. LÉPÉS: URL bekérés és feldolgozási limit beállítás"""
@@ -692,16 +983,16 @@ class KomplettIngatlanPipeline:
         try:
             parsed = urlparse(url)
             query_params = parse_qs(parsed.query)
-            query_params['limit'] = ['300']
+            query_params['limit'] = [str(LIST_PAGE_LIMIT)]
             new_query = urlencode(query_params, doseq=True)
             return urlunparse(parsed._replace(query=new_query))
         except:
             # Fallback módszer
             if 'limit=' in url:
-                return re.sub(r'limit=\d+', 'limit=300', url)
+                return re.sub(r'limit=\d+', f'limit={LIST_PAGE_LIMIT}', url)
             else:
                 separator = '&' if '?' in url else '?'
-                return f"{url}{separator}limit=300"
+                return f"{url}{separator}limit={LIST_PAGE_LIMIT}"
     
     def _extract_location(self, url):
         """Lokáció kinyerése URL-ből fájlnév generálásához - CSAK FÖLDRAJZI HELYSÉG"""
@@ -852,6 +1143,7 @@ class KomplettIngatlanPipeline:
             if properties:
                 # CSV mentése automatikus fájlnévvel
                 self.list_csv_file = scraper.save_to_csv(properties)
+                self.list_complete = scraper.list_complete
                 
                 print(f"\n✅ LISTA SCRAPING SIKERES!")
                 print(f"📁 Fájl: {self.list_csv_file}")
@@ -881,19 +1173,20 @@ class KomplettIngatlanPipeline:
         print(f"📊 Bemeneti CSV: {self.list_csv_file}")
         
         # Részletes scraper
-        details_scraper = DetailedScraper(self.list_csv_file, self.location_name)
+        details_scraper = DetailedScraper(self.list_csv_file, self.location_name,
+                                          list_complete=self.list_complete)
         
         try:
-            # Részletes adatok gyűjtése
-            detailed_data = await details_scraper.process_all_properties()
+            # Részletes adatok gyűjtése (rekord naplóba)
+            record_count = await details_scraper.process_all_properties()
             
-            if detailed_data:
-                # CSV mentése automatikus fájlnévvel
-                self.details_csv_file = details_scraper.save_to_csv(detailed_data)
+            if record_count:
+                # CSV mentése automatikus fájlnévvel - a naplóból, egy feature lépéssel
+                self.details_csv_file = details_scraper.save_to_csv()
                 
                 print(f"\n✅ RÉSZLETES SCRAPING SIKERES!")
                 print(f"📁 Fájl: {self.details_csv_file}")
-                print(f"📊 Részletes adatok: {len(detailed_data)}")
+                print(f"📊 Részletes adatok: {record_count}")
                 
                 await details_scraper.close()
                 return True
@@ -1213,12 +1506,17 @@ class KomplettIngatlanPipeline:
         print(f"   🔍 Részletes CSV: {self.details_csv_file}")
         print(f"   🎨 Dashboard: {self.dashboard_file}")
 
+# Találatok egy lista oldalon (az URL `limit` paramétere) - a lista scraper csak az első oldalt olvassa
+LIST_PAGE_LIMIT = 300
+
+
 # URL-alapú lista scraper
 class UrlListScraper:
     def __init__(self, search_url, location_name, user_limit=50):
         self.search_url = search_url
         self.location_name = location_name
         self.user_limit = user_limit
+        self.list_complete = False  # a lista a lokáció összes találatát lefedte (nem vágta le limit)
         self.playwright = None
         self.browser = None
         self.page = None
@@ -1335,6 +1633,10 @@ class UrlListScraper:
             # User limit alkalmazása
             max_elements = min(len(property_elements), self.user_limit)
             limited_elements = property_elements[:max_elements]
+            # Teljes csak akkor, ha sem a user limit, sem az oldal limit nem vágott le találatot
+            self.list_complete = len(property_elements) <= self.user_limit and len(property_elements) < LIST_PAGE_LIMIT
+            if not self.list_complete:
+                print(f"ℹ️  Részleges lista - a történet adatbázis nem jelöl eltűnt hirdetést ebből a futásból")
             
             print(f"🎯 FELDOLGOZÁS: {len(limited_elements)}/{len(property_elements)} ingatlan (user limit: {self.user_limit})")
             
@@ -1503,8 +1805,8 @@ class UrlListScraper:
                     # NÉGYZETMÉTER ÁR - már kinyertük fentebb, de számoljuk újra ha kell
                     if not property_data['nm_ar'] and property_data['teljes_ar'] and property_data['terulet']:
                         try:
-                            price_num = self._extract_price_number(property_data['teljes_ar'])
-                            area_num = self._extract_area_number(property_data['terulet'])
+                            price_num = price_huf_value(property_data['teljes_ar'])
+                            area_num = area_m2_value(property_data['terulet'])
                             
                             if price_num and area_num:
                                 price_per_sqm = int(price_num / area_num)
@@ -1534,35 +1836,6 @@ class UrlListScraper:
             print(f"❌ Lista scraping hiba: {e}")
             return []
     
-    def _extract_price_number(self, price_text):
-        """Ár szám kinyerése"""
-        try:
-            numbers = re.findall(r'[\d,\.]+', price_text.replace(' ', ''))
-            if numbers:
-                num_str = numbers[0].replace(',', '.')
-                num_value = float(num_str)
-                
-                if 'M' in price_text.upper():
-                    num_value *= 1_000_000
-                elif 'MRD' in price_text.upper():
-                    num_value *= 1_000_000_000
-                
-                return num_value
-        except:
-            pass
-        return None
-    
-    def _extract_area_number(self, area_text):
-        """Terület szám kinyerése"""
-        try:
-            numbers = re.findall(r'[\d,\.]+', area_text.replace(' ', ''))
-            if numbers:
-                num_str = numbers[0].replace(',', '.')
-                return float(num_str)
-        except:
-            pass
-        return None
-    
     def save_to_csv(self, properties):
         """CSV mentés automatikus fájlnévvel pipe elválasztóval + duplikáció szűrés"""
         try:
@@ -1578,7 +1851,10 @@ class UrlListScraper:
             
             if len(df) > 0:
                 # Duplikátumok eltávolítása (első előfordulást megtartjuk)
-                df_clean = df.drop_duplicates(subset=['cim', 'teljes_ar', 'terulet'], keep='first')
+                # Cím összehasonlítás kanonikus kulccsal (u./utca, ékezet, dupla szóköz, kerület írásmód)
+                df_clean = (df.assign(_cim_kulcs=address_keys(df['cim']))
+                            .drop_duplicates(subset=['_cim_kulcs', 'teljes_ar', 'terulet'], keep='first')
+                            .drop(columns='_cim_kulcs'))
                 duplicates_removed = original_count - len(df_clean)
                 
                 print(f"   🗑️ Eltávolított duplikátumok: {duplicates_removed}")
@@ -1589,10 +1865,14 @@ class UrlListScraper:
             # Oszlop sorrend
             columns = ['id', 'cim', 'teljes_ar', 'nm_ar', 'terulet', 'telekterulet', 'szobak', 'kepek_szama', 'link']
             available_columns = [col for col in columns if col in df.columns]
-            df = df[available_columns]
+            df = df[available_columns].copy()
+            # Ár (Ft) / terület / telek / szoba szám oszlopok - egyszer itt, a dashboardok nem parse-olnak
+            add_parsed_columns(df, refresh=True)
             
             # CSV mentés PIPE elválasztóval (|) - vesszők a leírásban problémát okoznának
             df.to_csv(filename, index=False, encoding='utf-8-sig', sep='|')
+            write_columnar(df, filename)
+            register_dataset(filename, df)
             
             print(f"💾 Lista CSV mentve (| elválasztó): {filename}")
             print(f"📊 Végső rekordszám: {len(df)}")
@@ -1612,12 +1892,16 @@ class UrlListScraper:
 
 # Részletes scraper
 class DetailedScraper:
-    def __init__(self, list_csv_file, location_name):
+    def __init__(self, list_csv_file, location_name, list_complete=False):
         self.list_csv_file = list_csv_file
         self.location_name = location_name
+        self.list_complete = list_complete  # teljes lista -> a történetben eltűnés követés
         self.playwright = None
         self.browser = None
         self.page = None
+        self.content_archive = None  # nyers adatlap HTML (content_archive)
+        self.output_file = None      # részletes CSV (a futás indulásakor elnevezve)
+        self.journal = None          # kész rekordok naplója (RecordJournal) - nem memóriában gyűlnek
         
         # Bot elkerülő stratégiák
         self.user_agents = [
@@ -1634,18 +1918,18 @@ class DetailedScraper:
         ]
     
     async def process_all_properties(self):
-        """Összes ingatlan részletes feldolgozása"""
+        """Összes ingatlan részletes feldolgozása - a kész rekordok a naplóba, visszaadja a számukat"""
         # CSV beolvasás pipe elválasztóval
         try:
             df = pd.read_csv(self.list_csv_file, sep='|')
             print(f"📊 CSV beolvasva: {len(df)} ingatlan")
         except Exception as e:
             print(f"❌ CSV hiba: {e}")
-            return []
+            return 0
         
         if 'link' not in df.columns:
             print("❌ Nincs 'link' oszlop!")
-            return []
+            return 0
         
         # NORMÁL PLAYWRIGHT CONNECTION - STABIL MÓDSZER
         try:
@@ -1670,10 +1954,22 @@ class DetailedScraper:
             
         except Exception as e:
             print(f"❌ Chrome kapcsolat hiba: {e}")
-            return []
+            return 0
         
-        # Részletes scraping
-        detailed_data = []
+        # 🗜️ Nyers adatlap HTML a tartalom archívumba - új mező kinyeréséhez nem kell újra scrape-elni
+        try:
+            self.content_archive = ContentArchive()
+        except Exception as e:
+            print(f"⚠️ Tartalom archívum nem elérhető (a HTML nem mentődik): {e}")
+        
+        # 🗺️ HÁTTÉR GEOCODING - a lista kártyák címei a részletes scraping alatt oldódnak fel
+        geocoding_task = self._start_geocoding_stage(df)
+        
+        # Részletes scraping - minden kész rekord azonnal a naplóba (a CSV a save_to_csv-ben, egyszer íródik)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.output_file = f"ingatlan_reszletes_{self.location_name}_{timestamp}.csv"
+        self.journal = RecordJournal(journal_path(self.output_file))
+        print(f"📝 Rekord napló: {self.journal.path}")
         urls = df['link'].dropna().tolist()
         
         # SIMPLE SESSION WARMUP - PIPELINE STYLE - BIZTONSÁGOS VERZIÓ
@@ -1706,7 +2002,7 @@ class DetailedScraper:
                 else:
                     print(f"    🏠 Szobák: nincs adat")
                 
-                detailed_data.append(combined)
+                self.journal.append(combined)
                 
                 # Humán-szerű várakozás változatos időkkel - BIZTONSÁGOS VERZIÓ
                 if i < len(urls):
@@ -1730,10 +2026,40 @@ class DetailedScraper:
                 # Üres részletes adatok hozzáadása
                 empty_details = self._get_empty_details()
                 combined = {**original_data, **empty_details}
-                detailed_data.append(combined)
+                self.journal.append(combined)
                 continue
         
-        return detailed_data
+        await self._finish_geocoding_stage(geocoding_task)
+        return self.journal.count
+    
+    def _start_geocoding_stage(self, df):
+        """Lista címek geocodolása háttérszálon, párhuzamosan a részletes scrapinggel
+
+        Az eredmények a perzisztens geocoding cache-be kerülnek, így a save_to_csv
+        lokáció elemzése már nem vár API körülfordulásra.
+        """
+        if 'cim' not in df.columns:
+            return None
+        analyzer = GoogleMapsLocationAnalyzer(os.environ.get('GOOGLE_MAPS_API_KEY'))
+        if not analyzer.can_prefetch:
+            return None
+        
+        addresses = df['cim'].dropna().astype(str).unique().tolist()
+        print(f"🗺️ Háttér geocoding indítva: {len(addresses)} egyedi cím")
+        return asyncio.create_task(asyncio.to_thread(analyzer.prefetch, addresses))
+    
+    async def _finish_geocoding_stage(self, geocoding_task):
+        """Háttér geocoding bevárása (jellemzően már kész, mire a scraping végez)"""
+        if geocoding_task is None:
+            return
+        try:
+            start = time.time()
+            results = await geocoding_task
+            found = sum(1 for r in results.values() if r and not isinstance(r, Exception))
+            print(f"🗺️ Háttér geocoding kész: {found}/{len(results)} cím koordinátával "
+                  f"(várakozás a scraping után: {time.time() - start:.1f}s)")
+        except Exception as e:
+            print(f"⚠️ Háttér geocoding hiba (save_to_csv soronként pótolja): {e}")
     
     async def _scrape_single_property(self, url):
         """Egyetlen ingatlan részletes scraping - PIPELINE STYLE"""
@@ -1767,6 +2093,10 @@ class DetailedScraper:
             except:
                 details['reszletes_cim'] = ""
             
+            # Nyers HTML archiválása (CAPTCHA oldal nem) - a CSV-be csak a hash kerül
+            if details.get('reszletes_cim') != "CAPTCHA_DETECTED":
+                details['html_hash'] = await self._archive_page_html()
+            
             # Részletes ár
             try:
                 price_selectors = [".price-value", ".property-price .text-onyx", ".listing-price", "[data-testid='price']", ".price"]
@@ -1898,6 +2228,16 @@ class DetailedScraper:
             print(f"  ❌ Scraping hiba: {e}")
             return self._get_empty_details()
     
+    async def _archive_page_html(self):
+        """Adatlap nyers HTML a tartalom archívumba - hash, vagy '' ha nincs archívum / hiba"""
+        if self.content_archive is None:
+            return ""
+        try:
+            return self.content_archive.put(await self.page.content(), KIND_HTML) or ""
+        except Exception as e:
+            print(f"    ⚠️ HTML archiválás hiba: {e}")
+            return ""
+    
     async def _determine_advertiser_type_from_page(self):
         """Hirdető típus azonosítás a self.page-ről"""
         try:
@@ -1945,11 +2285,10 @@ class DetailedScraper:
 
     def _detect_advertiser_type(self, description):
         """Szemantikai alapú hirdető típus meghatározása nagynyelvű elemzéssel"""
-        if not description:
+        desc_norm = normalize_text(description)
+        if not desc_norm:
             return "ismeretlen"
         
-        desc_lower = description.lower()
-        
         # ERŐS MAGÁNSZEMÉLY JELZŐK (ezek felülírják az ingatlaniroda jelzőket)
         strong_private_indicators = [
             'ingatlanközvetítő', 'közvetítő', 'ingatlanosok ne', 'ne keressenek',
@@ -1987,17 +2326,13 @@ class DetailedScraper:
         ]
         
         # PONTSZÁMÍTÁS
-        strong_private_score = sum(1 for indicator in strong_private_indicators 
-                                 if indicator in desc_lower)
+        strong_private_score = desc_norm.count_matches(strong_private_indicators)
         
-        strong_agency_score = sum(1 for indicator in strong_agency_indicators 
-                                if indicator in desc_lower)
+        strong_agency_score = desc_norm.count_matches(strong_agency_indicators)
         
-        moderate_private_score = sum(1 for indicator in moderate_private_indicators 
-                                   if indicator in desc_lower) * 0.5
+        moderate_private_score = desc_norm.count_matches(moderate_private_indicators) * 0.5
         
-        moderate_agency_score = sum(1 for indicator in moderate_agency_indicators 
-                                  if indicator in desc_lower) * 0.5
+        moderate_agency_score = desc_norm.count_matches(moderate_agency_indicators) * 0.5
         
         # VÉGSŐ PONTSZÁMOK
         total_private_score = strong_private_score * 3 + moderate_private_score
@@ -2019,19 +2354,19 @@ class DetailedScraper:
             return "ingatlaniroda"
         
         # HOSSZÚSÁG ALAPÚ HEURISZTIKA (hosszabb leírás általában ingatlaniroda)
-        if len(description) > 800:
+        if len(desc_norm.raw) > 800:
             return "ingatlaniroda"
-        elif len(description) < 200:
+        elif len(desc_norm.raw) < 200:
             return "maganszemely"
         
         # SPECIFIKUS MINTÁK KERESÉSE
         # Személyes hangvétel keresése
         personal_patterns = ['vagyok', 'vagyunk', 'családunk', 'otthonunk', 'házunk']
-        personal_count = sum(1 for pattern in personal_patterns if pattern in desc_lower)
+        personal_count = desc_norm.count_matches(personal_patterns)
         
         # Formális/üzleti hangvétel keresése
         business_patterns = ['kínáljuk', 'ajánljuk', 'várjuk', 'keresse', 'forduljon']
-        business_count = sum(1 for pattern in business_patterns if pattern in desc_lower)
+        business_count = desc_norm.count_matches(business_patterns)
         
         if personal_count > business_count:
             return "maganszemely" 
@@ -2041,34 +2376,34 @@ class DetailedScraper:
         return "bizonytalan"
     
     def _categorize_district(self, cim, reszletes_cim, leiras, location_name=""):
-        """Dinamikus városrész kategorizálás lokáció alapján - CÍM SPECIFIKUS ELEMZÉSSEL"""
-        
-        # Egyesített szöveg elemzéshez
-        teljes_szoveg = f"{cim} {reszletes_cim} {leiras}".lower()
-        
-        # 🎯 CÍM ALAPÚ SPECIFIKUS VÁROSRÉSZ FELISMERÉS
-        if 'kőbánya' in teljes_szoveg or 'kobanya' in teljes_szoveg or 'x. kerület' in teljes_szoveg:
-            return self._categorize_kobanya_district(cim, reszletes_cim, leiras)
-        elif 'törökbálint' in teljes_szoveg or 'torokbalint' in teljes_szoveg:
-            return self._categorize_torokbalint_district(cim, reszletes_cim, leiras)
-        elif 'budaörs' in teljes_szoveg or 'budaors' in teljes_szoveg:
-            return self._categorize_budaors_district(cim, reszletes_cim, leiras)
-        elif 'xii' in teljes_szoveg or 'xii.' in cim:
-            return self._categorize_budapest_xii_district(cim, reszletes_cim, leiras)
-        elif any(word in teljes_szoveg for word in ['budapest', 'pest', 'buda']):
-            return self._categorize_budapest_general_district(cim, reszletes_cim, leiras)
-        elif 'érd' in teljes_szoveg:
-            return self._categorize_erd_district(cim, reszletes_cim, leiras)
+        """Dinamikus városrész kategorizálás lokáció alapján - CÍM SPECIFIKUS ELEMZÉSSEL
+
+        A `leiras` lehet már normalizált szöveg is - ilyenkor nem tokenizáljuk újra.
+        """
+        
+        # Egyesített szöveg elemzéshez - egyszer normalizálva, minden al-elemző ezt kapja
+        teljes_szoveg = combine_normalized(cim, reszletes_cim, leiras)
+        
+        # 🎯 CÍM ALAPÚ SPECIFIKUS VÁROSRÉSZ FELISMERÉS (ékezet-független)
+        if teljes_szoveg.contains('kőbánya', fold=True) or teljes_szoveg.contains('x. kerület'):
+            return self._categorize_kobanya_district(teljes_szoveg)
+        elif teljes_szoveg.contains('törökbálint', fold=True):
+            return self._categorize_torokbalint_district(teljes_szoveg)
+        elif teljes_szoveg.contains('budaörs', fold=True):
+            return self._categorize_budaors_district(teljes_szoveg)
+        elif teljes_szoveg.contains('xii'):
+            return self._categorize_budapest_xii_district(teljes_szoveg)
+        elif teljes_szoveg.contains_any(['budapest', 'pest', 'buda']):
+            return self._categorize_budapest_general_district(teljes_szoveg)
+        elif teljes_szoveg.contains('érd'):
+            return self._categorize_erd_district(teljes_szoveg)
         else:
             # ÁLTALÁNOS KATEGORIZÁLÁS - LOKÁCIÓ FÜGGETLEN
-            return self._categorize_general_district(cim, reszletes_cim, leiras)
+            return self._categorize_general_district(teljes_szoveg)
 
-    def _categorize_kobanya_district(self, cim, reszletes_cim, leiras):
+    def _categorize_kobanya_district(self, teljes_szoveg):
         """Kőbánya X. kerület specifikus városrész kategorizálás"""
         
-        # Egyesített szöveg elemzéshez
-        teljes_szoveg = f"{cim} {reszletes_cim} {leiras}".lower()
-        
         # KŐBÁNYA X. KERÜLET VÁROSRÉSZEK
         varosreszek = {
             'Kőbánya-Újhegyi lakótelep': {
@@ -2095,12 +2430,9 @@ class DetailedScraper:
         
         return self._find_best_district_match(varosreszek, teljes_szoveg, 'Kőbánya-Újhegyi lakótelep')
 
-    def _categorize_torokbalint_district(self, cim, reszletes_cim, leiras):
+    def _categorize_torokbalint_district(self, teljes_szoveg):
         """Törökbálint specifikus városrész kategorizálás"""
         
-        # Egyesített szöveg elemzéshez
-        teljes_szoveg = f"{cim} {reszletes_cim} {leiras}".lower()
-        
         # TÖRÖKBÁLINT VÁROSRÉSZEK
         varosreszek = {
             'Törökbálint-Tükörhegy': {
@@ -2125,12 +2457,9 @@ class DetailedScraper:
         
         return self._find_best_district_match(varosreszek, teljes_szoveg, 'Törökbálint központ')
 
-    def _categorize_budapest_xii_district(self, cim, reszletes_cim, leiras):
+    def _categorize_budapest_xii_district(self, teljes_szoveg):
         """Budapest XII. kerület városrész kategorizálás"""
         
-        # Egyesített szöveg elemzéshez
-        teljes_szoveg = f"{cim} {reszletes_cim} {leiras}".lower()
-        
         # BUDAPEST XII. KERÜLET VÁROSRÉSZEK ÉS PRÉMIUM KATEGÓRIÁK
         varosreszek = {
             # PRÉMIUM TERÜLETEK - 1.4x szorzó
@@ -2197,12 +2526,9 @@ class DetailedScraper:
         
         return self._find_best_district_match(varosreszek, teljes_szoveg, 'XII. ker. Általános')
 
-    def _categorize_general_district(self, cim, reszletes_cim, leiras):
+    def _categorize_general_district(self, teljes_szoveg):
         """Általános városrész kategorizálás minden lokációhoz"""
         
-        # Egyesített szöveg elemzéshez
-        teljes_szoveg = f"{cim} {reszletes_cim} {leiras}".lower()
-        
         # ÁLTALÁNOS KATEGÓRIÁK - LOKÁCIÓ FÜGGETLEN
         varosreszek = {
             # PRÉMIUM TERÜLETEK
@@ -2240,12 +2566,9 @@ class DetailedScraper:
         
         return self._find_best_district_match(varosreszek, teljes_szoveg, 'Általános terület')
 
-    def _categorize_budapest_general_district(self, cim, reszletes_cim, leiras):
+    def _categorize_budapest_general_district(self, teljes_szoveg):
         """Általános budapesti városrész kategorizálás"""
         
-        # Egyesített szöveg elemzéshez
-        teljes_szoveg = f"{cim} {reszletes_cim} {leiras}".lower()
-        
         # BUDAPEST ÁLTALÁNOS KATEGÓRIÁK
         varosreszek = {
             'Budapest prémium kerület': {
@@ -2272,12 +2595,9 @@ class DetailedScraper:
         
         return self._find_best_district_match(varosreszek, teljes_szoveg, 'Budapest általános')
 
-    def _categorize_erd_district(self, cim, reszletes_cim, leiras):
+    def _categorize_erd_district(self, teljes_szoveg):
         """Érd városrész kategorizálás"""
         
-        # Egyesített szöveg elemzéshez
-        teljes_szoveg = f"{cim} {reszletes_cim} {leiras}".lower()
-        
         # ÉRD VÁROSRÉSZEK
         varosreszek = {
             'Érd Erdliget - Prémium': {
@@ -2316,10 +2636,7 @@ class DetailedScraper:
         max_score = 0
         
         for varosresz_nev, info in varosreszek.items():
-            score = 0
-            for kulcsszo in info['kulcsszavak']:
-                if kulcsszo in teljes_szoveg:
-                    score += teljes_szoveg.count(kulcsszo)
+            score = sum(teljes_szoveg.count(kulcsszo) for kulcsszo in info['kulcsszavak'])
             
             if score > max_score:
                 max_score = score
@@ -2331,12 +2648,9 @@ class DetailedScraper:
         
         return best_match
 
-    def _categorize_budaors_district(self, cim, reszletes_cim, leiras):
+    def _categorize_budaors_district(self, teljes_szoveg):
         """Budaörs városrész kategorizálás és prémium szorzó meghatározás"""
         
-        # Egyesített szöveg elemzéshez
-        teljes_szoveg = f"{cim} {reszletes_cim} {leiras}".lower()
-        
         # BUDAÖRS VÁROSRÉSZEK ÉS PRÉMIUM KATEGÓRIÁK
         varosreszek = {
             # PRÉMIUM VILLA NEGYEDEK - 1.3x szorzó
@@ -2405,10 +2719,7 @@ class DetailedScraper:
         max_score = 0
         
         for varosresz_nev, info in varosreszek.items():
-            score = 0
-            for kulcsszo in info['kulcsszavak']:
-                if kulcsszo in teljes_szoveg:
-                    score += teljes_szoveg.count(kulcsszo)
+            score = sum(teljes_szoveg.count(kulcsszo) for kulcsszo in info['kulcsszavak'])
             
             if score > max_score:
                 max_score = score
@@ -2432,13 +2743,19 @@ class DetailedScraper:
             'leiras': '', 'ingatlanos': '', 'telefon': '', 'hirdeto_tipus': '', 'kepek_szama': 0
         }
     
-    def save_to_csv(self, detailed_data):
-        """Részletes CSV mentés Enhanced Text Feature-kkel + duplikáció szűrés"""
+    def save_to_csv(self, detailed_data=None):
+        """Részletes CSV mentés Enhanced Text Feature-kkel + duplikáció szűrés
+
+        Alapból a rekord naplóból (process_all_properties) - a CSV egyszer, a feature-kkel
+        együtt íródik (atomikus rename). Sikeres mentés után a napló törlődik.
+        """
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            base_filename = f"ingatlan_reszletes_{self.location_name}_{timestamp}.csv"
+            if self.output_file is None:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                self.output_file = f"ingatlan_reszletes_{self.location_name}_{timestamp}.csv"
+            base_filename = self.output_file
             
-            df = pd.DataFrame(detailed_data)
+            df = pd.DataFrame(detailed_data) if detailed_data is not None else self.journal.read_frame()
             original_count = len(df)
             
             # 🔥 DUPLIKÁCIÓ SZŰRÉS - ár, terület és cím alapján
@@ -2447,7 +2764,10 @@ class DetailedScraper:
             
             if len(df) > 0:
                 # Duplikátumok eltávolítása (első előfordulást megtartjuk)
-                df_clean = df.drop_duplicates(subset=['cim', 'teljes_ar', 'terulet'], keep='first')
+                # Cím összehasonlítás kanonikus kulccsal (u./utca, ékezet, dupla szóköz, kerület írásmód)
+                df_clean = (df.assign(_cim_kulcs=address_keys(df['cim']))
+                            .drop_duplicates(subset=['_cim_kulcs', 'teljes_ar', 'terulet'], keep='first')
+                            .drop(columns='_cim_kulcs'))
                 duplicates_removed = original_count - len(df_clean)
                 
                 print(f"   🗑️ Eltávolított duplikátumok: {duplicates_removed}")
@@ -2466,10 +2786,6 @@ class DetailedScraper:
             
             final_columns = available_priority + other_cols
             df = df[final_columns]
-            
-            # Alap CSV mentése (backup) PIPE elválasztóval
-            df.to_csv(base_filename, index=False, encoding='utf-8-sig', sep='|')
-            print(f"💾 Alap CSV mentve (| elválasztó): {base_filename}")
             print(f"📊 Végső rekordszám: {len(df)}")
             
             # 🌟 ENHANCED TEXT FEATURES + LOKÁCIÓ GENERÁLÁS
@@ -2482,137 +2798,71 @@ class DetailedScraper:
             
             if google_api_key:
                 print("🗺️ Google Maps API használatával - ENHANCED lokáció elemzés")
+            elif analyzer.location_categorizer.google_analyzer.available:
+                print("📚 Google Maps API key nincs beállítva - offline gazetteer geocoding")
             else:
                 print("⚠️ Google Maps API key nincs beállítva - fallback lokáció elemzés")
             
-            # Új oszlopok inicializálása - MODERN ÁRFELHAJTÓ KATEGÓRIÁK (2025) + ENHANCED LOKÁCIÓ
-            text_feature_columns = {
-                # Pontszám oszlopok - ÚJ MODERN KATEGÓRIÁK
-                'zold_energia_premium_pont': 0.0,
-                'wellness_luxury_pont': 0.0,
-                'smart_technology_pont': 0.0,
-                'premium_design_pont': 0.0,
-                'premium_parking_pont': 0.0,
-                'premium_location_pont': 0.0,
-                'build_quality_pont': 0.0,
-                'negativ_tenyezok_pont': 0.0,
-                
-                # Binary dummy változók (0/1) - modern kategóriákhoz
-                'van_zold_energia': 0,
-                'van_wellness_luxury': 0,
-                'van_smart_tech': 0,
-                'van_premium_design': 0,
-                'van_premium_parking': 0,
-                'van_premium_location': 0,
-                'van_build_quality': 0,
-                'van_negativ_elem': 0,
-                
-                # Összesített pontszámok
-                'ossz_pozitiv_pont': 0.0,
-                'ossz_negativ_pont': 0.0,
-                'netto_szoveg_pont': 0.0,
-                
-                # 🗺️ ENHANCED LOKÁCIÓ OSZLOPOK - XII. KERÜLETI RÉSZEK + KOORDINÁTÁK
-                'enhanced_keruleti_resz': 'Ismeretlen',
-                'lokacio_konfidencia': 0.0,
-                'lokacio_elemzesi_modszer': 'none',
-                'lokacio_forras': 'none',
-                'lokacio_elemzesek_szama': 0,
-                
-                # 🌍 GEOLOKÁCIÓS KOORDINÁTÁK
-                'geo_latitude': None,
-                'geo_longitude': None,
-                'geo_address_from_api': '',
-                
-                # VÁROSRÉSZ KATEGORIZÁLÁS - BUDAÖRS SPECIFIKUS (régi, kompatibilitás miatt)
-                'varosresz_kategoria': 'Ismeretlen',
-                'varosresz_premium_szorzo': 1.0
-            }
-            
-            # Oszlopok hozzáadása - SettingWithCopyWarning elkerülése
-            df = df.copy()  # Explicit másolat készítése
-            for col_name, default_value in text_feature_columns.items():
-                df[col_name] = default_value
-            
-            # Text feature-k generálása minden sorhoz
-            processed_count = 0
-            for idx, row in df.iterrows():
-                if pd.notna(row.get('leiras', '')):
-                    # Kategória pontszámok kinyerése az ÚJ kategóriák alapján
-                    scores, details = analyzer.extract_category_scores(row['leiras'])
-                    
-                    # MODERN KATEGÓRIÁK pontszámainak mentése
-                    df.at[idx, 'zold_energia_premium_pont'] = scores.get('ZOLD_ENERGIA_PREMIUM', 0)
-                    df.at[idx, 'wellness_luxury_pont'] = scores.get('WELLNESS_LUXURY', 0)
-                    df.at[idx, 'smart_technology_pont'] = scores.get('SMART_TECHNOLOGY', 0)
-                    df.at[idx, 'premium_design_pont'] = scores.get('PREMIUM_DESIGN', 0)
-                    df.at[idx, 'premium_parking_pont'] = scores.get('PREMIUM_PARKING', 0)
-                    df.at[idx, 'premium_location_pont'] = scores.get('PREMIUM_LOCATION', 0)
-                    df.at[idx, 'build_quality_pont'] = scores.get('BUILD_QUALITY', 0)
-                    df.at[idx, 'negativ_tenyezok_pont'] = scores.get('NEGATIV_TENYEZOK', 0)
-                    
-                    # Binary dummy változók - modern kategóriákhoz
-                    df.at[idx, 'van_zold_energia'] = 1 if scores.get('ZOLD_ENERGIA_PREMIUM', 0) > 0 else 0
-                    df.at[idx, 'van_wellness_luxury'] = 1 if scores.get('WELLNESS_LUXURY', 0) > 0 else 0
-                    df.at[idx, 'van_smart_tech'] = 1 if scores.get('SMART_TECHNOLOGY', 0) > 0 else 0
-                    df.at[idx, 'van_premium_design'] = 1 if scores.get('PREMIUM_DESIGN', 0) > 0 else 0
-                    df.at[idx, 'van_premium_parking'] = 1 if scores.get('PREMIUM_PARKING', 0) > 0 else 0
-                    df.at[idx, 'van_premium_location'] = 1 if scores.get('PREMIUM_LOCATION', 0) > 0 else 0
-                    df.at[idx, 'van_build_quality'] = 1 if scores.get('BUILD_QUALITY', 0) > 0 else 0
-                    df.at[idx, 'van_negativ_elem'] = 1 if scores.get('NEGATIV_TENYEZOK', 0) < 0 else 0
-                    
-                    # 🗺️ ENHANCED LOKÁCIÓ ELEMZÉS - ÚJ 4-lépéses rendszer
-                    enhanced_location = analyzer.enhanced_location_analysis(
-                        address=str(row.get('cim', '')),
-                        description=str(row.get('leiras', '')),
-                        price=row.get('ar', None)
-                    )
-                    
-                    df.at[idx, 'enhanced_keruleti_resz'] = enhanced_location['keruleti_resz']
-                    df.at[idx, 'lokacio_konfidencia'] = enhanced_location['konfidencia']
-                    df.at[idx, 'lokacio_elemzesi_modszer'] = enhanced_location['elemzesi_modszer']
-                    df.at[idx, 'lokacio_forras'] = enhanced_location['forras']
-                    df.at[idx, 'lokacio_elemzesek_szama'] = enhanced_location['elemzesek_szama']
-                    
-                    # 🌍 GEOLOKÁCIÓS KOORDINÁTÁK MENTÉSE
-                    df.at[idx, 'geo_latitude'] = enhanced_location.get('latitude', None)
-                    df.at[idx, 'geo_longitude'] = enhanced_location.get('longitude', None)
-                    df.at[idx, 'geo_address_from_api'] = enhanced_location.get('geocoded_address', '')
-                    
-                    # VÁROSRÉSZ KATEGORIZÁLÁS - DINAMIKUS LOKÁCIÓ ALAPJÁN (régi rendszer, kompatibilitás)
-                    varosresz_info = self._categorize_district(str(row.get('cim', '')), str(row.get('reszletes_cim', '')), str(row.get('leiras', '')), self.location_name)
-                    df.at[idx, 'varosresz_kategoria'] = varosresz_info['kategoria']
-                    df.at[idx, 'varosresz_premium_szorzo'] = varosresz_info['premium_szorzo']
-                    
-                    # Összesített pontszámok - MODERN KATEGÓRIÁK városrész szorzóval
-                    pozitiv_kategoriak = ['ZOLD_ENERGIA_PREMIUM', 'WELLNESS_LUXURY', 'SMART_TECHNOLOGY', 
-                                         'PREMIUM_DESIGN', 'PREMIUM_PARKING', 'PREMIUM_LOCATION', 'BUILD_QUALITY']
-                    
-                    ossz_pozitiv = sum(max(0, scores.get(kat, 0)) for kat in pozitiv_kategoriak)
-                    ossz_negativ = abs(min(0, scores.get('NEGATIV_TENYEZOK', 0)))
-                    netto_pont = ossz_pozitiv - ossz_negativ
-                    
-                    # Városrész prémium szorzó alkalmazása
-                    netto_pont_adjusted = netto_pont * varosresz_info['premium_szorzo']
-                    
-                    df.at[idx, 'ossz_pozitiv_pont'] = round(ossz_pozitiv, 2)
-                    df.at[idx, 'ossz_negativ_pont'] = round(ossz_negativ, 2)
-                    df.at[idx, 'netto_szoveg_pont'] = round(netto_pont_adjusted, 2)
-                    df.at[idx, 'netto_szoveg_pont'] = round(ossz_pozitiv - ossz_negativ, 2)
-                    
-                    processed_count += 1
+            # Text feature-k generálása - közös vektorizált útvonal (offline újraszámolással azonos)
+            df = compute_text_features(df, self.location_name, google_api_key=google_api_key, analyzer=analyzer)
+            processed_count = int(df['leiras'].notna().sum()) if 'leiras' in df.columns else 0
             
             print(f"✅ Text feature-k generálva: {processed_count} ingatlanhoz")
             
-            # Enhanced CSV mentése PIPE elválasztóval
-            df.to_csv(base_filename, index=False, encoding='utf-8-sig', sep='|')
+            # Leírások a tartalom archívumba (hash szerint, futások között deduplikálva) -> leiras_hash
+            # A parquet másolat és a történet pillanatképek már csak a hash-t tárolják
+            try:
+                archive_columns(df)
+            except Exception as e:
+                print(f"⚠️ Tartalom archívum hiba: {e}")
+            
+            # Koordináták a sidecar tárba is - add_coordinates / dashboardok újrahasznosítják
+            try:
+                store = CoordinateStore()
+                stored = store.upsert_from_dataframe(df)
+                store.close()
+                if stored:
+                    print(f"📌 Koordináta tár frissítve: {stored} hirdetés")
+            except Exception as e:
+                print(f"⚠️ Koordináta tár hiba: {e}")
+            
+            # Enhanced CSV mentése PIPE elválasztóval - egyetlen írás, atomikus csere (+ oszlopos .parquet másolat)
+            atomic_write_csv(df, base_filename)
+            print(f"💾 Részletes CSV mentve (| elválasztó): {base_filename}")
+            if self.journal is not None:
+                self.journal.discard()  # a rekordok már a CSV-ben
+            write_columnar(df, base_filename)
+            register_dataset(base_filename, df)  # manifest: a dashboardok innen találják meg
+            
+            # Futás pillanatkép a hirdetés történet adatbázisba (listings + snapshots)
+            try:
+                history = ListingHistory()
+                run_id = history.record_run(df, self.location_name, source_file=base_filename,
+                                            complete=self.list_complete)
+                summary = history.run_summary(run_id)
+                history.close()
+                print(f"🗃️ Történet adatbázis frissítve: #{run_id} futás ({history.db_path})")
+                print(f"   🆕 {summary.get('uj', 0)} új | 💱 {summary.get('arvaltozas', 0)} árváltozás | "
+                      f"🚫 {summary.get('inaktiv', 0)} eltűnt | 🔁 {summary.get('visszatert', 0)} visszatért")
+            except Exception as e:
+                print(f"⚠️ Történet adatbázis hiba: {e}")
+            
+            # Hexagon ár/m² felület a CSV mellé - a dashboard térkép ezt tölti be
+            try:
+                surface_file = refresh_price_surface(df, base_filename)
+                if surface_file:
+                    print(f"🔷 Ár/m² felület mentve: {surface_file}")
+            except Exception as e:
+                print(f"⚠️ Ár/m² felület hiba: {e}")
             
-            print(f"📊 Oszlopok: {len(df.columns)} (+ {len(text_feature_columns)} text feature)")
+            print(f"📊 Oszlopok: {len(df.columns)} (+ {len(TEXT_FEATURE_COLUMNS)} text feature)")
 
             return base_filename  # Az enhanced fájlt adjuk vissza
             
         except Exception as e:
             print(f"❌ CSV mentési hiba: {e}")
+            if self.journal is not None and os.path.exists(self.journal.path):
+                print(f"💡 A scrape-elt rekordok megmaradtak: {self.journal.path}")
             import traceback
             traceback.print_exc()
             return None
@@ -2620,6 +2870,11 @@ class DetailedScraper:
     async def close(self):
         """Kapcsolat bezárása"""
         try:
+            if self.journal is not None:
+                self.journal.close()
+            if self.content_archive is not None:
+                self.content_archive.close()
+                self.content_archive = None
             if self.playwright:
                 await self.playwright.stop()
         except:
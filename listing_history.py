@@ -0,0 +1,584 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HIRDETÉS TÖRTÉNET ADATBÁZIS - FUTÁSONKÉNTI PILLANATKÉPEK
+========================================================
+
+🎯 CÉL:
+Minden scraper futás új, időbélyeges CSV-t ír, a régiek csak gyűlnek - nincs
+hirdetés szerint kulcsolt tár. Ez az adatbázis egy helyen tartja a hirdetéseket
+(`listings`, ingatlan.com azonosító szerint) és minden futás pillanatképét
+(`snapshots`: ár, státusz, részletek).
+
+Futásonként a beérkező sorokat a tárolt aktuális állapothoz hasonlítja (nem a teljes
+történethez): új hirdetés, árváltozás, eltűnés és visszatérés eseményként (`events`)
+kerül mentésre, a hirdetés sorában első / utolsó megjelenés, kezdő és előző ár.
+
+📋 HASZNÁLAT:
+    history = ListingHistory()
+    run_id = history.record_run(df, 'xi_ker', source_file='ingatlan_reszletes_xi_ker_...csv')
+    df = load_latest_listings('xi_ker')          # legutóbbi állapot, a CSV oszlopaival
+    df = attach_history(df)                      # piacon_napok, ar_valtozas_millio, arcsokkentes...
+
+python listing_history.py import "ingatlan_reszletes_*.csv"     # régi CSV-k betöltése
+python listing_history.py stats
+python listing_history.py changes --location xi_ker --days 14     # árcsökkentések, eltűnt hirdetések
+
+⚡ Jellemzők:
+- SQLite WAL módban (párhuzamos scraperek írhatnak / dashboardok olvashatnak),
+  egy futás egy tranzakció, kötegelt upsert (INSERT ... ON CONFLICT DO UPDATE)
+- Opcionálisan DuckDB: .duckdb kiterjesztésű útvonal + telepített duckdb csomag
+- Indexek: lokáció, ár, terület (listings), hirdetés + idő (snapshots)
+- A teljes sor JSON-ként (`details`) - a legutóbbi állapot a CSV oszlopaival visszaállítható;
+  a leírás helyett csak a `leiras_hash` (content_archive), betöltéskor visszaállítva
+- Teljes futás (a lista nem limitált, `complete=True`) után a lokáció nem látott hirdetései
+  'inaktiv' státuszba kerülnek; részleges futás csak a látott hirdetéseket frissíti
+
+💡 Adatbázis helye: LISTING_HISTORY_PATH környezeti változó, alapértelmezés: ingatlan_tortenet.sqlite
+"""
+
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import pandas as pd
+
+from content_archive import archive_columns, restore_archived_columns, strip_archived_columns
+from coordinate_store import listing_ids
+from dataset_io import add_parsed_columns, read_detailed_csv
+from dataset_manifest import dataset_location, run_timestamp
+
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+DEFAULT_HISTORY_PATH = 'ingatlan_tortenet.sqlite'
+STATUS_ACTIVE = 'aktiv'
+STATUS_INACTIVE = 'inaktiv'
+
+EVENT_NEW = 'uj'
+EVENT_PRICE_CHANGE = 'arvaltozas'
+EVENT_DELISTED = 'inaktiv'
+EVENT_RELISTED = 'visszatert'
+
+# Árváltozás küszöb (millió Ft) - float kerekítési zaj ne legyen esemény
+PRICE_EPSILON = 0.001
+
+# Dashboard oszlopok (attach_history) - betöltéskor csatolva, a CSV-be nem kerülnek
+HISTORY_COLUMNS = ['elso_megjelenes', 'utolso_megjelenes', 'piacon_napok', 'kezdo_ar_millio',
+                   'elozo_ar_millio', 'ar_valtozas_millio', 'ar_valtozas_szazalek',
+                   'arvaltozasok_szama', 'arcsokkentes']
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS runs (
+        run_id INTEGER PRIMARY KEY,
+        location TEXT NOT NULL,
+        source_file TEXT,
+        seen_at REAL NOT NULL,
+        row_count INTEGER NOT NULL,
+        complete INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS listings (
+        listing_id TEXT PRIMARY KEY,
+        location TEXT NOT NULL,
+        cim TEXT,
+        link TEXT,
+        teljes_ar_millio REAL,
+        terulet_m2 REAL,
+        szobak REAL,
+        status TEXT NOT NULL,
+        first_seen REAL NOT NULL,
+        last_seen REAL NOT NULL,
+        last_run_id INTEGER NOT NULL,
+        details TEXT,
+        first_price REAL,
+        prev_price REAL,
+        price_changed_at REAL,
+        price_change_count INTEGER DEFAULT 0,
+        delisted_at REAL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS snapshots (
+        run_id INTEGER NOT NULL,
+        listing_id TEXT NOT NULL,
+        seen_at REAL NOT NULL,
+        teljes_ar_millio REAL,
+        terulet_m2 REAL,
+        status TEXT NOT NULL,
+        details TEXT,
+        PRIMARY KEY (run_id, listing_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS events (
+        run_id INTEGER NOT NULL,
+        listing_id TEXT NOT NULL,
+        location TEXT NOT NULL,
+        seen_at REAL NOT NULL,
+        event TEXT NOT NULL,
+        old_price REAL,
+        new_price REAL,
+        PRIMARY KEY (run_id, listing_id, event)
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS idx_listings_location ON listings (location, status)',
+    'CREATE INDEX IF NOT EXISTS idx_listings_price ON listings (teljes_ar_millio)',
+    'CREATE INDEX IF NOT EXISTS idx_listings_area ON listings (terulet_m2)',
+    'CREATE INDEX IF NOT EXISTS idx_snapshots_listing ON snapshots (listing_id, seen_at)',
+    'CREATE INDEX IF NOT EXISTS idx_events_location ON events (location, seen_at)',
+]
+
+# Korábbi adatbázisok bővítése (tábla -> hiányzó oszlopok)
+_RUN_MIGRATIONS = {
+    'complete': 'INTEGER',      # 1: a lista a lokáció összes találatát lefedte; régi futásoknál NULL
+}
+_LISTING_MIGRATIONS = {
+    'first_price': 'REAL',
+    'prev_price': 'REAL',
+    'price_changed_at': 'REAL',
+    'price_change_count': 'INTEGER DEFAULT 0',
+    'delisted_at': 'REAL',
+}
+
+_STATE_COLUMNS = ['listing_id', 'teljes_ar_millio', 'status', 'first_price', 'prev_price',
+                  'price_changed_at', 'price_change_count']
+_QUERY_BATCH = 500
+
+_UPSERT_LISTING = """
+INSERT INTO listings (listing_id, location, cim, link, teljes_ar_millio, terulet_m2, szobak,
+                      status, first_seen, last_seen, last_run_id, details,
+                      first_price, prev_price, price_changed_at, price_change_count, delisted_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL)
+ON CONFLICT (listing_id) DO UPDATE SET
+    location = excluded.location,
+    cim = excluded.cim,
+    link = excluded.link,
+    teljes_ar_millio = excluded.teljes_ar_millio,
+    terulet_m2 = excluded.terulet_m2,
+    szobak = excluded.szobak,
+    status = excluded.status,
+    last_seen = excluded.last_seen,
+    last_run_id = excluded.last_run_id,
+    details = excluded.details,
+    first_price = COALESCE(listings.first_price, excluded.first_price),
+    prev_price = excluded.prev_price,
+    price_changed_at = excluded.price_changed_at,
+    price_change_count = excluded.price_change_count,
+    delisted_at = NULL
+"""
+
+_INSERT_SNAPSHOT = """
+INSERT OR REPLACE INTO snapshots (run_id, listing_id, seen_at, teljes_ar_millio, terulet_m2, status, details)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+_INSERT_EVENT = """
+INSERT OR REPLACE INTO events (run_id, listing_id, location, seen_at, event, old_price, new_price)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+def history_path(db_path=None):
+    """Adatbázis fájl útvonala"""
+    return db_path or os.environ.get('LISTING_HISTORY_PATH', DEFAULT_HISTORY_PATH)
+
+
+def _number(value):
+    return None if value is None or value != value else float(value)
+
+
+def _optional(value):
+    return None if value is None or value != value else value
+
+
+def diff_run(incoming, state, complete=False):
+    """Beérkező futás vs. tárolt aktuális állapot -> (hirdetés mezők, események)
+
+    `incoming`: listing_id + teljes_ar_millio oszlopok; `state`: a listings tábla érintett sorai
+    (_STATE_COLUMNS). Csak a változások generálnak eseményt; a történetet nem kell betölteni.
+    """
+    merged = incoming[['listing_id', 'teljes_ar_millio']].merge(
+        state.set_index('listing_id'), how='left', left_on='listing_id', right_index=True,
+        suffixes=('', '_elozo'), indicator=True
+    )
+    known = merged['_merge'] == 'both'
+    new_price = merged['teljes_ar_millio']
+    old_price = merged['teljes_ar_millio_elozo']
+    changed = known & new_price.notna() & old_price.notna() & ((new_price - old_price).abs() > PRICE_EPSILON)
+    relisted = known & (merged['status'] == STATUS_INACTIVE)
+
+    fields = pd.DataFrame({
+        'first_price': merged['first_price'].where(known & merged['first_price'].notna(), new_price),
+        'prev_price': old_price.where(changed, merged['prev_price']),
+        'price_changed_at': merged['price_changed_at'],
+        'price_change_count': merged['price_change_count'].fillna(0).astype(int) + changed.astype(int),
+        'changed': changed,
+    }, index=merged.index)
+
+    events = [(EVENT_NEW, merged.loc[~known, 'listing_id'], None, new_price[~known]),
+              (EVENT_PRICE_CHANGE, merged.loc[changed, 'listing_id'], old_price[changed], new_price[changed]),
+              (EVENT_RELISTED, merged.loc[relisted, 'listing_id'], old_price[relisted], new_price[relisted])]
+    if complete:
+        gone = state[(state['status'] == STATUS_ACTIVE) & ~state['listing_id'].isin(incoming['listing_id'])]
+        events.append((EVENT_DELISTED, gone['listing_id'], gone['teljes_ar_millio'], None))
+
+    event_rows = []
+    for event, ids, old, new in events:
+        old = [None] * len(ids) if old is None else [_number(v) for v in old]
+        new = [None] * len(ids) if new is None else [_number(v) for v in new]
+        event_rows.extend((listing_id, event, o, n) for listing_id, o, n in zip(ids, old, new))
+    return fields, event_rows
+
+
+def _row_details(df):
+    """Sorok JSON-ként (NaN -> null) a `details` oszlophoz - egy pandas JSON hívás, soronként egy sor"""
+    if df.empty:
+        return []
+    # Archivált leírás csak hash-ként - nem tárolódik el minden pillanatképben újra
+    df = strip_archived_columns(df)
+    # float32 séma oszlopok a rövid decimális alakjukkal (3.8, nem 3.7999999523)
+    float32_columns = [column for column in df.columns if df[column].dtype == 'float32']
+    if float32_columns:
+        df = df.astype({column: 'float64' for column in float32_columns})
+        df[float32_columns] = df[float32_columns].apply(lambda values: values.round(6))
+    # A JSON szövegekben a sortörés escape-elve van - a '\n' csak rekord határ
+    return df.to_json(orient='records', lines=True, force_ascii=False, date_format='iso').rstrip('\n').split('\n')
+
+
+class ListingHistory:
+    """Hirdetés tár + futásonkénti pillanatképek (SQLite WAL, opcionálisan DuckDB)"""
+
+    def __init__(self, db_path=None):
+        self.db_path = history_path(db_path)
+        self.backend = 'duckdb' if self.db_path.endswith('.duckdb') and DUCKDB_AVAILABLE else 'sqlite'
+        self._lock = threading.Lock()
+        if self.backend == 'duckdb':
+            self._conn = duckdb.connect(self.db_path)
+        else:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=60)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._begin()
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        existing = {}
+        for table, migrations in (('runs', _RUN_MIGRATIONS), ('listings', _LISTING_MIGRATIONS)):
+            existing[table] = {row[1] for row in self._conn.execute(f"PRAGMA table_info('{table}')").fetchall()}
+            for column, column_type in migrations.items():
+                if column not in existing[table]:
+                    self._conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {column_type}')
+        if 'first_price' not in existing['listings']:
+            # Kezdő ár a legkorábbi pillanatképből (egyszeri visszatöltés)
+            self._conn.execute('UPDATE listings SET first_price = (SELECT s.teljes_ar_millio FROM snapshots s '
+                               'WHERE s.listing_id = listings.listing_id ORDER BY s.seen_at LIMIT 1)')
+        self._conn.commit()
+
+    def _begin(self):
+        # sqlite3 az első írásnál magától nyit tranzakciót, DuckDB autocommit módban van
+        if self.backend == 'duckdb':
+            self._conn.begin()
+
+    def _current_state(self, ids, location):
+        """A futás hirdetéseinek + a lokáció aktív hirdetéseinek tárolt állapota (tranzakción belül)"""
+        select = f"SELECT {', '.join(_STATE_COLUMNS)} FROM listings"
+        rows = self._conn.execute(f'{select} WHERE location = ? AND status = ?',
+                                  (location, STATUS_ACTIVE)).fetchall()
+        for start in range(0, len(ids), _QUERY_BATCH):
+            batch = ids[start:start + _QUERY_BATCH]
+            rows += self._conn.execute(f"{select} WHERE listing_id IN ({','.join('?' * len(batch))})",
+                                       batch).fetchall()
+        state = pd.DataFrame(rows, columns=_STATE_COLUMNS).drop_duplicates('listing_id')
+        for column in ('teljes_ar_millio', 'first_price', 'prev_price', 'price_changed_at', 'price_change_count'):
+            state[column] = pd.to_numeric(state[column], errors='coerce').astype(float)
+        return state
+
+    def query(self, sql, params=()):
+        """Lekérdezés DataFrame-be (mindkét backenden)"""
+        with self._lock:
+            if self.backend == 'duckdb':
+                return self._conn.execute(sql, list(params)).df()
+            return pd.read_sql_query(sql, self._conn, params=list(params))
+
+    def record_run(self, df, location, source_file=None, seen_at=None, complete=False):
+        """Egy futás eredményének mentése (egy tranzakció) - visszaadja a run_id-t
+
+        `complete=True` csak akkor, ha a lista a lokáció összes találatát lefedte (nem vágta le
+        a limit): ekkor a lokáció ebben a futásban nem látott aktív hirdetései inaktívvá válnak.
+        Részleges futás (alap) csak új / árváltozás / visszatérés eseményt ír. A jelző a `runs`
+        táblában is rögzül.
+        """
+        seen_at = time.time() if seen_at is None else float(seen_at)
+        ids = listing_ids(df)
+        rows = df[ids.notna()].copy()
+        rows['_listing_id'] = ids[ids.notna()]
+        rows = rows.drop_duplicates('_listing_id', keep='last')
+        parsed = add_parsed_columns(rows.drop(columns='_listing_id'))
+        details = _row_details(rows.drop(columns='_listing_id'))
+
+        prices = [_number(v) for v in parsed.get('teljes_ar_millió', pd.Series(None, index=rows.index))]
+        areas = [_number(v) for v in parsed.get('terulet_szam', pd.Series(None, index=rows.index))]
+        rooms = [_number(v) for v in parsed.get('szobak_szam', pd.Series(None, index=rows.index))]
+        cims = rows['cim'].astype(object).where(rows['cim'].notna(), None).tolist() if 'cim' in rows else [None] * len(rows)
+        links = rows['link'].astype(str).tolist() if 'link' in rows else [None] * len(rows)
+        listing_keys = rows['_listing_id'].astype(str).tolist()
+
+        # Explicit object dtype: üres futásnál sem lesz float a listing_id (a merge különben hibát dob)
+        incoming = pd.DataFrame({'listing_id': pd.Series(listing_keys, dtype=object),
+                                 'teljes_ar_millio': pd.Series(prices, dtype=float)})
+
+        with self._lock:
+            self._begin()
+            try:
+                conn = self._conn
+                conn.execute('INSERT INTO runs (run_id, location, source_file, seen_at, row_count, complete) '
+                             'VALUES ((SELECT COALESCE(MAX(run_id), 0) + 1 FROM runs), ?, ?, ?, ?, ?)',
+                             (location, source_file, seen_at, len(rows), int(bool(complete))))
+                run_id = conn.execute('SELECT MAX(run_id) FROM runs').fetchone()[0]
+
+                # Diff az aktuális állapothoz: a futás hirdetései + a lokáció aktív hirdetései
+                fields, event_rows = diff_run(incoming, self._current_state(listing_keys, location), complete)
+                changed_at = fields['price_changed_at'].where(~fields['changed'], seen_at)
+                conn.executemany(_UPSERT_LISTING, [
+                    (listing_id, location, cim, link, price, area, room, STATUS_ACTIVE, seen_at, seen_at, run_id,
+                     detail, _number(first), _number(prev), _number(at), int(count))
+                    for listing_id, cim, link, price, area, room, detail, first, prev, at, count
+                    in zip(listing_keys, cims, links, prices, areas, rooms, details, fields['first_price'],
+                           fields['prev_price'], changed_at, fields['price_change_count'])
+                ])
+                conn.executemany(_INSERT_SNAPSHOT, [
+                    (run_id, listing_id, seen_at, price, area, STATUS_ACTIVE, detail)
+                    for listing_id, price, area, detail in zip(listing_keys, prices, areas, details)
+                ])
+                delisted = [listing_id for listing_id, event, _, _ in event_rows if event == EVENT_DELISTED]
+                if delisted:
+                    conn.executemany('UPDATE listings SET status = ?, delisted_at = ? WHERE listing_id = ?',
+                                     [(STATUS_INACTIVE, seen_at, listing_id) for listing_id in delisted])
+                if event_rows:
+                    conn.executemany(_INSERT_EVENT, [(run_id, listing_id, location, seen_at, event, old, new)
+                                                     for listing_id, event, old, new in event_rows])
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return run_id
+
+    def latest_listings(self, location=None, include_inactive=False):
+        """Legutóbbi állapot a CSV oszlopaival (details JSON-ból) - lokációra szűrve"""
+        conditions, params = [], []
+        if location is not None:
+            conditions.append('location = ?')
+            params.append(location)
+        if not include_inactive:
+            conditions.append('status = ?')
+            params.append(STATUS_ACTIVE)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        rows = self.query(f'SELECT listing_id, details FROM listings {where} ORDER BY first_seen, listing_id', params)
+        if rows.empty:
+            return pd.DataFrame()
+        return restore_archived_columns(pd.DataFrame([json.loads(detail) for detail in rows['details']]))
+
+    def listing_snapshots(self, listing_id):
+        """Egy hirdetés összes pillanatképe időrendben"""
+        return self.query('SELECT run_id, seen_at, teljes_ar_millio, terulet_m2, status FROM snapshots '
+                          'WHERE listing_id = ? ORDER BY seen_at', (str(listing_id),))
+
+    def listing_state(self, ids):
+        """Hirdetések tárolt állapota (első / utolsó megjelenés, árak) - listing_id indexszel"""
+        ids = [str(i) for i in dict.fromkeys(ids) if i]
+        frames = [self.query('SELECT listing_id, teljes_ar_millio, first_seen, last_seen, first_price, prev_price, '
+                             'price_changed_at, price_change_count, status, delisted_at FROM listings '
+                             f"WHERE listing_id IN ({','.join('?' * len(ids[start:start + _QUERY_BATCH]))})",
+                             ids[start:start + _QUERY_BATCH])
+                  for start in range(0, len(ids), _QUERY_BATCH)]
+        if not frames:
+            return pd.DataFrame(columns=['teljes_ar_millio', 'first_seen', 'last_seen', 'first_price', 'prev_price',
+                                         'price_changed_at', 'price_change_count', 'status', 'delisted_at'],
+                                index=pd.Index([], name='listing_id'))
+        return pd.concat(frames).set_index('listing_id')
+
+    def run_summary(self, run_id):
+        """Egy futás eseményeinek száma típusonként ({'uj': 12, 'arvaltozas': 3, ...})"""
+        counts = self.query('SELECT event, COUNT(*) AS darab FROM events WHERE run_id = ? GROUP BY event', (run_id,))
+        return dict(zip(counts['event'], counts['darab'].astype(int)))
+
+    def recent_events(self, location=None, since=None, events=None):
+        """Események (új, árváltozás, eltűnt, visszatért) időrendben visszafelé, szűrhetően"""
+        conditions, params = [], []
+        if location is not None:
+            conditions.append('e.location = ?')
+            params.append(location)
+        if since is not None:
+            conditions.append('e.seen_at >= ?')
+            params.append(float(since))
+        if events:
+            conditions.append(f"e.event IN ({','.join('?' * len(events))})")
+            params.extend(events)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return self.query(f"""
+            SELECT e.seen_at, e.location, e.event, e.listing_id, l.cim, e.old_price, e.new_price, l.link
+            FROM events e LEFT JOIN listings l ON l.listing_id = e.listing_id
+            {where} ORDER BY e.seen_at DESC, e.event, e.listing_id
+        """, params)
+
+    def stats(self):
+        """Lokációnkénti összesítő: hirdetések, aktívak, futások, utolsó futás"""
+        return self.query("""
+            SELECT l.location,
+                   COUNT(*) AS hirdetes,
+                   SUM(CASE WHEN l.status = ? THEN 1 ELSE 0 END) AS aktiv,
+                   (SELECT COUNT(*) FROM runs r WHERE r.location = l.location) AS futas,
+                   (SELECT COUNT(*) FROM runs r WHERE r.location = l.location AND r.complete = 1) AS teljes_futas,
+                   MAX(l.last_seen) AS utolso_futas
+            FROM listings l GROUP BY l.location ORDER BY l.location
+        """, (STATUS_ACTIVE,))
+
+    def close(self):
+        """Adatbázis kapcsolat bezárása"""
+        with self._lock:
+            self._conn.close()
+
+
+def load_latest_listings(location=None, db_path=None, include_inactive=False):
+    """Legutóbbi állapot betöltése - None, ha nincs adatbázis (olvasáskor nem jön létre üres DB)"""
+    path = history_path(db_path)
+    if not os.path.exists(path):
+        return None
+    history = ListingHistory(path)
+    try:
+        df = history.latest_listings(location, include_inactive=include_inactive)
+    finally:
+        history.close()
+    return df if not df.empty else None
+
+
+def attach_history(df, db_path=None):
+    """Piaci történet oszlopok (HISTORY_COLUMNS) csatolása betöltéskor - adatbázis nélkül változatlan df"""
+    path = history_path(db_path)
+    if df.empty or 'link' not in df.columns or not os.path.exists(path):
+        return df
+
+    ids = listing_ids(df)
+    history = ListingHistory(path)
+    try:
+        state = history.listing_state(ids.dropna())
+    finally:
+        history.close()
+    if state.empty:
+        return df
+
+    df = df.copy()
+    found = state.reindex(ids.where(ids.notna(), ''))
+    found.index = df.index
+    first_seen = pd.to_datetime(found['first_seen'].astype(float), unit='s')
+    last_seen = pd.to_datetime(found['last_seen'].astype(float), unit='s')
+    current = found['teljes_ar_millio'].astype(float)
+    first_price = found['first_price'].astype(float)
+    change = (current - first_price).round(3)
+
+    df['elso_megjelenes'] = first_seen.dt.normalize()
+    df['utolso_megjelenes'] = last_seen.dt.normalize()
+    df['piacon_napok'] = (last_seen - first_seen).dt.days.astype('Int32')
+    df['kezdo_ar_millio'] = first_price
+    df['elozo_ar_millio'] = found['prev_price'].astype(float)
+    df['ar_valtozas_millio'] = change
+    df['ar_valtozas_szazalek'] = (change / first_price.where(first_price > 0) * 100).round(1)
+    df['arvaltozasok_szama'] = found['price_change_count'].astype('Int32')
+    df['arcsokkentes'] = (change < -PRICE_EPSILON).fillna(False).astype(bool)
+    return df
+
+
+def import_csv_files(patterns, db_path=None, complete=False):
+    """Régi CSV-k betöltése időrendben (fájlonként egy futás) - visszaadja a betöltött fájlok számát
+
+    A régi futásokat a lista limit vághatta - alapból részleges futásként töltődnek (nincs eltűnés esemény).
+    """
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        files.extend(f for f in matches if f not in files and os.path.exists(f))
+
+    history = ListingHistory(db_path)
+    imported = 0
+    try:
+        for csv_file in sorted(files, key=run_timestamp):
+            df = read_detailed_csv(csv_file)
+            # Lista CSV (leírás nélkül) csak részleges kép - a részletes futás a mérvadó
+            if 'link' not in df.columns or not {'leiras', 'leiras_hash'} & set(df.columns):
+                print(f"⏭️  Kihagyva (nem részletes CSV): {csv_file}")
+                continue
+            location = dataset_location(csv_file)  # pontos lokáció kulcs - ugyanaz, mint a manifesté
+            archive_columns(df)  # leírás a tartalom archívumba - a pillanatképekben csak a hash
+            run_id = history.record_run(df, location, source_file=csv_file, seen_at=run_timestamp(csv_file),
+                                        complete=complete)
+            imported += 1
+            print(f"📥 #{run_id} {location}: {len(df)} sor <- {csv_file}")
+    finally:
+        history.close()
+    return imported
+
+
+def main():
+    """Régi CSV-k importálása / összesítő"""
+    parser = argparse.ArgumentParser(description='Hirdetés történet adatbázis (listings + snapshots)')
+    parser.add_argument('command', choices=['import', 'stats', 'changes'])
+    parser.add_argument('inputs', nargs='*', help="CSV fájlok vagy glob minták (import)")
+    parser.add_argument('--location', default=None, help="Lokáció szűrő (changes)")
+    parser.add_argument('--days', type=int, default=30, help="Visszatekintés napokban (changes, alap: 30)")
+    parser.add_argument('--complete', action='store_true',
+                        help="Az importált CSV-k a lokáció összes találatát tartalmazzák (import: eltűnés követés)")
+    parser.add_argument('--db', default=None, help=f"Adatbázis (alap: LISTING_HISTORY_PATH vagy {DEFAULT_HISTORY_PATH})")
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        if not args.inputs:
+            parser.error('import: legalább egy CSV fájl vagy glob minta kell')
+        imported = import_csv_files(args.inputs, args.db, complete=args.complete)
+        print(f"\n✅ {imported} fájl betöltve: {history_path(args.db)}")
+        if not imported:
+            sys.exit(1)
+
+    if args.command == 'changes':
+        if not os.path.exists(history_path(args.db)):
+            print(f"❌ Nincs adatbázis: {history_path(args.db)}")
+            sys.exit(1)
+        history = ListingHistory(args.db)
+        try:
+            events = history.recent_events(args.location, since=time.time() - args.days * 86400,
+                                           events=[EVENT_PRICE_CHANGE, EVENT_DELISTED, EVENT_RELISTED])
+        finally:
+            history.close()
+        if events.empty:
+            print(f"📭 Nincs változás az elmúlt {args.days} napban")
+            return
+        events['seen_at'] = pd.to_datetime(events['seen_at'], unit='s').dt.strftime('%Y-%m-%d')
+        print(events.drop(columns='link').to_string(index=False))
+        drops = pd.to_numeric(events['new_price']) < pd.to_numeric(events['old_price'])
+        print(f"\n📉 {drops.sum()} árcsökkentés | "
+              f"🚫 {(events['event'] == EVENT_DELISTED).sum()} eltűnt | "
+              f"🔁 {(events['event'] == EVENT_RELISTED).sum()} visszatért")
+        return
+
+    history = ListingHistory(args.db)
+    try:
+        stats = history.stats()
+    finally:
+        history.close()
+    if stats.empty:
+        print("📭 Üres adatbázis")
+        return
+    stats['utolso_futas'] = pd.to_datetime(stats['utolso_futas'], unit='s').dt.strftime('%Y-%m-%d %H:%M')
+    print(stats.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KANONIKUS ÁR / TERÜLET / SZOBA / TELEK PARSE-OLÁS - VEKTORIZÁLTAN, EGYSZER INGESTKOR
+===================================================================================
+
+🎯 CÉL:
+Az ingatlan.com szöveges értékei ('263,80 M Ft', '1,2 Mrd Ft', '2 216 806 Ft / m2',
+'1 200 m2', '4 + 1 fél') egyetlen helyen kerülnek számmá alakításra. A scraper
+mentéskor hozzáadja a parse-olt oszlopokat a CSV-hez, így sem a dashboardok, sem
+a feature lépések nem parse-olnak újra.
+
+📋 HASZNÁLAT:
+    add_parsed_columns(df, refresh=True)        # ingest: minden parse-olt oszlop újraszámolva
+    add_parsed_columns(df)                      # olvasás: csak a hiányzók (régi CSV)
+    parse_price_huf(df['teljes_ar'])            # Int64 Ft
+    price_huf_value('1,2 Mrd Ft')               # 1200000000 (egy érték, scraperhez)
+
+⚡ Szabályok:
+- Ár: ezres tagolás szóközzel / nem törő szóközzel, tizedes vessző, M / Mrd / E szorzó -> egész Ft
+- Terület / telek: '85,5 m2', '1 200 m²' -> m² (float32)
+- Szoba: '3', '2,5', '4 + 1 fél' (fél szoba = 0.5) -> tört szobaszám (float32)
+- Minden függvény egész oszlopon fut (str.extract) - nincs soronkénti .apply
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# Szám ezres tagolással (szóköz, nem törő / keskeny szóköz) és opcionális tizedes résszel
+_NUMBER = r'(\d{1,3}(?:[   ]\d{3})+|\d+)(?:[.,](\d+))?'
+PRICE_PATTERN = _NUMBER + r'\s*(Mrd|M|E)?\s*Ft'
+AREA_PATTERN = _NUMBER + r'\s*m'
+ROOMS_PATTERN = r'^\s*(\d+)(?:[.,](\d+))?(?:\s*\+\s*(\d+)\s*fél)?'
+
+PRICE_MULTIPLIERS = {'Mrd': 1_000_000_000, 'M': 1_000_000, 'E': 1_000}
+
+_PRICE_RE = re.compile(PRICE_PATTERN)
+_AREA_RE = re.compile(AREA_PATTERN)
+_SEPARATORS_RE = re.compile(r'[   ]')
+
+
+def _as_text(values):
+    return values.astype('string')
+
+
+def _number(integer, fraction):
+    """Egész + tizedes rész (str.extract csoportok) -> float"""
+    whole = pd.to_numeric(integer.str.replace(r'[   ]', '', regex=True), errors='coerce')
+    decimals = pd.to_numeric('0.' + fraction.fillna('0'), errors='coerce')
+    return (whole + decimals).astype(float)
+
+
+def parse_price_huf(values):
+    """'263,80 M Ft' / '1,2 Mrd Ft' / '2 216 806 Ft / m2' -> egész Ft (Int64)"""
+    parts = _as_text(values).str.extract(PRICE_PATTERN)
+    multiplier = parts[2].map(PRICE_MULTIPLIERS).astype(float).fillna(1.0)
+    return (_number(parts[0], parts[1]) * multiplier).round().astype('Int64')
+
+
+def parse_area_m2(values):
+    """'119 m2' / '85,5 m²' / '1 200 m2' -> m² (float32)"""
+    parts = _as_text(values).str.extract(AREA_PATTERN)
+    return _number(parts[0], parts[1]).astype(np.float32)
+
+
+def parse_rooms(values):
+    """'3' / '2,5' / '4 + 1 fél' -> 3.0 / 2.5 / 4.5 szoba (float32)"""
+    parts = _as_text(values).str.extract(ROOMS_PATTERN)
+    halves = pd.to_numeric(parts[2], errors='coerce').fillna(0) * 0.5
+    return (_number(parts[0], parts[1]) + halves).astype(np.float32)
+
+
+def parse_price_millions(values):
+    """Ár millió Ft-ban (float) - a dashboardok szűrő / grafikon oszlopa"""
+    return parse_price_huf(values).astype(float) / 1_000_000
+
+
+# Parse-olt oszlop -> (forrás oszlop, parser)
+PARSED_COLUMNS = {
+    'teljes_ar_ft': ('teljes_ar', parse_price_huf),
+    'teljes_ar_millió': ('teljes_ar', parse_price_millions),
+    'nm_ar_ft': ('nm_ar', parse_price_huf),
+    'terulet_szam': ('terulet', parse_area_m2),
+    'telek_m2': ('telekterulet', parse_area_m2),
+    'szobak_szam': ('szobak', parse_rooms),
+}
+
+
+def add_parsed_columns(df, refresh=False):
+    """Parse-olt szám oszlopok hozzáadása (helyben), ahol a forrás oszlop megvan
+
+    `refresh=False`: csak a hiányzó oszlopok (a CSV-ben tárolt értéket nem parse-olja újra).
+    """
+    for column, (source, parser) in PARSED_COLUMNS.items():
+        if source in df.columns and (refresh or column not in df.columns):
+            df[column] = parser(df[source])
+    return df
+
+
+def _scalar(pattern_re, text):
+    match = pattern_re.search(str(text)) if text is not None else None
+    if not match:
+        return None
+    value = float(_SEPARATORS_RE.sub('', match.group(1)))
+    if match.group(2):
+        value += float('0.' + match.group(2))
+    return value, match
+
+
+def price_huf_value(text):
+    """Egy ár szöveg -> egész Ft (None, ha nem értelmezhető)"""
+    parsed = _scalar(_PRICE_RE, text)
+    if parsed is None:
+        return None
+    value, match = parsed
+    return int(round(value * PRICE_MULTIPLIERS.get(match.group(3), 1)))
+
+
+def area_m2_value(text):
+    """Egy terület szöveg -> m² (None, ha nem értelmezhető)"""
+    parsed = _scalar(_AREA_RE, text)
+    return parsed[0] if parsed else None
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TÉRKÉP RÉTEGEK - KLASZTEREZETT GEOJSON PONTOK, CACHE-ELT TÉRKÉP, RÁCS AGGREGÁLÁS
+================================================================================
+
+🎯 CÉL:
+A dashboardok `create_interactive_map` függvénye ne soronként (iterrows) rakjon
+fel egy-egy teljes HTML popupos markert, és ne építse újra a térképet minden
+Streamlit rerun-nál - több ezer hirdetésnél a generált HTML több MB, a böngésző megakad.
+
+📋 HASZNÁLAT:
+    def build_map():
+        m = folium.Map(location=[lat, lng], zoom_start=12, prefer_canvas=True)
+        mode = add_listing_markers(
+            m, map_df,
+            popup_fields=[('💰 Ár', 'teljes_ar'), ('📐 Terület', 'terulet')],
+            colors=price_colors(map_df['teljes_ar_millió']),
+            links=map_df['link'],
+        )
+        return m, mode
+    m, mode = cached_map((location_name, index_fingerprint(map_df.index)), build_map)
+
+⚡ Működés:
+- A hirdetések tulajdonságai egyetlen GeoJSON FeatureCollection-ként épülnek
+  (oszloponként vektorizáltan), és `FastMarkerCluster`-be kerülnek: a klaszterezés
+  zoom szint szerint a böngészőben fut, a popup csak kattintáskor épül (JS callback)
+  a nyers tulajdonságokból - nincs soronkénti folium objektum és popup HTML
+- `cached_map`: a kész térkép a szűrt index halmaz hash-e (+ réteg beállítások)
+  szerint cache-elve - ha a szűrés nem változik (pl. csak a scatter plot változója),
+  nincs újraépítés
+- `MAX_CLUSTER_POINTS` felett szerver oldali rács aggregálás: cellánként egy kör
+  (darabszám + medián ár), a cellaméret az adatkészlet kiterjedéséből
+- `add_price_surface_layer`: előre számolt hexagon ár/m² felület (price_hexbin)
+  egyetlen GeoJSON choropleth rétegként, kapcsolható FeatureGroup-ban
+"""
+
+import html
+import json
+import math
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+try:
+    import folium
+    from folium.plugins import FastMarkerCluster
+    FOLIUM_AVAILABLE = True
+except ImportError:
+    FOLIUM_AVAILABLE = False
+
+# Efölött a pontok már rács cellákba aggregálva kerülnek a térképre
+MAX_CLUSTER_POINTS = 20000
+GRID_CELLS = 64
+
+# Ár alapú színkódolás (M Ft felső határ, szín) - a dashboard legendákkal egyező
+PRICE_COLOR_BINS = [(100, '#2ECC71'), (200, '#F39C12'), (300, '#E74C3C')]
+PRICE_COLOR_MAX = '#8E44AD'
+PRICE_COLOR_MISSING = '#95A5A6'
+
+# Ár/m² felület színskála (olcsó -> drága), a cellák mediánjának kvantilisei szerint
+SURFACE_PALETTE = ['#1A9850', '#91CF60', '#D9EF8B', '#FEE08B', '#FC8D59', '#D73027']
+
+CLUSTER_OPTIONS = {
+    'chunkedLoading': True,
+    'disableClusteringAtZoom': 17,
+    'maxClusterRadius': 60,
+    'spiderfyOnMaxZoom': False,
+}
+
+# Lusta popup: [lat, lng, tulajdonságok] pontból, a popup kattintáskor épül fel
+_CALLBACK_TEMPLATE = """function (row) {
+    var labels = %(labels)s;
+    var props = row[2];
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {
+        radius: 8,
+        color: props.kiemelt ? '%(highlight_color)s' : 'white',
+        weight: props.kiemelt ? 3 : 2,
+        fillColor: props.szin,
+        fillOpacity: 0.8
+    });
+    marker.bindTooltip(props.cim);
+    marker.on('click', function () {
+        if (marker.getPopup()) { return; }
+        var content = "<div style='width: 250px; font-family: Arial;'><b>" + props.cim + "</b><hr style='margin: 5px 0;'>";
+        for (var i = 0; i < labels.length; i++) {
+            var value = props['mezo_' + i];
+            if (value !== '') { content += '<b>' + labels[i] + ':</b> ' + value + '<br>'; }
+        }
+        if (props.link) {
+            content += "<a href='" + props.link + "' target='_blank' style='color: #2E86AB;'>%(link_label)s</a>";
+        }
+        marker.bindPopup(content + '</div>', {maxWidth: 300}).openPopup();
+    });
+    return marker;
+}"""
+
+_MAP_CACHE_SIZE = 8
+_map_cache = OrderedDict()
+
+
+def price_colors(prices, bins=PRICE_COLOR_BINS, max_color=PRICE_COLOR_MAX, missing_color=PRICE_COLOR_MISSING):
+    """Ár (M Ft) -> szín, vektorizáltan"""
+    values = pd.to_numeric(pd.Series(prices), errors='coerce').to_numpy(dtype=float)
+    conditions = [np.isnan(values)] + [values <= limit for limit, _ in bins]
+    choices = [missing_color] + [color for _, color in bins]
+    return pd.Series(np.select(conditions, choices, default=max_color), index=pd.Series(prices).index)
+
+
+def _text_column(df, field):
+    """Popup mező -> HTML-escape-elt szöveg oszlop (oszlopnév vagy kész Series)"""
+    if isinstance(field, str):
+        values = df[field] if field in df.columns else pd.Series('', index=df.index)
+    else:
+        values = pd.Series(field, index=df.index)
+    text = values.astype(object).where(values.notna(), '')
+    unique = {value: html.escape(str(value)) for value in pd.unique(text)}
+    return text.map(unique)
+
+
+def listing_features(df, popup_fields, colors=None, links=None, title='cim', highlight=None):
+    """Hirdetések egyetlen GeoJSON FeatureCollection-ként - tulajdonságok oszloponként vektorizáltan
+
+    Tulajdonságok: szin, cim, mezo_0..mezo_N (popup mezők), link (escape-elt URL), kiemelt.
+    """
+    lats = pd.to_numeric(df['geo_latitude'], errors='coerce').round(6)
+    lngs = pd.to_numeric(df['geo_longitude'], errors='coerce').round(6)
+    properties = pd.DataFrame({
+        'szin': pd.Series(colors if colors is not None else PRICE_COLOR_MISSING, index=df.index),
+        'cim': _text_column(df, title).str.slice(0, 80),
+        **{f"mezo_{i}": _text_column(df, field) for i, (_, field) in enumerate(popup_fields)},
+        'link': _text_column(df, links if links is not None else pd.Series('', index=df.index)),
+        'kiemelt': pd.Series(highlight if highlight is not None else False,
+                             index=df.index).fillna(False).astype(bool),
+    }, index=df.index)
+
+    valid = (lats.notna() & lngs.notna()).to_numpy()
+    features = [
+        {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [lng, lat]}, 'properties': props}
+        for lng, lat, props in zip(lngs[valid].tolist(), lats[valid].tolist(),
+                                   properties[valid].to_dict('records'))
+    ]
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def aggregate_grid(df, prices=None, cells=GRID_CELLS):
+    """Szerver oldali rács aggregálás: cellánként darabszám, középpont, medián ár"""
+    lats = pd.to_numeric(df['geo_latitude'], errors='coerce')
+    lngs = pd.to_numeric(df['geo_longitude'], errors='coerce')
+    frame = pd.DataFrame({'lat': lats, 'lng': lngs,
+                          'price': pd.to_numeric(pd.Series(prices, index=df.index), errors='coerce')
+                          if prices is not None else np.nan}).dropna(subset=['lat', 'lng'])
+    if frame.empty:
+        return pd.DataFrame(columns=['lat', 'lng', 'count', 'median_price'])
+
+    # Közel négyzetes cellák: a hosszúsági lépés a szélesség koszinuszával nyújtva
+    cos_lat = math.cos(math.radians(frame['lat'].mean()))
+    extent = max(frame['lat'].max() - frame['lat'].min(), (frame['lng'].max() - frame['lng'].min()) * cos_lat)
+    cell = max(extent / cells, 1e-4)
+    frame['cell_y'] = np.floor((frame['lat'] - frame['lat'].min()) / cell).astype(int)
+    frame['cell_x'] = np.floor((frame['lng'] - frame['lng'].min()) * cos_lat / cell).astype(int)
+    grouped = frame.groupby(['cell_y', 'cell_x'])
+    return pd.DataFrame({
+        'lat': grouped['lat'].mean(),
+        'lng': grouped['lng'].mean(),
+        'count': grouped.size(),
+        'median_price': grouped['price'].median(),
+    }).reset_index(drop=True)
+
+
+def add_grid_aggregates(m, grid, price_bins=PRICE_COLOR_BINS):
+    """Rács cellák körökként (méret ~ darabszám, szín ~ medián ár), tooltippal"""
+    colors = price_colors(grid['median_price'], bins=price_bins)
+    max_count = max(int(grid['count'].max()), 1) if len(grid) else 1
+    for lat, lng, count, median_price, color in zip(grid['lat'], grid['lng'], grid['count'],
+                                                   grid['median_price'], colors):
+        price_text = f"{median_price:.1f} M Ft" if median_price == median_price else 'N/A'
+        folium.CircleMarker(
+            location=[lat, lng],
+            radius=4 + 16 * math.sqrt(count / max_count),
+            tooltip=f"{count} hirdetés | medián ár: {price_text}",
+            color='white',
+            weight=1,
+            fillColor=color,
+            fillOpacity=0.7
+        ).add_to(m)
+
+
+def add_listing_markers(m, df, popup_fields, colors=None, links=None, title='cim', highlight=None,
+                        link_label='🔗 Hirdetés megnyitása', highlight_color='#2E86AB', prices=None):
+    """Hirdetések a térképre: klaszterezett GeoJSON pontok lusta popuppal vagy rács aggregátum
+
+    Visszaadja a használt módot ('cluster' / 'grid').
+    """
+    if len(df) > MAX_CLUSTER_POINTS:
+        add_grid_aggregates(m, aggregate_grid(df, prices=prices))
+        return 'grid'
+
+    collection = listing_features(df, popup_fields, colors=colors, links=links, title=title,
+                                  highlight=highlight)
+    callback = _CALLBACK_TEMPLATE % {
+        'labels': json.dumps([html.escape(label) for label, _ in popup_fields], ensure_ascii=False),
+        'highlight_color': highlight_color,
+        'link_label': html.escape(link_label),
+    }
+    points = [[lat, lng, feature['properties']]
+              for feature in collection['features']
+              for lng, lat in [feature['geometry']['coordinates']]]
+    FastMarkerCluster(points, callback=callback, options=CLUSTER_OPTIONS).add_to(m)
+    return 'cluster'
+
+
+def index_fingerprint(index):
+    """Szűrt index halmaz hash-e (sorrend független) - a térkép cache kulcs része"""
+    hashed = pd.util.hash_pandas_object(pd.Index(index).to_series(), index=False).to_numpy()
+    return len(hashed), int(hashed.sum(dtype=np.uint64)), int(np.bitwise_xor.reduce(hashed)) if len(hashed) else 0
+
+
+def cached_map(key, build):
+    """Kész térkép (a `build()` eredménye) cache-ből - csak új kulcsra épül újra"""
+    result = _map_cache.get(key)
+    if result is None:
+        result = build()
+        _map_cache[key] = result
+        while len(_map_cache) > _MAP_CACHE_SIZE:
+            _map_cache.popitem(last=False)
+    else:
+        _map_cache.move_to_end(key)
+    return result
+
+
+def surface_colors(values, palette=SURFACE_PALETTE):
+    """Érték -> szín kvantilis sávok szerint (egyenletes színeloszlás a cellák között)"""
+    values = np.asarray(values, dtype=float)
+    if not len(values):
+        return []
+    edges = np.nanquantile(values, np.linspace(0, 1, len(palette) + 1)[1:-1])
+    return [palette[i] for i in np.searchsorted(edges, values, side='right')]
+
+
+def add_price_surface_layer(m, surface, resolution, name='🔷 Ár/m² felület', min_count=1, show=True):
+    """Hexagon ár/m² felület egyetlen GeoJSON rétegként (a szín a cella tulajdonságában)
+
+    Visszaadja a megjelenített cellák számát.
+    """
+    from price_hexbin import surface_geojson
+
+    collection = surface_geojson(surface, resolution, min_count=min_count)
+    features = collection['features']
+    if not features:
+        return 0
+
+    colors = surface_colors([feature['properties']['median_ar_m2'] for feature in features])
+    for feature, color in zip(features, colors):
+        props = feature['properties']
+        props['szin'] = color
+        props['median_szoveg'] = f"{props['median_ar_m2']:,.0f} Ft/m²".replace(',', ' ')
+        props['sav_szoveg'] = (f"{props['also_kvartilis_m2']:,.0f} - "
+                               f"{props['felso_kvartilis_m2']:,.0f} Ft/m²").replace(',', ' ')
+
+    layer = folium.FeatureGroup(name=name, show=show)
+    folium.GeoJson(
+        collection,
+        style_function=lambda feature: {
+            'fillColor': feature['properties']['szin'],
+            'color': 'white',
+            'weight': 0.5,
+            'fillOpacity': 0.55,
+        },
+        tooltip=folium.GeoJsonTooltip(
+            fields=['median_szoveg', 'darab', 'sav_szoveg'],
+            aliases=['Medián ár/m²:', 'Hirdetés:', 'Középső 50%:'],
+        ),
+    ).add_to(layer)
+    layer.add_to(m)
+    return len(features)
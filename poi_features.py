@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TÁVOLSÁG FEATURE-K - LEGKÖZELEBBI ISKOLA / MEGÁLLÓ / BOLT KÖTEGBEN
+==================================================================
+
+🎯 CÉL:
+A leírás kulcsszavai (`context_modifiers`: iskola, busz, bolt...) csak azt mutatják,
+hogy a hirdető megemlítette-e - a családoknak a tényleges távolság számít.
+Ez a lépés helyi POI fájlokból minden koordinátás hirdetésre kiszámolja a
+legközelebbi pont távolságát és a sugáron belüli pontok számát.
+
+📋 HASZNÁLAT:
+    apply_poi_features(df)        # dist_<kategoria>, cnt_<kategoria>_<sugar>m oszlopok (helyben)
+
+python poi_features.py <csv_filename>
+python poi_features.py --benchmark          # 100k hirdetés x 10k POI szintetikus mérés
+
+⚡ POI fájlok (munkakönyvtár, vagy POI_PATH - os.pathsep-pel elválasztott fájlok / glob minták):
+- poi_<kategoria>.csv: lat / lng (vagy latitude / longitude, geo_latitude / geo_longitude) oszlopok
+- poi_<kategoria>.geojson: Point feature-ök; a `kategoria` tulajdonság felülírja a fájlnév szerintit
+- Kategóriánként egy KD-fa (scipy.spatial.cKDTree) a vetített POI pontokon; a lekérdezés
+  az összes hirdetésre egyszerre fut (k=1 legközelebbi + return_length sugár számlálás)
+- scipy nélkül darabolt, vektorizált numpy távolság mátrix
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from spatial_index import SCIPY_AVAILABLE, ListingSpatialIndex
+
+DEFAULT_POI_GLOB = 'poi_*.csv' + os.pathsep + 'poi_*.geojson'
+POI_RADII_M = (500, 1000)
+_NUMPY_CHUNK = 512
+
+_CATEGORY_RE = re.compile(r'^poi_(.+)\.(?:csv|geojson|json)$')
+_LAT_COLUMNS = ('lat', 'latitude', 'geo_latitude')
+_LNG_COLUMNS = ('lng', 'lon', 'longitude', 'geo_longitude')
+
+
+def _category_from_path(path):
+    """poi_iskola.csv -> 'iskola'"""
+    match = _CATEGORY_RE.match(os.path.basename(path))
+    name = match.group(1) if match else os.path.splitext(os.path.basename(path))[0]
+    return re.sub(r'\W+', '_', name.lower()).strip('_')
+
+
+def _read_poi_csv(path):
+    """POI CSV -> {kategoria: (lats, lngs)} (elválasztó automatikusan felismerve)"""
+    df = pd.read_csv(path, sep=None, engine='python', encoding='utf-8-sig')
+    columns = {col.lower(): col for col in df.columns}
+    lat_col = next((columns[c] for c in _LAT_COLUMNS if c in columns), None)
+    lng_col = next((columns[c] for c in _LNG_COLUMNS if c in columns), None)
+    if lat_col is None or lng_col is None:
+        raise ValueError(f"Nincs lat / lng oszlop: {list(df.columns)}")
+    lats = pd.to_numeric(df[lat_col], errors='coerce').to_numpy()
+    lngs = pd.to_numeric(df[lng_col], errors='coerce').to_numpy()
+    return {_category_from_path(path): (lats, lngs)}
+
+
+def _read_poi_geojson(path):
+    """POI GeoJSON (Point / MultiPoint) -> {kategoria: (lats, lngs)}"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    default = _category_from_path(path)
+    points = {}
+    for feature in data.get('features', []):
+        geometry = feature.get('geometry') or {}
+        coords = geometry.get('coordinates')
+        if geometry.get('type') == 'Point':
+            coords = [coords]
+        elif geometry.get('type') != 'MultiPoint':
+            continue
+        category = (feature.get('properties') or {}).get('kategoria') or default
+        points.setdefault(re.sub(r'\W+', '_', str(category).lower()).strip('_'), []).extend(coords)
+    return {category: (np.array([c[1] for c in coords], dtype=float), np.array([c[0] for c in coords], dtype=float))
+            for category, coords in points.items()}
+
+
+def poi_paths(patterns=None):
+    """POI fájlok listája (POI_PATH vagy alapértelmezett glob minták)"""
+    patterns = patterns or os.environ.get('POI_PATH', DEFAULT_POI_GLOB)
+    paths = []
+    for pattern in patterns.split(os.pathsep):
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        paths.extend(p for p in matches if p and os.path.exists(p) and p not in paths)
+    return paths
+
+
+@lru_cache(maxsize=4)
+def _load_pois(paths_with_mtime):
+    merged = {}
+    for path, _ in paths_with_mtime:
+        try:
+            reader = _read_poi_csv if path.lower().endswith('.csv') else _read_poi_geojson
+            for category, (lats, lngs) in reader(path).items():
+                if category in merged:
+                    lats = np.concatenate([merged[category][0], lats])
+                    lngs = np.concatenate([merged[category][1], lngs])
+                merged[category] = (lats, lngs)
+        except (OSError, ValueError, KeyError, IndexError, TypeError) as e:
+            print(f"⚠️  POI fájl hiba ({path}): {e}")
+    # Kategóriánként egy index (vetített pontok + KD-fa), üres kategória nélkül
+    indexes = {category: ListingSpatialIndex(lats, lngs) for category, (lats, lngs) in sorted(merged.items())}
+    return {category: index for category, index in indexes.items() if len(index)}
+
+
+def load_pois(patterns=None):
+    """POI indexek kategóriánként (fájl halmazonként egyszer építve) - üres dict, ha nincs POI fájl"""
+    paths = poi_paths(patterns)
+    return _load_pois(tuple((path, os.path.getmtime(path)) for path in paths))
+
+
+def nearest_and_counts(index, lats, lngs, radii=POI_RADII_M):
+    """Minden pontra: legközelebbi POI távolsága (m) és POI darabszám sugaranként - vektorizáltan"""
+    points = index.project(lats, lngs)
+    if index.tree is not None:
+        distances, _ = index.tree.query(points, k=1, workers=-1)
+        counts = [index.tree.query_ball_point(points, radius, return_length=True, workers=-1) for radius in radii]
+        return distances, counts
+
+    # numpy fallback: darabolt távolság mátrix (memória korlát)
+    distances = np.empty(len(points))
+    counts = [np.empty(len(points), dtype=np.int64) for _ in radii]
+    for start in range(0, len(points), _NUMPY_CHUNK):
+        chunk = points[start:start + _NUMPY_CHUNK]
+        matrix = np.hypot(chunk[:, None, 0] - index.points[None, :, 0], chunk[:, None, 1] - index.points[None, :, 1])
+        distances[start:start + len(chunk)] = matrix.min(axis=1)
+        for radius, count in zip(radii, counts):
+            count[start:start + len(chunk)] = (matrix <= radius).sum(axis=1)
+    return distances, counts
+
+
+def compute_poi_features(df, pois=None, radii=POI_RADII_M):
+    """dist_* / cnt_* feature DataFrame a df indexével (koordináta nélküli sor: NaN / <NA>)"""
+    pois = load_pois() if pois is None else pois
+    result = pd.DataFrame(index=df.index)
+    if not pois or not {'geo_latitude', 'geo_longitude'}.issubset(df.columns):
+        return result
+
+    lats = pd.to_numeric(df['geo_latitude'], errors='coerce').to_numpy()
+    lngs = pd.to_numeric(df['geo_longitude'], errors='coerce').to_numpy()
+    valid = np.isfinite(lats) & np.isfinite(lngs)
+    for category, index in pois.items():
+        distances = np.full(len(df), np.nan, dtype=np.float32)
+        counts = [pd.array([pd.NA] * len(df), dtype='Int32') for _ in radii]
+        if valid.any():
+            nearest, within = nearest_and_counts(index, lats[valid], lngs[valid], radii)
+            distances[valid] = np.round(nearest)
+            for count, values in zip(counts, within):
+                count[valid] = values
+        result[f"dist_{category}"] = distances
+        for radius, count in zip(radii, counts):
+            result[f"cnt_{category}_{radius}m"] = count
+    return result
+
+
+def apply_poi_features(df, pois=None, radii=POI_RADII_M):
+    """dist_* / cnt_* oszlopok hozzáadása (helyben) - POI fájl nélkül nincs változás"""
+    features = compute_poi_features(df, pois, radii)
+    for column in features.columns:
+        df[column] = features[column]
+    return df
+
+
+def benchmark(listings=100_000, pois_count=10_000, radii=POI_RADII_M):
+    """Szintetikus mérés Budapest körüli véletlen pontokon"""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'geo_latitude': rng.uniform(47.35, 47.62, listings),
+                       'geo_longitude': rng.uniform(18.92, 19.33, listings)})
+    index = ListingSpatialIndex(rng.uniform(47.35, 47.62, pois_count), rng.uniform(18.92, 19.33, pois_count))
+    start = time.perf_counter()
+    features = compute_poi_features(df, {'teszt': index}, radii)
+    elapsed = time.perf_counter() - start
+    print(f"⏱️  {listings:,} hirdetés x {pois_count:,} POI: {elapsed:.2f} s "
+          f"({'cKDTree' if SCIPY_AVAILABLE else 'numpy'}) | medián távolság: "
+          f"{np.nanmedian(features['dist_teszt']):.0f} m")
+
+
+def main():
+    """POI feature-k kiírása egy részletes CSV-re (ellenőrzéshez)"""
+    parser = argparse.ArgumentParser(description='Legközelebbi POI távolság és darabszám feature-k')
+    parser.add_argument('csv_file', nargs='?', help='Pipe elválasztós részletes CSV')
+    parser.add_argument('--benchmark', action='store_true', help='100k x 10k szintetikus mérés')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+        return
+    if not args.csv_file:
+        parser.error('csv_file vagy --benchmark szükséges')
+
+    from coordinate_store import attach_coordinates
+    from dataset_io import read_detailed_csv
+
+    pois = load_pois()
+    if not pois:
+        print(f"❌ Nincs POI fájl ({os.environ.get('POI_PATH', DEFAULT_POI_GLOB)})")
+        sys.exit(1)
+    for category, index in pois.items():
+        print(f"📍 {category}: {len(index)} pont")
+
+    df = attach_coordinates(read_detailed_csv(args.csv_file))
+    start = time.perf_counter()
+    features = compute_poi_features(df, pois)
+    print(f"\n✅ {len(df)} hirdetés, {len(features.columns)} oszlop ({(time.perf_counter() - start) * 1000:.0f} ms)")
+    print(features.describe().T[['count', 'mean', '50%', 'max']].round(1).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HEXAGON ÁR/M² FELÜLET - ELŐRE SZÁMOLT AGGREGÁTUM LOKÁCIÓNKÉNT
+============================================================
+
+🎯 HASZNÁLAT:
+python price_hexbin.py <csv_filename> [--resolutions 250 500 1000]
+
+📋 PÉLDA:
+python price_hexbin.py ingatlan_reszletes_budaors_20250822_220240_koordinatak_20250822_221556.csv
+    surface = compute_price_surface(df)                 # DataFrame: felbontás, cella, medián, db, szórás
+    surface = load_price_surface(csv_file, df)          # artefaktum, ha friss; különben számol
+    features = surface_geojson(surface, 500)            # egyetlen choropleth réteghez
+
+⚡ Működés:
+1. Koordinátás hirdetések ár/m² értéke (nm_ar_ft, vagy teljes_ar_ft / terulet_szam) vektorizáltan
+2. Helyi méteres vetület -> hegyes tetejű hexagon rács (axiális q, r koordináták,
+   kocka-kerekítés numpy-val) több felbontásban (hexagon sugár méterben)
+3. Cellánként darabszám, medián ár/m², alsó/felső kvartilis és szórás (groupby)
+4. Kompakt artefaktum a CSV mellé: <csv>_arfelulet.parquet (pyarrow nélkül .csv)
+"""
+
+import argparse
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from dataset_io import PARQUET_AVAILABLE
+from listing_parsers import add_parsed_columns
+
+DEFAULT_RESOLUTIONS = (250, 500, 1000)
+EARTH_RADIUS_M = 6371008.8
+SURFACE_COLUMNS = ['felbontas_m', 'q', 'r', 'lat', 'lng', 'darab',
+                   'median_ar_m2', 'also_kvartilis_m2', 'felso_kvartilis_m2', 'szoras_m2']
+
+_SQRT3 = math.sqrt(3)
+
+
+def price_per_m2(df):
+    """Ár/m² (Ft) vektorizáltan: nm_ar_ft oszlopból, hiányában teljes_ar_ft / terulet_szam
+
+    Ingest előtti CSV-nél a hiányzó parse-olt oszlopok itt pótlódnak (listing_parsers).
+    """
+    parsed = add_parsed_columns(df[[c for c in ('teljes_ar', 'nm_ar', 'terulet', 'teljes_ar_ft', 'nm_ar_ft',
+                                                'terulet_szam') if c in df.columns]].copy())
+    result = pd.Series(np.nan, index=df.index)
+    if 'nm_ar_ft' in parsed.columns:
+        result = parsed['nm_ar_ft'].astype(float)
+    if {'teljes_ar_ft', 'terulet_szam'}.issubset(parsed.columns):
+        area = parsed['terulet_szam'].astype(float)
+        result = result.fillna(parsed['teljes_ar_ft'].astype(float) / area.where(area > 0))
+    return result.where(result > 0)
+
+
+def project(lats, lngs, origin):
+    """WGS84 -> helyi síkkoordináták (méter) az origó körül"""
+    cos_lat = math.cos(math.radians(origin[0]))
+    x = np.radians(np.asarray(lngs, dtype=float) - origin[1]) * EARTH_RADIUS_M * cos_lat
+    y = np.radians(np.asarray(lats, dtype=float) - origin[0]) * EARTH_RADIUS_M
+    return x, y
+
+
+def unproject(x, y, origin):
+    """Helyi síkkoordináták (méter) -> WGS84"""
+    cos_lat = math.cos(math.radians(origin[0]))
+    lats = origin[0] + np.degrees(np.asarray(y) / EARTH_RADIUS_M)
+    lngs = origin[1] + np.degrees(np.asarray(x) / (EARTH_RADIUS_M * cos_lat))
+    return lats, lngs
+
+
+def hex_cells(x, y, size):
+    """Pontok -> hegyes tetejű hexagon cella (axiális q, r), kocka-kerekítéssel"""
+    q = (_SQRT3 / 3 * x - y / 3) / size
+    r = (2 / 3 * y) / size
+    s = -q - r
+    rq, rr, rs = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+    return rq.astype(np.int64), rr.astype(np.int64)
+
+
+def hex_centers(q, r, size):
+    """Axiális cella -> középpont (méter)"""
+    return size * _SQRT3 * (q + r / 2), size * 1.5 * r
+
+
+def compute_price_surface(df, resolutions=DEFAULT_RESOLUTIONS):
+    """Hexagon ár/m² felület több felbontásban - DataFrame (SURFACE_COLUMNS)"""
+    if not {'geo_latitude', 'geo_longitude'}.issubset(df.columns):
+        return pd.DataFrame(columns=SURFACE_COLUMNS)
+
+    points = pd.DataFrame({
+        'lat': pd.to_numeric(df['geo_latitude'], errors='coerce'),
+        'lng': pd.to_numeric(df['geo_longitude'], errors='coerce'),
+        'ar_m2': price_per_m2(df),
+    }).dropna()
+    if points.empty:
+        return pd.DataFrame(columns=SURFACE_COLUMNS)
+
+    # Egész fokra kerekített origó - azonos területen futásról futásra ugyanaz a rács
+    origin = (round(points['lat'].mean()), round(points['lng'].mean()))
+    x, y = project(points['lat'], points['lng'], origin)
+
+    frames = []
+    for size in resolutions:
+        q, r = hex_cells(x, y, size)
+        grouped = points.assign(q=q, r=r).groupby(['q', 'r'])['ar_m2']
+        quartiles = grouped.quantile([0.25, 0.75]).unstack()
+        stats = pd.DataFrame({
+            'darab': grouped.size(),
+            'median_ar_m2': grouped.median(),
+            'also_kvartilis_m2': quartiles[0.25],
+            'felso_kvartilis_m2': quartiles[0.75],
+            'szoras_m2': grouped.std().fillna(0.0),
+        }).reset_index()
+        cx, cy = hex_centers(stats['q'].to_numpy(), stats['r'].to_numpy(), size)
+        stats['lat'], stats['lng'] = unproject(cx, cy, origin)
+        stats['felbontas_m'] = size
+        frames.append(stats)
+
+    surface = pd.concat(frames, ignore_index=True)[SURFACE_COLUMNS]
+    # Kompakt típusok az artefaktumhoz
+    surface = surface.astype({'felbontas_m': 'int32', 'q': 'int32', 'r': 'int32', 'darab': 'int32'})
+    for col in ('median_ar_m2', 'also_kvartilis_m2', 'felso_kvartilis_m2', 'szoras_m2'):
+        surface[col] = surface[col].round().astype('float32')
+    return surface
+
+
+def surface_path(csv_file):
+    """Artefaktum útvonala a CSV mellett"""
+    base = os.path.splitext(csv_file)[0]
+    return f"{base}_arfelulet.parquet" if PARQUET_AVAILABLE else f"{base}_arfelulet.csv"
+
+
+def save_price_surface(surface, csv_file):
+    """Felület mentése kompakt artefaktumként (atomikus írással)"""
+    from dataset_io import CSV_ENCODING, CSV_SEP, atomic_write
+
+    path = surface_path(csv_file)
+    if PARQUET_AVAILABLE:
+        atomic_write(path, lambda tmp: surface.to_parquet(tmp, index=False, compression='zstd'))
+    else:
+        atomic_write(path, lambda tmp: surface.to_csv(tmp, sep=CSV_SEP, encoding=CSV_ENCODING, index=False))
+    return path
+
+
+def refresh_price_surface(df, csv_file, resolutions=DEFAULT_RESOLUTIONS):
+    """Felület újraszámolása és mentése (ingest / geocoding után) - None, ha nincs mit menteni"""
+    surface = compute_price_surface(df, resolutions)
+    if surface.empty:
+        return None
+    return save_price_surface(surface, csv_file)
+
+
+def load_price_surface(csv_file=None, df=None, resolutions=DEFAULT_RESOLUTIONS):
+    """Előre számolt felület betöltése (ha frissebb a CSV-nél), különben számítás a df-ből"""
+    path = surface_path(csv_file) if csv_file else None
+    if path and os.path.exists(path) and (not os.path.exists(csv_file)
+                                          or os.path.getmtime(path) >= os.path.getmtime(csv_file)):
+        if path.endswith('.parquet'):
+            return pd.read_parquet(path)
+        from dataset_io import CSV_ENCODING, CSV_SEP
+        return pd.read_csv(path, sep=CSV_SEP, encoding=CSV_ENCODING)
+    if df is None:
+        return pd.DataFrame(columns=SURFACE_COLUMNS)
+    return compute_price_surface(df, resolutions)
+
+
+def hex_polygon(lat, lng, size):
+    """Hexagon csúcsai [lng, lat] listaként (GeoJSON sorrend)"""
+    angles = np.radians(np.arange(6) * 60 + 30)
+    cos_lat = math.cos(math.radians(lat))
+    lats = lat + np.degrees(size * np.sin(angles) / EARTH_RADIUS_M)
+    lngs = lng + np.degrees(size * np.cos(angles) / (EARTH_RADIUS_M * cos_lat))
+    ring = np.column_stack([lngs, lats]).round(6).tolist()
+    return ring + ring[:1]
+
+
+def surface_geojson(surface, resolution, min_count=1):
+    """Egy felbontás cellái GeoJSON FeatureCollection-ként (choropleth réteghez)"""
+    cells = surface[(surface['felbontas_m'] == resolution) & (surface['darab'] >= min_count)]
+    features = [{
+        'type': 'Feature',
+        'geometry': {'type': 'Polygon', 'coordinates': [hex_polygon(lat, lng, resolution)]},
+        'properties': {
+            'darab': int(count),
+            'median_ar_m2': float(median),
+            'also_kvartilis_m2': float(low),
+            'felso_kvartilis_m2': float(high),
+        },
+    } for lat, lng, count, median, low, high in zip(
+        cells['lat'], cells['lng'], cells['darab'], cells['median_ar_m2'],
+        cells['also_kvartilis_m2'], cells['felso_kvartilis_m2'])]
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def main():
+    """Felület számítása és mentése egy részletes CSV-hez"""
+    parser = argparse.ArgumentParser(description='Hexagon ár/m² felület előállítása koordinátás CSV-ből')
+    parser.add_argument('csv_file', help='Pipe elválasztós részletes CSV')
+    parser.add_argument('--resolutions', nargs='+', type=int, default=list(DEFAULT_RESOLUTIONS),
+                        help='Hexagon sugár(ak) méterben (alap: 250 500 1000)')
+    args = parser.parse_args()
+
+    from coordinate_store import attach_coordinates
+    from dataset_io import read_detailed_csv
+
+    df = attach_coordinates(read_detailed_csv(args.csv_file))
+    surface = compute_price_surface(df, args.resolutions)
+    if surface.empty:
+        print("❌ Nincs koordinátás, áras hirdetés - futtasd előbb: python add_coordinates.py <csv>")
+        sys.exit(1)
+
+    path = save_price_surface(surface, args.csv_file)
+    print(f"🔷 Ár/m² felület mentve: {path} ({os.path.getsize(path) / 1024:.1f} KB)")
+    for size, cells in surface.groupby('felbontas_m'):
+        print(f"   {size:5d} m: {len(cells):4d} cella | medián ár/m²: "
+              f"{cells['median_ar_m2'].min():,.0f} - {cells['median_ar_m2'].max():,.0f} Ft")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OFFLINE FEATURE ÚJRASZÁMOLÓ
+===========================
+
+🎯 HASZNÁLAT:
+python refeaturize.py <csv vagy glob> [<csv vagy glob> ...] [--workers N] [--geocode] [--output-dir DIR]
+
+📋 PÉLDA:
+python refeaturize.py "ingatlan_reszletes_*.csv"
+python refeaturize.py ingatlan_reszletes_xi_ker_20250823_162945.csv --workers 4
+
+⚡ A script automatikusan:
+1. Beolvassa a meglévő részletes CSV-ket (újra-scraping NÉLKÜL) - leírás nélküli
+   (csak `leiras_hash`) CSV-nél a leírást a tartalom archívumból tölti be
+2. Újraszámolja az összes származtatott oszlopot (szöveg pontok, lokáció, városrész)
+   a scraperrel azonos vektorizált + párhuzamos útvonalon
+3. Atomikusan visszaírja az eredményt (ideiglenes fájl + rename), mellé oszlopos .parquet másolatot
+
+💡 Alapértelmezésben NINCS Google Maps hívás - a meglévő koordináták és a
+   Google alapú lokáció oszlopok megmaradnak.
+   --geocode esetén a GOOGLE_MAPS_API_KEY alapján újra geocodol.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+from content_archive import archive_columns, strip_archived_columns
+from dataset_io import atomic_write_csv, read_detailed_csv, write_columnar
+from dataset_manifest import KIND_COORDINATES, dataset_kind, register_dataset
+from ingatlan_list_details_scraper import compute_text_features
+from generate_dashboard import extract_location_from_csv_name
+
+
+def expand_inputs(patterns):
+    """Fájlnevek és glob minták kibontása, duplikációk nélkül, sorrendtartóan"""
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for path in matches:
+            if path not in files:
+                files.append(path)
+    return files
+
+
+def refeaturize_file(csv_file, workers=1, geocode=False, output_dir=None):
+    """Egy részletes CSV származtatott oszlopainak újraszámolása"""
+    if not os.path.exists(csv_file):
+        print(f"❌ CSV fájl nem található: {csv_file}")
+        return None
+
+    df = read_detailed_csv(csv_file)
+    if 'leiras' not in df.columns:
+        print(f"⏭️  Kihagyva (nincs 'leiras' oszlop - nem részletes CSV): {csv_file}")
+        return None
+
+    _, location_key = extract_location_from_csv_name(os.path.basename(csv_file))
+    google_api_key = os.environ.get('GOOGLE_MAPS_API_KEY') if geocode else None
+
+    df = compute_text_features(
+        df, location_key,
+        google_api_key=google_api_key,
+        workers=workers,
+        keep_geocoded=not geocode
+    )
+
+    # Leírás a tartalom archívumba. Helyben írásnál a forrás fájl a leírás (esetleg egyetlen) példánya -
+    # csak külön könyvtárba írt koordinátás másolatból marad el
+    archive_columns(df)
+    output_file = os.path.join(output_dir, os.path.basename(csv_file)) if output_dir else csv_file
+    if os.path.abspath(output_file) != os.path.abspath(csv_file) and dataset_kind(csv_file) == KIND_COORDINATES:
+        df = strip_archived_columns(df)
+    atomic_write_csv(df, output_file)
+    write_columnar(df, output_file)
+    register_dataset(output_file, df)
+    return output_file, len(df)
+
+
+def main():
+    """Főalkalmazás"""
+    parser = argparse.ArgumentParser(description="Származtatott oszlopok offline újraszámolása részletes CSV-kben")
+    parser.add_argument('inputs', nargs='+', help="CSV fájlok vagy glob minták (pl. 'ingatlan_reszletes_*.csv')")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Párhuzamos processzek száma")
+    parser.add_argument('--geocode', action='store_true', help="Google Maps geocoding újrafuttatása (API kulcs szükséges)")
+    parser.add_argument('--output-dir', default=None, help="Kimeneti könyvtár (alapértelmezés: helyben felülírás)")
+    args = parser.parse_args()
+
+    print("🔁 OFFLINE FEATURE ÚJRASZÁMOLÁS")
+    print("=" * 50)
+
+    files = expand_inputs(args.inputs)
+    if not files:
+        print("❌ Nincs a mintáknak megfelelő fájl!")
+        sys.exit(1)
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    start = time.time()
+    done = 0
+    for csv_file in files:
+        file_start = time.time()
+        result = refeaturize_file(csv_file, workers=args.workers, geocode=args.geocode, output_dir=args.output_dir)
+        if result:
+            output_file, rows = result
+            done += 1
+            print(f"✅ {output_file}: {rows} sor ({time.time() - file_start:.2f}s)")
+
+    print(f"\n🎉 Kész: {done}/{len(files)} fájl, {time.time() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
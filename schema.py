@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+RÉSZLETES ADATKÉSZLET SÉMA - OSZLOPOK, KOMPAKT TÍPUSOK, VERZIÓ
+==============================================================
+
+🎯 CÉL:
+A részletes CSV ~70 oszlopa eddig betöltéskor kikövetkeztetett `object` / `float64`
+típust kapott - az ismétlődő szövegek (ingatlan_allapota, futes, hirdeto_tipus...)
+soronként külön stringként, a 0/1 `van_*` jelzők int64-ként, a pontszámok float64-ként.
+Itt egy helyen van deklarálva minden ismert oszlop típusa; az olvasók és az oszlopos
+író ezt alkalmazzák (dataset_io.read_detailed_csv / read_dataset / write_columnar).
+
+📋 HASZNÁLAT:
+    df = apply_schema(df)                       # ismert oszlopok kompakt típusra
+    missing = missing_required_columns(df)      # kötelező oszlopok ellenőrzése
+    pd.read_csv(path, dtype=csv_dtypes())       # szöveg / kategória típus már olvasáskor
+
+python schema.py <csv_filename>                 # memória: kikövetkeztetett vs. séma típusok
+
+⚡ Típusok:
+- TEXT: szabad szöveg (leírás, cím, link, ár/m² szöveg) - str
+- CATEGORY: kevés különböző értékű szöveg - category
+- FLAG: 0/1 jelzők (van_*) - int8 (hiányzó = 0)
+- BOOL: igaz/hamis oszlopok (iskola_korzetben) - bool (hiányzó = False)
+- SCORE: pontszámok, szorzók, parse-olt terület / telek / szoba - float32
+- FLOAT: koordináták, parse-olt ár (pontosság kell) - float64
+- COUNT: darabszámok - nullable Int16 / Int32
+- PRICE: egész Ft árak - nullable Int64
+- Nem deklarált oszlop változatlan marad (opcionális / új feature-k)
+
+💡 SCHEMA_VERSION: a manifest minden adatkészlethez rögzíti - típus vagy oszlop
+változásnál növelni kell.
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+SCHEMA_VERSION = 4
+
+TEXT = 'str'
+CATEGORY = 'category'
+FLAG = 'int8'
+BOOL = 'bool'
+SCORE = 'float32'
+FLOAT = 'float64'
+COUNT = 'Int16'
+LARGE_COUNT = 'Int32'
+PRICE = 'Int64'
+
+# Oszlop -> típus (a scraper / feature pipeline által írt oszlopok)
+COLUMN_DTYPES = {
+    # Lista oldal
+    'id': LARGE_COUNT,
+    'cim': TEXT,
+    'teljes_ar': CATEGORY,      # kerek árak / területek sokszor ismétlődnek
+    'nm_ar': TEXT,
+    'terulet': CATEGORY,
+    'telekterulet': CATEGORY,
+    'szobak': CATEGORY,
+    'kepek_szama': COUNT,
+    'link': TEXT,
+    # Részletes oldal
+    'reszletes_cim': TEXT,
+    'reszletes_ar': TEXT,
+    'epitesi_ev': CATEGORY,
+    'szint': CATEGORY,
+    'ingatlan_allapota': CATEGORY,
+    'futes': CATEGORY,
+    'erkely': CATEGORY,
+    'parkolas': CATEGORY,
+    'hirdeto_tipus': CATEGORY,
+    'leiras': TEXT,
+    'leiras_hash': TEXT,        # content_archive kulcs - a leírás a tartalom archívumban
+    'html_hash': TEXT,          # nyers adatlap HTML (content_archive)
+    'energetikai': CATEGORY,
+    'ingatlanos': CATEGORY,
+    'telefon': TEXT,
+    'allapot': CATEGORY,
+    'epulet_szintjei': CATEGORY,
+    'kilatas': CATEGORY,
+    'parkolohely_ara': CATEGORY,
+    'komfort': CATEGORY,
+    'legkondicionalas': CATEGORY,
+    'akadalymentesites': CATEGORY,
+    'furdo_wc': CATEGORY,
+    'tetoter': CATEGORY,
+    'pince': CATEGORY,
+    'parkolo': CATEGORY,
+    'tajolas': CATEGORY,
+    'kert': CATEGORY,
+    'napelem': CATEGORY,
+    'szigeteles': CATEGORY,
+    'rezsikoltség': CATEGORY,
+    # Szöveg feature-k
+    'zold_energia_premium_pont': SCORE,
+    'wellness_luxury_pont': SCORE,
+    'smart_technology_pont': SCORE,
+    'premium_design_pont': SCORE,
+    'premium_parking_pont': SCORE,
+    'premium_location_pont': SCORE,
+    'build_quality_pont': SCORE,
+    'negativ_tenyezok_pont': SCORE,
+    'ossz_pozitiv_pont': SCORE,
+    'ossz_negativ_pont': SCORE,
+    'netto_szoveg_pont': SCORE,
+    # Lokáció
+    'enhanced_keruleti_resz': CATEGORY,
+    'lokacio_konfidencia': SCORE,
+    'lokacio_elemzesi_modszer': CATEGORY,
+    'lokacio_forras': CATEGORY,
+    'lokacio_elemzesek_szama': COUNT,
+    'geo_latitude': FLOAT,
+    'geo_longitude': FLOAT,
+    'geo_address_from_api': TEXT,
+    'varosresz_kategoria': CATEGORY,
+    'varosresz_premium_szorzo': SCORE,
+    'iskola_korzetben': BOOL,
+    # Parse-olt szám oszlopok (listing_parsers.PARSED_COLUMNS)
+    'teljes_ar_ft': PRICE,
+    'teljes_ar_millió': FLOAT,
+    'nm_ar_ft': PRICE,
+    'terulet_szam': SCORE,
+    'telek_m2': SCORE,
+    'szobak_szam': SCORE,
+}
+
+# Előtag -> típus (dinamikus oszlopok: jelzők, POI távolságok / darabszámok)
+PREFIX_DTYPES = {
+    'van_': FLAG,
+    'dist_': SCORE,
+    'cnt_': LARGE_COUNT,
+}
+
+# Ezek nélkül az adatkészlet nem használható (dashboard, történet, geocoding)
+REQUIRED_COLUMNS = ('cim', 'teljes_ar', 'terulet', 'link')
+
+
+def column_dtype(column):
+    """Deklarált típus egy oszlophoz (név, majd előtag alapján) - None, ha nem deklarált"""
+    if column in COLUMN_DTYPES:
+        return COLUMN_DTYPES[column]
+    for prefix, dtype in PREFIX_DTYPES.items():
+        if column.startswith(prefix):
+            return dtype
+    return None
+
+
+def csv_dtypes(categories=True):
+    """read_csv `dtype` paraméter: szöveg és kategória oszlopok típusa már olvasáskor
+
+    A szám oszlopok itt kimaradnak (hiányzó érték / régi formátum miatt) - azokat
+    az apply_schema alakítja át.
+    """
+    return {column: (dtype if categories else TEXT) for column, dtype in COLUMN_DTYPES.items()
+            if dtype in (TEXT, CATEGORY)}
+
+
+def _convert(values, dtype):
+    if dtype == TEXT:
+        return values if pd.api.types.is_string_dtype(values) else values.astype(TEXT).where(values.notna())
+    if dtype == CATEGORY:
+        return values.astype(CATEGORY)
+    if dtype == BOOL:
+        return values.astype(str).str.lower().isin(['true', '1', '1.0'])
+    numbers = pd.to_numeric(values, errors='coerce') if not pd.api.types.is_bool_dtype(values) else values
+    if dtype == FLAG:
+        return numbers.fillna(0).astype(np.int8)
+    if dtype in (COUNT, LARGE_COUNT, PRICE):
+        return numbers.round().astype(dtype)
+    return numbers.astype(dtype)
+
+
+def apply_schema(df, categories=True):
+    """Ismert oszlopok átalakítása a deklarált típusra (helyben) - `categories=False`: kategória helyett str"""
+    for column in df.columns:
+        dtype = column_dtype(column)
+        if dtype is None:
+            continue
+        if dtype == CATEGORY and not categories:
+            dtype = TEXT
+        if str(df[column].dtype) == dtype:
+            continue
+        try:
+            df[column] = _convert(df[column], dtype)
+        except (TypeError, ValueError) as e:
+            print(f"⚠️  Séma típus hiba ({column} -> {dtype}): {e}")
+    return df
+
+
+def missing_required_columns(df):
+    """Hiányzó kötelező oszlopok listája"""
+    return [column for column in REQUIRED_COLUMNS if column not in df.columns]
+
+
+def main():
+    """Memória összevetés: kikövetkeztetett típusok vs. séma"""
+    parser = argparse.ArgumentParser(description='Részletes CSV séma ellenőrzés és memória mérés')
+    parser.add_argument('csv_file', help='Pipe elválasztós részletes CSV')
+    args = parser.parse_args()
+
+    from dataset_io import CSV_ENCODING, CSV_SEP, add_parsed_columns
+
+    inferred = add_parsed_columns(pd.read_csv(args.csv_file, sep=CSV_SEP, encoding=CSV_ENCODING))
+    typed = apply_schema(add_parsed_columns(pd.read_csv(args.csv_file, sep=CSV_SEP, encoding=CSV_ENCODING,
+                                                        dtype=csv_dtypes())))
+    missing = missing_required_columns(typed)
+    undeclared = [column for column in typed.columns if column_dtype(column) is None]
+
+    for label, exclude in (('teljes', ()), ('leírás nélkül', ('leiras',))):
+        before = inferred.drop(columns=list(exclude), errors='ignore').memory_usage(deep=True).sum()
+        after = typed.drop(columns=list(exclude), errors='ignore').memory_usage(deep=True).sum()
+        print(f"💾 Memória ({label}): {before / 1024:.0f} KB -> {after / 1024:.0f} KB ({before / after:.1f}x)")
+    print(f"📋 Séma v{SCHEMA_VERSION}: {len(typed.columns) - len(undeclared)} deklarált oszlop, "
+          f"{len(undeclared)} nem deklarált{': ' + ', '.join(undeclared) if undeclared else ''}")
+    if missing:
+        print(f"❌ Hiányzó kötelező oszlopok: {', '.join(missing)}")
+
+
+if __name__ == "__main__":
+    main()
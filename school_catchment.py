@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ISKOLAKÖRZET TAGSÁG - BETÖLTÉSKOR EGYSZER SZÁMOLVA
+==================================================
+
+🎯 CÉL:
+Az iskolakörzet tagság (`iskola_korzetben`, `iskola_korzet`) a részletes CSV
+készítésekor kerül kiszámításra minden lokációra, amelyhez körzet fájl tartozik -
+a dashboardnak nem kell minden futáskor beolvasnia és soronként illesztenie.
+
+📋 HASZNÁLAT:
+    apply_school_catchments(df)          # iskola_korzetben / iskola_korzet oszlopok
+    catchment = load_catchments()[0]
+    catchment.contains_address("Budaörs, Baross utca 17.")   # True
+
+python school_catchment.py ingatlan_reszletes_budaors_20250822_220240.csv
+
+⚡ Körzet fájlok (a munkakönyvtárban, település szerint):
+- iskola_<telepules>_cimek.txt: soronként utca + opcionális házszám szabály
+  ('BAROSS UTCA páratlan 1 -45.', 'VASÚT UTCA 1-től 9-ig', 'BEREGSZÁSZ UTCA páratlan',
+  több utca egy sorban: 'DÉZSMA UTCA DIÓFA UTCA')
+  -> kanonikus utca kulcs -> házszám tartományok hash index
+- iskola_<telepules>_korzet.geojson (opcionális): körzet poligon(ok); koordinátás
+  hirdetésnél ez dönt, a többinél az utca szabályok
+- Csak az adott település címeire vonatkozik; ismert utca, de ismeretlen házszám
+  esetén utca szinten tagnak számít
+"""
+
+import glob
+import math
+import os
+import re
+import sys
+from collections import defaultdict
+from functools import lru_cache
+
+import pandas as pd
+
+from address_normalizer import STREET_TYPES, parse_address, street_key, town_key
+
+CATCHMENT_GLOB = 'iskola_*_cimek.txt'
+_CATCHMENT_NAME_RE = re.compile(r'^iskola_(.+)_cimek\.txt$')
+
+_PARITY_WORDS = {'paros': 0, 'paratlan': 1}
+
+
+def compact_street_key(key):
+    """Utca kulcs szóközök nélküli névvel ('kolozsvar i utca' -> 'kolozsvari utca') - elírás tűrő"""
+    tokens = key.split()
+    if len(tokens) > 1 and tokens[-1] in STREET_TYPES:
+        return f"{''.join(tokens[:-1])} {tokens[-1]}"
+    return ''.join(tokens)
+
+
+def parse_catchment_line(line):
+    """Körzet fájl sora -> [(utca kulcs, paritás|None, kezdő házszám, utolsó házszám)]"""
+    tokens = street_key(line).split()
+    streets = []
+    name = []
+    rest_start = len(tokens)
+    for i, token in enumerate(tokens):
+        if token in _PARITY_WORDS or token.isdigit():
+            rest_start = i
+            break
+        # Típus szó név nélkül a név része ('KÖZ TÉR' -> 'koz ter')
+        if token in STREET_TYPES and name:
+            streets.append(' '.join(name + [token]))
+            name = []
+        else:
+            name.append(token)
+    if name:
+        streets.append(' '.join(name))
+
+    rest = tokens[rest_start:]
+    parity = next((_PARITY_WORDS[token] for token in rest if token in _PARITY_WORDS), None)
+    numbers = [int(token) for token in rest if token.isdigit()]
+    start, end = 1, math.inf
+    if len(numbers) >= 2:
+        start, end = numbers[0], numbers[1]
+    elif len(numbers) == 1:
+        # '1-től' -> nyitott vég; '9-ig' -> 1..9
+        if 'ig' in rest and 'tol' not in rest:
+            end = numbers[0]
+        else:
+            start = numbers[0]
+    return [(street, parity, start, end) for street in streets]
+
+
+class SchoolCatchment:
+    """Egy iskolakörzet: település + utca/házszám szabályok (+ opcionális poligonok)"""
+
+    def __init__(self, name, town, rules, polygons=None):
+        self.name = name
+        self.town = town
+        self.rules = defaultdict(list)
+        for street, parity, start, end in rules:
+            self.rules[compact_street_key(street)].append((parity, start, end))
+        self.polygons = polygons
+
+    @classmethod
+    def from_files(cls, cimek_path, polygons_path=None):
+        """Körzet betöltése iskola_<telepules>_cimek.txt (+ _korzet.geojson) fájlból"""
+        match = _CATCHMENT_NAME_RE.match(os.path.basename(cimek_path))
+        name = match.group(1) if match else os.path.splitext(os.path.basename(cimek_path))[0]
+        rules = []
+        with open(cimek_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    rules.extend(parse_catchment_line(line))
+
+        polygons = None
+        if polygons_path is None:
+            polygons_path = os.path.join(os.path.dirname(cimek_path), f"iskola_{name}_korzet.geojson")
+        if os.path.exists(polygons_path):
+            from district_resolver import DistrictResolver
+            polygons = DistrictResolver.from_geojson(polygons_path)
+        return cls(name, town_key(name.replace('_', ' ')), rules, polygons)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def contains_address(self, address):
+        """Cím a körzetben van-e (utca + házszám szabályok alapján)"""
+        cim = parse_address(address)
+        if cim.telepules != self.town or not cim.utca:
+            return False
+        street_rules = self.rules.get(compact_street_key(cim.utca))
+        if not street_rules:
+            return False
+        if cim.hazszam is None:
+            return True  # Utca szintű tagság
+        return any(
+            (parity is None or cim.hazszam % 2 == parity) and start <= cim.hazszam <= end
+            for parity, start, end in street_rules
+        )
+
+    def membership(self, df):
+        """Tagság a DataFrame minden sorára (bool Series) - egyedi címenként egyszer számolva"""
+        if 'cim' not in df.columns:
+            return pd.Series(False, index=df.index)
+        addresses = df['cim'].astype(str)
+        by_address = {address: self.contains_address(address) for address in addresses.unique()}
+        member = addresses.map(by_address).astype(bool)
+
+        if self.polygons is not None and {'geo_latitude', 'geo_longitude'}.issubset(df.columns):
+            lats = pd.to_numeric(df['geo_latitude'], errors='coerce')
+            lngs = pd.to_numeric(df['geo_longitude'], errors='coerce')
+            has_coords = (lats.notna() & lngs.notna()).to_numpy()
+            if has_coords.any():
+                resolved = self.polygons.resolve_batch(lats[has_coords], lngs[has_coords])
+                inside = resolved[['telepules', 'kerulet', 'varosresz']].notna().any(axis=1).to_numpy()
+                member.loc[has_coords] = inside
+        return member
+
+
+@lru_cache(maxsize=4)
+def _load_catchments(paths):
+    catchments = []
+    for path in paths:
+        try:
+            catchments.append(SchoolCatchment.from_files(path))
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Iskolakörzet fájl hiba ({path}): {e}")
+    return tuple(catchments)
+
+
+def load_catchments(pattern=CATCHMENT_GLOB):
+    """Minden iskolakörzet fájl betöltése (fájlonként egyszer, cache-elve)"""
+    return _load_catchments(tuple(sorted(glob.glob(pattern))))
+
+
+def apply_school_catchments(df, catchments=None):
+    """iskola_korzetben / iskola_korzet oszlopok kiszámítása (helyben) - körzet fájl nélkül nincs változás"""
+    catchments = load_catchments() if catchments is None else catchments
+    if not catchments or df.empty:
+        return df
+
+    korzet = pd.Series([None] * len(df), index=df.index, dtype=object)
+    for catchment in catchments:
+        member = catchment.membership(df) & korzet.isna()
+        korzet[member] = catchment.name
+    df['iskola_korzet'] = korzet
+    df['iskola_korzetben'] = korzet.notna()
+    return df
+
+
+def main():
+    """Körzet tagság kiírása egy részletes CSV-re (ellenőrzéshez)"""
+    if len(sys.argv) != 2:
+        print("❌ Használat: python school_catchment.py <csv_filename>")
+        sys.exit(1)
+
+    from dataset_io import read_detailed_csv
+
+    catchments = load_catchments()
+    if not catchments:
+        print(f"❌ Nincs iskolakörzet fájl ({CATCHMENT_GLOB})")
+        sys.exit(1)
+    for catchment in catchments:
+        polygons = f", {len(catchment.polygons)} poligon" if catchment.polygons is not None else ''
+        print(f"🏫 {catchment.name}: {len(catchment)} utca{polygons}")
+
+    df = apply_school_catchments(read_detailed_csv(sys.argv[1]))
+    members = df[df['iskola_korzetben']]
+    print(f"\n✅ Körzetben: {len(members)}/{len(df)} hirdetés")
+    for _, row in members.iterrows():
+        print(f"   {row['iskola_korzet']}: {row.get('cim', '')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SZÖVEG NORMALIZÁLÓ - EGYSZERI TOKENIZÁLÁS
+=========================================
+
+🎯 CÉL:
+Minden leírás pontosan EGYSZER kerül feldolgozásra (HTML eltávolítás,
+kisbetűsítés, tokenizálás). Az eredmény egy `NormalizaltSzoveg` objektum,
+amit minden elemző (kategória pontozás, hirdető típus, városrész,
+lokáció kinyerés) közösen használ - nincs soronkénti ismételt regex futtatás.
+
+📋 PÉLDA:
+    norm = normalize_text("Eladó <b>napelemes</b> ház, Kőbánya!")
+    norm.text                          # 'eladó napelemes ház kőbánya'
+    norm.tokens                        # ['eladó', 'napelemes', 'ház', 'kőbánya']
+    norm.offsets                       # [(0, 5), (9, 18), (23, 26), (28, 35)]
+    norm.contains('napelem')           # True
+    norm.contains('kobanya', fold=True)  # True (ékezet-független)
+
+⚡ Illesztési szabályok (minden elemzőnél azonosak):
+- A kulcsszó ugyanazon a normalizáláson megy át, mint a szöveg
+- 4+ karakteres kulcsszó: részszó egyezés (pl. 'napelem' -> 'napelemes')
+- 1-3 karakteres egyszavas kulcsszó: csak teljes token (pl. 'bt', 'per', 'ii')
+"""
+
+import re
+from functools import lru_cache
+
+# HTML tag VAGY szó token - egyetlen regex menet
+_TOKEN_RE = re.compile(r'<[^>]+>|\w+')
+
+# Ékezetes betűk -> alap betű (1:1 karakter csere, így az offsetek megmaradnak)
+_ACCENT_FOLD = str.maketrans('áéíóöőúüűàâäçèêëîïôùûÿ', 'aeiooouuuaaaceeeiiouuy')
+
+# Ennél rövidebb egyszavas kulcsszavak csak teljes tokenként egyeznek
+_SHORT_KEYWORD_MAX_LEN = 3
+
+
+def fold_accents(text):
+    """Ékezetek eltávolítása (kisbetűs szövegre)"""
+    return text.translate(_ACCENT_FOLD)
+
+
+class NormalizaltSzoveg:
+    """Egy leírás kanonikus, kisbetűs token-folyama + eredeti offsetek"""
+
+    __slots__ = ('raw', 'tokens', 'offsets', 'text', '_padded', '_folded', '_token_set')
+
+    def __init__(self, raw, tokens, offsets):
+        self.raw = raw
+        self.tokens = tokens
+        self.offsets = offsets
+        self.text = ' '.join(tokens)
+        self._padded = f" {self.text} "
+        self._folded = None
+        self._token_set = None
+
+    def __len__(self):
+        return len(self.text)
+
+    def __bool__(self):
+        return bool(self.tokens)
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"NormalizaltSzoveg({self.text[:40]!r}, tokens={len(self.tokens)})"
+
+    @property
+    def folded(self):
+        """Ékezet nélküli kanonikus szöveg (lusta számítás, szóközzel keretezve)"""
+        if self._folded is None:
+            self._folded = fold_accents(self._padded)
+        return self._folded
+
+    @property
+    def token_set(self):
+        """Tokenek halmaza gyors teljes-szó kereséshez"""
+        if self._token_set is None:
+            self._token_set = frozenset(self.tokens)
+        return self._token_set
+
+    def count(self, keyword, fold=False):
+        """Kulcsszó előfordulásainak száma a közös illesztési szabályok szerint"""
+        phrase, short = _keyword_key(keyword)
+        if not phrase:
+            return 0
+
+        if short:
+            if fold:
+                phrase = fold_accents(phrase)
+                return sum(1 for token in self.tokens if fold_accents(token) == phrase)
+            return self.tokens.count(phrase)
+
+        if fold:
+            return self.folded.count(fold_accents(phrase))
+        return self._padded.count(phrase)
+
+    def contains(self, keyword, fold=False):
+        """Tartalmazza-e a szöveg a kulcsszót"""
+        phrase, short = _keyword_key(keyword)
+        if not phrase:
+            return False
+
+        if short and not fold:
+            return phrase in self.token_set
+
+        if not fold:
+            return phrase in self._padded
+        phrase = fold_accents(phrase)
+        if short:
+            return f" {phrase} " in self.folded
+        return phrase in self.folded
+
+    def contains_any(self, keywords, fold=False):
+        """Bármelyik kulcsszó előfordul-e"""
+        return any(self.contains(kw, fold=fold) for kw in keywords)
+
+    def count_matches(self, keywords, fold=False):
+        """Hány különböző kulcsszó fordul elő"""
+        return sum(1 for kw in keywords if self.contains(kw, fold=fold))
+
+
+def _tokenize(raw):
+    """HTML eltávolítás + kisbetűsítés + tokenizálás egy menetben"""
+    tokens = []
+    offsets = []
+    for match in _TOKEN_RE.finditer(raw):
+        token = match.group()
+        if token[0] == '<':
+            continue  # HTML tag
+        tokens.append(token.lower())
+        offsets.append(match.span())
+    return tokens, offsets
+
+
+# Kis cache: az újrahasznosítás soron belül történik (ugyanazt a leírást több elemző kéri egymás
+# után) - teljes leírásokat (szöveg + tokenek + offsetek) tart, hosszú futású folyamatban nem nőhet nagyra
+_NORMALIZE_CACHE_SIZE = 2048
+
+
+@lru_cache(maxsize=_NORMALIZE_CACHE_SIZE)
+def _normalize_str(raw):
+    tokens, offsets = _tokenize(raw)
+    return NormalizaltSzoveg(raw, tokens, offsets)
+
+
+_EMPTY = NormalizaltSzoveg('', [], [])
+
+
+def normalize_text(text):
+    """Szöveg normalizálása - már normalizált bemenetet változatlanul ad vissza"""
+    if isinstance(text, NormalizaltSzoveg):
+        return text
+    if text is None:
+        return _EMPTY
+    # pandas NaN kezelése pandas import nélkül
+    if isinstance(text, float) and text != text:
+        return _EMPTY
+    return _normalize_str(str(text))
+
+
+def combine_normalized(*parts):
+    """Több normalizált szöveg összefűzése újratokenizálás nélkül
+
+    Az eredmény egyenértékű a részek szóközzel összefűzött nyers szövegének
+    normalizálásával (offsetek az összefűzött nyers szövegre vonatkoznak).
+    """
+    norms = [normalize_text(p) for p in parts]
+    tokens = []
+    offsets = []
+    shift = 0
+    for norm in norms:
+        tokens.extend(norm.tokens)
+        offsets.extend((start + shift, end + shift) for start, end in norm.offsets)
+        shift += len(norm.raw) + 1
+    raw = ' '.join(norm.raw for norm in norms)
+    return NormalizaltSzoveg(raw, tokens, offsets)
+
+
+@lru_cache(maxsize=8192)
+def _keyword_key(keyword):
+    """Kulcsszó normalizálása ugyanazzal a szabállyal, mint a szöveg"""
+    tokens, _ = _tokenize(str(keyword))
+    phrase = ' '.join(tokens)
+    short = len(tokens) == 1 and len(phrase) <= _SHORT_KEYWORD_MAX_LEN
+    return phrase, short
+
+
+def keyword_pattern(keyword):
+    """Regex minta a kulcsszóhoz - vektorizált (pandas .str.count) illesztéshez
+
+    Ugyanazt a szabályt követi, mint a `NormalizaltSzoveg.count`, de a
+    kanonikus szövegek teljes oszlopán egyszerre futtatható.
+    """
+    phrase, short = _keyword_key(keyword)
+    if not phrase:
+        return None
+    if short:
+        return rf"(?<!\S){re.escape(phrase)}(?!\S)"
+    return re.escape(phrase)